@@ -1,6 +1,7 @@
 from .pycopterui import Ui_pycopter
 from .input_checker import InputChecker 
-from pycopter import Rotor
+from pycopter import Rotor, Copter, Battery, ElectricMotor, discharge, Engine
+from pycopter.batch import range_endurance
 
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
 from matplotlib.figure import Figure
@@ -66,6 +67,7 @@ class Interface():
         # Placeholders
         self.save_path = ""
         self.fig = None
+        self._engine = None
 
     def print(self, text):
         """Prints text into the dedicated area in GUI."""
@@ -91,6 +93,7 @@ class Interface():
         self.print("Initializing rotor...")
         self.rotor = Rotor(airfoil, num_blades, chord, diameter, tip_speed_mach, 
                            washout, rotor_root_cutout, b_new_polars)
+        self.copter = Copter.single_main_rotor(self.rotor) # Typical tail rotor sized from the main rotor.
         self.print(f"Tip Speed: {self.rotor.tip_speed:.3f} [m/s] | Rotor Disk Area: {self.rotor.rotor_disk_area:.3f} [m2] | Solidity: {self.rotor.solidity:.3f}")
     
         self.ui.calcHoverBtn.setEnabled(True)
@@ -227,6 +230,12 @@ class Interface():
 
         self.ui.actionSaveFigure.setEnabled(True)
         
+    def tail_rotor_factor(self, gross, velocities, density, flat_plate_area):
+        """Returns the ratio of the total to the main rotor power at the velocities[m/s], with the tail rotor power of 'self.copter'."""
+        self.copter.hover(gross, density)
+        self.copter.forward_flight(velocities, density, flat_plate_area)
+        return self.copter.tail_rotor_factor
+
     ##################### PLOT FUNCTIONS #####################
     """All plot functions calculate the data, create the figure, and return it to 'Generate Plot' function above which adds them to GUI."""
 
@@ -237,19 +246,11 @@ class Interface():
         self.ui.textOutputWidget.setPlainText
 
         self.rotor.hover(gross)
-        test_velocities = np.linspace(10,80, 50)
-        induced_powers = np.zeros((50))
-        profile_powers = induced_powers.copy()
-        parasite_powers = induced_powers.copy()
- 
-        for i, vel in enumerate(test_velocities):
-            self.rotor.forward_flight(vel, density, flat_plate_area)
-            induced_powers[i] = self.rotor.power_induced
-            profile_powers[i] = self.rotor.power_profile
-            parasite_powers[i] = self.rotor.power_parasite
-        induced_powers /= 1000
-        profile_powers /= 1000
-        parasite_powers /= 1000
+        sweep = self.rotor.velocity_sweep(10, 80, density, flat_plate_area)
+        test_velocities = sweep["velocity"].copy()
+        induced_powers = sweep["power_induced"] / 1000
+        profile_powers = sweep["power_profile"] / 1000
+        parasite_powers = sweep["power_parasite"] / 1000
         total_powers = induced_powers + profile_powers + parasite_powers
         test_velocities *= 3.6
                
@@ -259,6 +260,8 @@ class Interface():
         ax1.plot(test_velocities, profile_powers*1.34102209, color="orange", label="Profile")
         ax1.plot(test_velocities, parasite_powers*1.34102209, color="red", label="Parasite")
         ax1.plot(test_velocities, total_powers*1.34102209, color="black", label="Total")
+        speeds = self.rotor.optimal_speeds(None, density, flat_plate_area, 10, 80)
+        ax1.axvline(speeds["velocity_min_power"]*3.6, color="gray", linestyle="--", label=f"Vmp = {speeds['velocity_min_power']*3.6:.1f} km/hr")
         ax1.set_title("Forward Flight Powers")
         ax1.set_xlabel("Free Stream Velocity [km/hr]")
         ax1.set_ylabel("Shaft Horsepower [SHP]")
@@ -266,8 +269,21 @@ class Interface():
         ax1.grid()
         return fig
 
+    def engine(self):
+        """
+        Returns the engine deck of the fuel flow plots: two bundled TV3-117 engines, as on the default Mi-8 rotor. Falls back to the
+        constant sfc of the input if the deck is not found.
+        """
+        if self._engine is None:
+            try:
+                self._engine = Engine("TV3-117", engines=2)
+            except FileNotFoundError as error:
+                self.print(f"{error} Using the constant sfc.")
+                return self.ui.sfcSpinner.value()
+        return self._engine
+
     def plot_range_endurance_vs_velocity(self):
-        sfc = self.ui.sfcSpinner.value()
+        engine = self.engine()
         transmission_loss = self.ui.transmissionLossSpinner.value()
         gross = self.ui.grossSpinner.value()
         fuel = self.ui.fuelCapSpinner.value()
@@ -276,24 +292,16 @@ class Interface():
 
         self.rotor.hover(gross)
         lift = self.rotor.hover_thrust
-        test_velocities = np.linspace(10,80, 50)
-        effective_drags = np.zeros((50))
-        total_powers = effective_drags.copy()
-
-        for i, vel in enumerate(test_velocities):
-            self.rotor.forward_flight(vel, density, flat_plate_area)
-            effective_drags[i] = self.rotor.drag_induced + self.rotor.drag_profile + self.rotor.body_drag
-            total_powers[i] = self.rotor.power_total
-        total_powers /= 1000
-        engine_powers = 1.13 * total_powers.copy() / (1 - transmission_loss) #0.13 goes to tail rotor
+        sweep = self.rotor.velocity_sweep(10, 80, density, flat_plate_area)
+        test_velocities = sweep["velocity"].copy()
+        effective_drags = sweep["drag_induced"] + sweep["drag_profile"] + sweep["body_drag"]
+        tail_rotor_factor = self.tail_rotor_factor(gross, sweep["velocity"], density, flat_plate_area)
         test_velocities *= 3.6
-        
-        sfc = 1.13 * sfc / (1 - transmission_loss) # 1.13 for tail rotor
 
         ld = lift/effective_drags
-        fuel_consumptions = engine_powers * sfc
-        endurance = fuel / fuel_consumptions
-        breguet_ranges = 366/sfc * ld * np.log(gross/(gross-fuel)) # 366 for km instead of n-miles
+        # Fuel flow of the engine deck at the engine power of each velocity. NaN above the power available.
+        breguet_ranges, endurance = range_endurance(sweep["power_total"], ld, gross, fuel, engine, transmission_loss, tail_rotor_factor,
+                                                    density)
         
         fig, ax1 = plt.subplots()
 
@@ -311,7 +319,7 @@ class Interface():
         return fig
         
     def plot_sr_ld_vs_velocity(self):
-        sfc = self.ui.sfcSpinner.value()
+        engine = self.engine()
         transmission_loss = self.ui.transmissionLossSpinner.value()
         gross = self.ui.grossSpinner.value()
         fuel = self.ui.fuelCapSpinner.value()
@@ -320,26 +328,23 @@ class Interface():
 
         self.rotor.hover(gross)
         lift = self.rotor.hover_thrust
-        test_velocities = np.linspace(10,80, 50)
-        effective_drags = np.zeros((50))
-        total_powers = effective_drags.copy()
-
-        for i, vel in enumerate(test_velocities):
-            self.rotor.forward_flight(vel, density, flat_plate_area)
-            effective_drags[i] = self.rotor.drag_induced + self.rotor.drag_profile + self.rotor.body_drag
-            total_powers[i] = self.rotor.power_total
-        total_powers /= 1000
+        sweep = self.rotor.velocity_sweep(10, 80, density, flat_plate_area)
+        test_velocities = sweep["velocity"].copy()
+        effective_drags = sweep["drag_induced"] + sweep["drag_profile"] + sweep["body_drag"]
+        total_powers = sweep["power_total"] / 1000
         engine_powers = total_powers.copy()
-        engine_powers = 1.13 * engine_powers / (1 - transmission_loss) #0.13 goes to tail rotor
+        engine_powers = self.tail_rotor_factor(gross, sweep["velocity"], density, flat_plate_area) * engine_powers / (1 - transmission_loss)
         test_velocities *= 3.6
         
         ld = lift/effective_drags
-        fuel_consumptions = engine_powers * sfc
+        fuel_consumptions = engine.fuel_flow(engine_powers, density) if isinstance(engine, Engine) else engine_powers * engine
         specific_range = test_velocities / (fuel_consumptions) # km range / kg fuel
 
         fig, ax1 = plt.subplots()
 
         ax1.plot(test_velocities, specific_range, color="orange", label="Specific Range")
+        speeds = self.rotor.optimal_speeds(None, density, flat_plate_area, 10, 80)
+        ax1.axvline(speeds["velocity_best_range"]*3.6, color="gray", linestyle="--", label=f"Vbr = {speeds['velocity_best_range']*3.6:.1f} km/hr")
         ax1.set_title("Specific Range, Lift/Drag Ratio - Velocity")
         ax1.set_xlabel("Free Stream Velocity [km/hr]")
         ax1.set_ylabel("Specific Range [km/kgf], LD Ratio")
@@ -395,9 +400,8 @@ class Interface():
         gross = self.ui.grossSpinner.value()
         self.rotor.hover(gross)
         heights = np.linspace(5.65, 50, 50)
-        thrusts_ige = np.zeros((50))
-        for i, height in enumerate(heights):
-            thrusts_ige[i] = self.rotor.ige(self.rotor.hover_thrust, height)
+        thrusts_ige = self.rotor.ige(self.rotor.hover_thrust, heights)
+        powers_ige = self.rotor.ige_power(heights)
 
         fig, ax = plt.subplots()
         ax.plot(thrusts_ige/9.81, heights, label="Thrust")
@@ -406,8 +410,12 @@ class Interface():
         ax.scatter(thrusts_ige[0]/9.81, 5.65, marker=(5,1), color="red", label="Landed Thrust")
         ax.set_xlabel("Thrust in Ground Effect [kg]")
         ax.set_ylabel("Rotor Height [m]")
+
+        ax2 = ax.twiny()
+        ax2.plot(powers_ige*0.00134102209, heights, color="green", linestyle="--", label="Power at Base Thrust")
+        ax2.set_xlabel("Shaft Horsepower in Ground Effect [SHP]")
         ax.grid()
-        ax.legend()
+        fig.legend()
         return fig
     
     def plot_range_electric(self):
@@ -418,17 +426,15 @@ class Interface():
         density = self.ui.densitySpinner.value()
 
         self.rotor.hover(gross)
-        test_velocities = np.linspace(10,80, 50)
-        total_powers = np.zeros((50))
-
-        for i, vel in enumerate(test_velocities):
-            self.rotor.forward_flight(vel, density, flat_plate_area)
-            total_powers[i] = self.rotor.power_total
-        total_powers /= 1000
-        motor_powers = 1.13 * total_powers.copy() / (1 - transmission_loss)
+        sweep = self.rotor.velocity_sweep(10, 80, density, flat_plate_area)
+        test_velocities = sweep["velocity"].copy()
+        total_powers = sweep["power_total"] / 1000
+        motor_powers = self.tail_rotor_factor(gross, test_velocities, density, flat_plate_area) * total_powers / (1 - transmission_loss)
         test_velocities *= 3.6
 
-        endurance = battery_capacity / motor_powers
+        battery = Battery.from_energy(battery_capacity)
+        motor = ElectricMotor(1.5 * motor_powers.max())
+        endurance = discharge(battery, motor, motor_powers)["endurance"]
         flight_range = endurance * test_velocities
 
         fig, ax1 = plt.subplots()
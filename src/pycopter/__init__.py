@@ -4,4 +4,16 @@ __author__ = """Mehar Can Yildirim"""
 __email__ = 'yildirimmehar@gmail.com'
 __version__ = '0.0.1'
 
-from .pycopter import *
\ No newline at end of file
+from .pycopter import *
+from .batch import hover_batch, BatchHoverResult
+from .montecarlo import monte_carlo, MonteCarloResult, Normal, LogNormal, Uniform, Triangular
+from .results import open_sink, result_fields, result_records
+from .sweep import sweep
+from .perfdb import compute_grid, open_grid, save_grid, PerformanceGrid
+from .factory import RotorFactory, get_rotor
+from .population import RotorGeometry, RotorPopulation
+from .engine import Engine
+from .electric import Battery, ElectricMotor, discharge
+from .loads import SpanwiseLoads
+from . import profiling
+
@@ -0,0 +1,105 @@
+"""
+Azimuth x radius blade element grid for forward flight. All quantities are 2-D arrays with azimuth along the
+first axis and blade radius along the second, so that a whole rotor revolution is evaluated without Python loops.
+"""
+
+import numpy as np
+
+from .panel import naca_parameters, drag_divergence_mach
+
+
+def azimuth_grid(root_cutout=0.0, n_azimuth=72, n=50):
+    """
+    Returns the azimuth angles and normalized element radii of the rotor disk grid.
+
+    Parameters
+    ----------
+    root_cutout : float
+        Normalized radius r/R where the blade begins.
+    n_azimuth : int
+        Number of azimuth stations in a revolution.
+    n : int
+        Number of blade elements.
+
+    Returns
+    -------
+    ndarray, ndarray, float
+        Azimuth column [rad] of shape (n_azimuth, 1), element center row [r/R] of shape (1, n) and element length [r/R].
+    """
+    psi = np.linspace(0, 2*np.pi, n_azimuth, endpoint=False)[:, None]
+    edges = np.linspace(root_cutout, 1, n + 1)
+    return psi, ((edges[:-1] + edges[1:]) / 2)[None, :], edges[1] - edges[0]
+
+def blade_element_angles(psi, r, tip_speed, velocity, inflow_ratio, theta0, twist, theta1s=0.0, theta1c=0.0, speed_of_sound=343):
+    """
+    Returns the velocities, angle of attack and Mach number of every grid cell.
+
+    Parameters
+    ----------
+    psi, r : ndarray
+        Azimuth [rad] and normalized radius grids from 'azimuth_grid'.
+    tip_speed : float [m/s]
+        Rotor tip speed ΩR.
+    velocity : float [m/s]
+        Forward flight speed.
+    inflow_ratio : float or ndarray
+        Total inflow through the disk divided by the tip speed, positive downwards.
+    theta0 : float [°]
+        Blade pitch at the rotor center.
+    twist : float [°]
+        Linear root to tip twist.
+    theta1s, theta1c : float [°]
+        Longitudinal and lateral cyclic pitch.
+    speed_of_sound : float [m/s]
+
+    Returns
+    -------
+    ndarray, ndarray, ndarray, ndarray
+        Tangential and perpendicular velocities [m/s], angle of attack [°] and Mach number.
+    """
+    ut = r * tip_speed + velocity * np.sin(psi)
+    up = inflow_ratio * tip_speed * np.ones_like(ut)
+    theta = theta0 + twist * r + theta1s * np.sin(psi) + theta1c * np.cos(psi)
+    alfa = theta - np.rad2deg(np.arctan2(up, np.abs(ut)))
+    mach = np.hypot(ut, up) / speed_of_sound
+    return ut, up, alfa, mach
+
+def trim_cyclic(advance_ratio, inflow_ratio, theta0, twist):
+    """
+    Returns the longitudinal cyclic θ1s[°] that removes the longitudinal flapping relative to the tip path plane.
+    Ref: uniform inflow flapping solution, 'Leishman, Principles of Helicopter Aerodynamics, ch.4'.
+    """
+    mu = advance_ratio
+    return -mu * (8/3 * theta0 + 2 * twist - 2 * np.rad2deg(inflow_ratio)) / (1 + 1.5 * mu**2)
+
+def airfoil_thickness(airfoil):
+    """Returns the thickness/chord ratio of a NACA profile. The last two digits are used for profiles the panel method doesn't parse."""
+    try:
+        return naca_parameters(airfoil)["thickness"]
+    except ValueError:
+        digits = airfoil.lower().replace("naca", "")
+        return int(digits[-2:]) / 100 if digits[-2:].isdigit() else 0.12
+
+def stall_and_drag_divergence(ut, alfa, mach, stall_angle, cl, thickness):
+    """
+    Returns the boolean grids of reverse flow, stalled and drag divergent cells.
+
+    Parameters
+    ----------
+    ut : ndarray [m/s]
+        Tangential velocity grid. Cells with ut < 0 are in reverse flow and excluded from stall.
+    alfa : ndarray [°]
+        Angle of attack grid.
+    mach : ndarray
+        Mach number grid.
+    stall_angle : float [°]
+        Angle of attack of the maximum lift coefficient.
+    cl : ndarray
+        Lift coefficient grid, used for the drag divergence Mach number.
+    thickness : float
+        Thickness/chord ratio of the airfoil.
+    """
+    reverse_flow = ut < 0
+    stalled = (alfa > stall_angle) & ~reverse_flow
+    drag_divergent = mach > drag_divergence_mach(thickness, cl)
+    return reverse_flow, stalled, drag_divergent
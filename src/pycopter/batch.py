@@ -0,0 +1,265 @@
+"""
+Batched hover solver for many rotor geometries sharing one polar. The inflow of every candidate is iterated together
+as a 2-D (candidate x element) array, with per-row convergence masks, instead of one 'Rotor.hover' call per candidate.
+"""
+
+import numpy as np
+
+from .kernels import table_lookup, ALFA_MIN, ALFA_MAX
+from .utils import walds_solver, walds_closed_form
+from . import profiling
+
+
+class BatchHoverResult():
+    """
+    Arrays of a batched hover solution, one entry per candidate rotor. Attribute names follow the ones of 'Rotor'.
+    'induced_vel' holds the converged elemental induced velocities with the shape (candidates, n).
+    """
+    def __init__(self, **arrays):
+        self.__dict__.update(arrays)
+
+    def __len__(self):
+        return len(self.theta)
+
+    def as_dict(self):
+        """Returns the result arrays as a dictionary."""
+        return dict(self.__dict__)
+
+
+def hover_performance(thrust, density, r, omega, num_blades, chord, solidity, rotor_disk_area, cl_slope, cd_scale=1.0):
+    """
+    Returns the hover coefficients and powers for the given thrust. Works on scalars and on arrays of candidates.
+
+    Parameters
+    ----------
+    thrust : float [N]
+        Rotor thrust from the blade element solution.
+    density : float [kg/m3]
+        Density of air.
+    r : float [m]
+        Rotor radius.
+    omega : float [rad/s]
+        Rotor angular velocity.
+    num_blades : int
+    chord : float [m]
+    solidity : float
+    rotor_disk_area : float [m2]
+    cl_slope : float [1/rad]
+        Lift curve slope of the airfoil.
+    cd_scale : float
+        Factor on the mean profile drag coefficient.
+
+    Returns
+    -------
+    dict
+        'ct', 'tip_loss', 'cl_mean', 'a', 'alfa', 'cd_mean', 'hover_power_induced', 'hover_power_profile',
+        'hover_power_total', 'cp', 'merit' and 'merit_max' as in 'Rotor.hover'.
+    """
+    # Parameters calculation based on maaaany simplifications.
+    ct = thrust / (density * np.pi * r**4 * omega**2)
+    tip_loss = 1 - np.sqrt(2 * ct) / num_blades
+    cl_mean = 6 * ct / (tip_loss**3 * solidity)
+    alfa = 6 * ct / (solidity * cl_slope * tip_loss**3)
+    cd_mean = 0.0087 - 0.0216*alfa + 0.4*alfa**2 # TODO: This depends on empirical data based on naca0012. Get the relation from the polar, instead. Furthermore, this needs to satisfy Fig3-1 for naca0012(prolly).
+    cd_mean = cd_mean * cd_scale
+    power_induced = thrust**1.5 / (tip_loss * np.sqrt(2*density * rotor_disk_area))
+    power_profile = density * num_blades * chord * (r**4) * (omega**3) * cd_mean / 8
+    power_total = power_induced + power_profile
+    cp = power_total / (density * np.pi * r**5 * omega**3)
+    merit = 0.707 * ct**1.5 / cp
+    merit_max = 0.707 * ct**1.5 / (ct**1.5 / (np.sqrt(2) * tip_loss) + solidity * cd_mean / 8)
+    return {"ct": ct, "tip_loss": tip_loss, "cl_mean": cl_mean, "a": cl_slope, "alfa": alfa, "cd_mean": cd_mean,
+            "hover_power_induced": power_induced, "hover_power_profile": power_profile, "hover_power_total": power_total,
+            "cp": cp, "merit": merit, "merit_max": merit_max}
+
+def forward_flight_performance(velocity, density, flat_plate_area, hover_induced_vel, hover_power_induced, cd_mean, r, omega, num_blades, chord,
+                               initial_downwash=1, wald_tolerance=None, wald_iterations=100, exact_wald=False):
+    """
+    Returns the level forward flight powers and drags with the model of 'Rotor.forward_flight'. Works on scalars and on arrays
+    of flight conditions or candidates, which are broadcast against each other.
+
+    Parameters
+    ----------
+    velocity : float [m/s]
+        Level forward flight velocity.
+    density : float [kg/m3]
+        Density of air.
+    flat_plate_area : float [m2]
+        Equivalent flat plate area of the aircraft body.
+    hover_induced_vel : float [m/s]
+        Mean hover induced velocity.
+    hover_power_induced : float [W]
+        Induced power in hover.
+    cd_mean : float
+        Mean profile drag coefficient of the blades.
+    r, omega, num_blades, chord :
+        Rotor radius[m], angular velocity[rad/s], number of blades and chord[m].
+    initial_downwash, wald_tolerance, wald_iterations :
+        Initial value, convergence tolerance and iterations of 'walds_solver'.
+    exact_wald : bool
+        Uses 'walds_closed_form' instead of 'walds_solver', so that every condition is converged. The Wald settings are ignored.
+
+    Returns
+    -------
+    dict
+        'downwash_velocity_ratio', 'power_induced', 'drag_induced', 'power_profile', 'drag_profile', 'body_drag', 'power_parasite',
+        'power_total' and 'horsepower_total' as in 'Rotor.forward_flight'.
+    """
+    advance_ratio = velocity / (omega * r)
+    if exact_wald:
+        downwash_velocity_ratio = walds_closed_form(velocity, hover_induced_vel)
+    else:
+        downwash_velocity_ratio = walds_solver(velocity, hover_induced_vel, 0, wald_iterations, initial_downwash, wald_tolerance) # alfa=0, pg.93, AMCP 706-201
+
+    power_induced = downwash_velocity_ratio * hover_power_induced
+    drag_induced = power_induced / (2*hover_induced_vel) # v2. not v.
+    power_induced = np.maximum(power_induced, 0)
+
+    power_profile = (density * num_blades * chord * r**4 * omega**3 * cd_mean / 8) * (1 + 4.65*advance_ratio**2)
+    drag_profile = power_profile / (omega * r)
+
+    body_drag = density * velocity**2 * flat_plate_area / 2 # Flat plate area is component_reference_area * drag_coefficient for the body.
+    power_parasite = body_drag * velocity
+
+    power_total = power_induced + power_profile + power_parasite
+    return {"downwash_velocity_ratio": downwash_velocity_ratio, "power_induced": power_induced, "drag_induced": drag_induced,
+            "power_profile": power_profile, "drag_profile": drag_profile, "body_drag": body_drag, "power_parasite": power_parasite,
+            "power_total": power_total, "horsepower_total": power_total * 0.00134102209}
+
+def range_endurance(power_total, ld, weight, fuel, sfc, transmission_loss=0.1, tail_rotor_factor=1.13, density=1.225):
+    """
+    Returns the Breguet range and the endurance in level forward flight, with the model of the GUI. Works on scalars and arrays.
+
+    Parameters
+    ----------
+    power_total : float [W]
+        Main rotor power in forward flight.
+    ld : float
+        Lift to effective drag ratio.
+    weight : float [kg]
+        Gross weight.
+    fuel : float [kg]
+        Fuel weight.
+    sfc : float [kg/kWh] or Engine
+        Specific fuel consumption, or an engine deck giving it at the engine power and density.
+    transmission_loss : float
+        Ratio of the engine power lost in the transmission.
+    tail_rotor_factor : float
+        Ratio of the total to the main rotor power.
+    density : float [kg/m3]
+        Density of air. Used with an engine deck.
+
+    Returns
+    -------
+    float, float
+        Range[km] and endurance[hr].
+    """
+    factor = tail_rotor_factor / (1 - transmission_loss)
+    engine_power = factor * power_total / 1000 # [kW]
+    if hasattr(sfc, "fuel_flow"):
+        sfc = sfc.sfc(engine_power, density)
+    endurance = fuel / (engine_power * sfc)
+    breguet_range = 366 / (factor * sfc) * ld * np.log(weight / (weight - fuel)) # 366 for km instead of n-miles.
+    return breguet_range, endurance
+
+@profiling.instrument("hover_batch")
+def hover_batch(polar, num_blades, chord, rotor_diameter, tip_speed_mach, washout, rotor_root_cutout=0.01, weight=13000, density=1.225,
+                n=10, speed_of_sound=343, cl_scale=1.0, cd_scale=1.0, element_twist=None, element_chord=None):
+    """
+    Solves the hover of many rotor geometries at once with the model of 'Rotor.hover'. Each candidate sweeps its collective from 0° to 15°
+    until its thrust lifts its weight. Geometry, weight and density are broadcast against each other.
+
+    Parameters
+    ----------
+    polar : Polar
+        Polar shared by all candidates.
+    num_blades, chord, rotor_diameter, tip_speed_mach, washout, rotor_root_cutout : array_like
+        Candidate geometries, see 'Rotor'.
+    weight : array_like [kg]
+        Weight lifted by each candidate.
+    density : array_like [kg/m3]
+        Density of air.
+    n : int
+        Blade element theory resolution.
+    speed_of_sound : float [m/s]
+    cl_scale, cd_scale : array_like
+        Factors on the lift and drag coefficients of the polar, e.g. for polar uncertainty studies.
+    element_twist, element_chord : array_like
+        Blade pitch relative to the root[°] and chord[m] of the n elements of each candidate, of shape (candidates, n) or (n,), e.g.
+        from 'Rotor.blade_sections', for blades with chord and twist distributions. 'washout' and 'chord' are then the equivalent
+        values of the momentum performance. The linear twist and constant chord if not given.
+
+    Returns
+    -------
+    BatchHoverResult
+    """
+    num_blades, chord, rotor_diameter, tip_speed_mach, washout, rotor_root_cutout, weight, density, cl_scale, cd_scale = (
+        np.array(value, dtype=float).reshape(-1) for value in np.broadcast_arrays(num_blades, chord, rotor_diameter, tip_speed_mach, washout,
+                                                                                  rotor_root_cutout, weight, density, cl_scale, cd_scale))
+    table = polar.lookup_table()
+    candidates = len(num_blades)
+
+    r = rotor_diameter / 2
+    omega = tip_speed_mach / r * speed_of_sound
+    dr = r / n
+    element_center = np.linspace(0, r, n, endpoint=False, axis=1) + (dr/2)[:, None]
+    if element_twist is None:
+        element_twist = (element_center / r[:, None]) * washout[:, None]
+    else:
+        element_twist = np.broadcast_to(np.asarray(element_twist, dtype=float), (candidates, n))
+    if element_chord is None:
+        inflow_factor = (np.sqrt(num_blades * chord / (8 * np.pi)) * omega)[:, None]
+    else:
+        element_chord = np.broadcast_to(np.asarray(element_chord, dtype=float), (candidates, n))
+        inflow_factor = np.sqrt(num_blades[:, None] * element_chord / (8 * np.pi)) * omega[:, None]
+    rotational_speed = omega[:, None] * element_center
+    weight_force = weight * 9.81
+
+    theta_out = np.zeros(candidates)
+    thrust_out = np.zeros(candidates)
+    induced_vel_out = np.zeros((candidates, n))
+    done = np.zeros(candidates, dtype=bool)
+    for theta in np.linspace(0, 15, 31, endpoint=True):
+        rows = np.flatnonzero(~done)
+        if rows.size == 0:
+            break
+        profiling.count("theta_steps", rows.size)
+
+        # Candidate x element fixed point iteration. Converged rows drop out of the active set.
+        center, twist, rotational, factor = element_center[rows], element_twist[rows], rotational_speed[rows], inflow_factor[rows]
+        lift_scale, drag_scale = cl_scale[rows, None], cd_scale[rows, None]
+        induced_vel = np.ones((rows.size, n))
+        active = np.arange(rows.size)
+        with profiling.span("hover_batch.inflow"):
+            for iterations in range(1, 12):
+                current = induced_vel[active]
+                phi = np.arctan(current / rotational[active])
+                alfa = np.clip(twist[active] + theta - np.rad2deg(phi), ALFA_MIN, ALFA_MAX)
+                cl, cd = table_lookup(alfa, table)
+                inner_root = center[active] * (lift_scale[active] * cl * np.cos(phi) - drag_scale[active] * cd * np.sin(phi))
+                updated = np.copysign(np.sqrt(np.abs(inner_root)), inner_root) * factor[active]
+                change = np.sum((updated - current)**2, axis=1)
+                induced_vel[active] = updated
+                profiling.count("inner_iterations", active.size)
+                profiling.count("polar_lookups", active.size * n)
+                active = active[change > 1e-24]
+                if active.size == 0:
+                    break
+            profiling.count("inner_iteration_cap_hits", active.size)
+
+        thrust = np.sum(center * induced_vel**2, axis=1) * (4 * density[rows] * np.pi * dr[rows] * 0.97) # 0.97 for tip loss.
+        lifted = (thrust >= weight_force[rows]) | (theta == 15)
+        finished = rows[lifted]
+        theta_out[finished] = theta
+        thrust_out[finished] = thrust[lifted]
+        induced_vel_out[finished] = induced_vel[lifted]
+        done[finished] = True
+
+    rotor_disk_area = np.pi * r**2 - np.pi * (r * rotor_root_cutout)**2
+    solidity = num_blades * chord / (np.pi * r)
+    performance = hover_performance(thrust_out, density, r, omega, num_blades, chord, solidity, rotor_disk_area, polar.get_cl_slope() * cl_scale,
+                                    cd_scale)
+    return BatchHoverResult(num_blades=num_blades, chord=chord, rotor_diameter=rotor_diameter, tip_speed_mach=tip_speed_mach, washout=washout,
+                            rotor_root_cutout=rotor_root_cutout, weight=weight, density=density, r=r, omega=omega, tip_speed=omega * r,
+                            rotor_disk_area=rotor_disk_area, solidity=solidity, theta=theta_out, hover_thrust=thrust_out,
+                            hover_induced_vel=np.mean(induced_vel_out, axis=1), induced_vel=induced_vel_out, **performance)
@@ -0,0 +1,183 @@
+"""
+Electric powertrain: a battery pack with internal resistance and Peukert losses, a motor and ESC efficiency map, and a
+time-stepped state of charge integration. All parameters broadcast against each other, so one 'discharge' call integrates
+thousands of mission variants (e.g. candidates x velocities) together, one vectorized step at a time.
+
+The electric counterpart of 'pycopter.engine'. Powers in [kW], energies in [kWh], time in [s] unless noted.
+"""
+
+import numpy as np
+
+# Open circuit voltage of a Li-ion (NMC) cell versus state of charge.
+CELL_OCV = np.array([[0.0, 3.00], [0.05, 3.30], [0.1, 3.45], [0.2, 3.55], [0.3, 3.62], [0.4, 3.68], [0.5, 3.74], [0.6, 3.81],
+                     [0.7, 3.89], [0.8, 3.98], [0.9, 4.07], [1.0, 4.20]])
+# Motor efficiency versus load fraction of its maximum power.
+MOTOR_EFFICIENCY = np.array([[0.0, 0.50], [0.05, 0.72], [0.1, 0.81], [0.2, 0.88], [0.4, 0.92], [0.6, 0.93], [0.8, 0.93], [1.0, 0.91]])
+
+
+class Battery():
+    """
+    A battery pack of identical cells, 'cells_series' in series and 'cells_parallel' in parallel. The terminal voltage drops with
+    the current through the pack resistance, and currents above the rated one drain the capacity faster (Peukert).
+
+    Methods
+    -------
+    from_energy(energy: float, voltage: float) -> Battery
+        Returns a pack of the default cells with a nominal energy[kWh] and voltage[V].
+    open_circuit_voltage(soc) -> ndarray
+        Returns the pack open circuit voltage[V] at a state of charge.
+    current(power, soc) -> ndarray
+        Returns the pack current[A] delivering an electrical power[kW]. NaN if the pack cannot deliver it.
+    drain(current) -> ndarray
+        Returns the rate[A] the capacity is drained at by a current, with the Peukert exponent.
+    """
+    def __init__(self, cells_series=12, cells_parallel=4, cell_capacity=5.0, cell_resistance=0.02, peukert=1.05, rated_hours=1.0,
+                 min_soc=0.1, min_cell_voltage=3.0, ocv=CELL_OCV):
+        """
+        Parameters
+        ----------
+        cells_series, cells_parallel : int or array_like
+            Cells in series and in parallel.
+        cell_capacity : float [Ah]
+            Cell capacity at the rated discharge.
+        cell_resistance : float [Ω]
+            Internal resistance of a cell.
+        peukert : float
+            Peukert exponent. 1 for an ideal cell.
+        rated_hours : float [h]
+            Discharge time the capacity is rated at, e.g. 1 for a 1C rating.
+        min_soc : float
+            State of charge the discharge stops at, as a reserve.
+        min_cell_voltage : float [V]
+            Terminal cell voltage the discharge stops at.
+        ocv : ndarray
+            Open circuit voltage[V] of a cell versus state of charge, as (soc, voltage) rows.
+        """
+        self.cells_series = np.asarray(cells_series, dtype=float)
+        self.cells_parallel = np.asarray(cells_parallel, dtype=float)
+        self.cell_capacity = np.asarray(cell_capacity, dtype=float)
+        self.cell_resistance = np.asarray(cell_resistance, dtype=float)
+        self.peukert = np.asarray(peukert, dtype=float)
+        self.rated_hours = rated_hours
+        self.min_soc = np.asarray(min_soc, dtype=float)
+        self.min_cell_voltage = min_cell_voltage
+        self.ocv = np.asarray(ocv, dtype=float)
+
+        self.capacity = self.cells_parallel * self.cell_capacity # [Ah]
+        self.resistance = self.cells_series * self.cell_resistance / self.cells_parallel # [Ω]
+        self.nominal_voltage = self.cells_series * np.interp(0.5, self.ocv[:, 0], self.ocv[:, 1])
+        self.energy = self.capacity * self.nominal_voltage / 1000 # Nominal energy [kWh].
+
+    @classmethod
+    def from_energy(cls, energy, voltage=400, cell_capacity=5.0, **kwargs):
+        """Returns a pack of the nominal energy[kWh] and voltage[V]. The cells in parallel may be fractional, for sizing studies."""
+        cell_voltage = np.interp(0.5, CELL_OCV[:, 0], CELL_OCV[:, 1])
+        cells_series = np.round(np.asarray(voltage, dtype=float) / cell_voltage)
+        cells_parallel = np.asarray(energy, dtype=float) * 1000 / (cells_series * cell_voltage * cell_capacity)
+        return cls(cells_series, cells_parallel, cell_capacity, **kwargs)
+
+    def open_circuit_voltage(self, soc):
+        return self.cells_series * np.interp(soc, self.ocv[:, 0], self.ocv[:, 1])
+
+    def current(self, power, soc):
+        voltage = self.open_circuit_voltage(soc)
+        power = np.asarray(power, dtype=float) * 1000
+        discriminant = voltage**2 - 4 * self.resistance * power
+        with np.errstate(divide="ignore", invalid="ignore"):
+            current = np.where(self.resistance > 0, 2 * power / (voltage + np.sqrt(np.maximum(discriminant, 0))), power / voltage) # Root of P = (V - IR)I.
+        return np.where(discriminant >= 0, current, np.nan)
+
+    def drain(self, current):
+        rated_current = self.capacity / self.rated_hours
+        return current * np.maximum(current / rated_current, 1)**(self.peukert - 1)
+
+
+class ElectricMotor():
+    """
+    Motors with their ESCs, rated at a maximum total shaft power. The motor efficiency follows a map versus load fraction.
+
+    Methods
+    -------
+    efficiency(shaft_power) -> ndarray
+        Returns the motor and ESC efficiency at a shaft power[kW].
+    electrical_power(shaft_power) -> ndarray
+        Returns the electrical power[kW] drawn for a shaft power[kW]. NaN above the maximum power.
+    """
+    def __init__(self, max_power, efficiency_map=MOTOR_EFFICIENCY, esc_efficiency=0.97):
+        """
+        Parameters
+        ----------
+        max_power : float or array_like [kW]
+            Maximum shaft power of all motors together.
+        efficiency_map : ndarray
+            Motor efficiency versus load fraction, as (fraction, efficiency) rows.
+        esc_efficiency : float
+            Efficiency of the speed controllers.
+        """
+        self.max_power = np.asarray(max_power, dtype=float)
+        self.efficiency_map = np.asarray(efficiency_map, dtype=float)
+        self.esc_efficiency = esc_efficiency
+
+    def efficiency(self, shaft_power):
+        fraction = np.asarray(shaft_power, dtype=float) / self.max_power
+        return np.interp(fraction, self.efficiency_map[:, 0], self.efficiency_map[:, 1]) * self.esc_efficiency
+
+    def electrical_power(self, shaft_power):
+        shaft_power = np.asarray(shaft_power, dtype=float)
+        return np.where(shaft_power <= self.max_power, shaft_power / self.efficiency(shaft_power), np.nan)
+
+
+def discharge(battery, motor, shaft_power, dt=None, steps=200, max_time=36000.0):
+    """
+    Integrates the state of charge of battery and motor variants at a shaft power until the reserve state of charge or the minimum cell
+    voltage is reached, or the pack cannot deliver the power. Forward Euler time steps; the last step is cut to the end of the flight.
+
+    Parameters
+    ----------
+    battery : Battery
+    motor : ElectricMotor
+    shaft_power : array_like or callable [kW]
+        Shaft power of each variant, broadcast against the battery and motor parameters. A callable is called with the flight time[s]
+        of each variant at each step and returns the powers, e.g. for a mission profile.
+    dt : float [s]
+        Time step. If not given, each variant steps by its ideal endurance (usable energy over its initial power) over 'steps', so
+        long and short flights take the same number of steps.
+    steps : int
+        Steps per flight without 'dt'.
+    max_time : float [s]
+        Longest flight integrated.
+
+    Returns
+    -------
+    dict
+        'endurance'[h] and the 'energy'[kWh] drawn from the pack until then, the final 'soc' and the lowest terminal 'voltage'[V]
+        per variant. Variants that cannot take off have zero endurance.
+    """
+    power_at = shaft_power if callable(shaft_power) else (lambda time: shaft_power)
+    shape = np.broadcast_shapes(np.shape(power_at(0.0)), battery.capacity.shape, battery.min_soc.shape, motor.max_power.shape)
+    soc = np.ones(shape)
+    time = np.zeros(shape)
+    energy = np.zeros(shape)
+    voltage = np.full(shape, np.inf)
+    flying = np.ones(shape, dtype=bool)
+    if dt is None:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ideal_endurance = battery.energy * (1 - battery.min_soc) * 3600 / motor.electrical_power(power_at(np.zeros(shape)))
+        dt = np.broadcast_to(np.where(np.isfinite(ideal_endurance) & (ideal_endurance > 0), ideal_endurance / steps, 1.0), shape)
+    dt = np.minimum(dt, max_time)
+
+    while flying.any():
+        electrical_power = np.broadcast_to(motor.electrical_power(power_at(time)), shape)
+        current = np.broadcast_to(battery.current(electrical_power, soc), shape)
+        terminal_voltage = battery.open_circuit_voltage(soc) - current * battery.resistance
+        flying &= np.isfinite(current) & (terminal_voltage >= battery.min_cell_voltage * battery.cells_series) & (time < max_time)
+        rate = battery.drain(current) / (battery.capacity * 3600) # State of charge per second.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = np.minimum(dt, max_time - time)
+            duration = np.where(flying, np.clip((soc - battery.min_soc) / rate, 0, step), 0) # Cut at the reserve.
+        soc = soc - np.where(flying, rate * duration, 0)
+        time = time + duration
+        energy = energy + np.where(flying, electrical_power * duration / 3600, 0)
+        voltage = np.where(flying, np.minimum(voltage, terminal_voltage), voltage)
+        flying &= duration == step
+    return {"endurance": time / 3600, "energy": energy, "soc": soc, "voltage": np.where(np.isfinite(voltage), voltage, np.nan)}
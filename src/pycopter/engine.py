@@ -0,0 +1,117 @@
+"""
+Engine decks: shaft power available and fuel flow of an engine versus flight condition and power fraction, read from a table
+file. The table is resampled once into rectilinear (density x power fraction) grids, so that 'fuel_flow' and
+'power_available' are vectorized lookups cheap enough for sweep and mission loops.
+
+Deck files are whitespace separated text with '#' comments and the columns
+    altitude[m] temperature[°C] power_fraction power_available[kW] fuel_flow[kg/h]
+one row per flight condition and power fraction of one engine. Every condition lists the same power fractions, and the
+conditions must have distinct densities, e.g. an altitude sweep at ISA temperatures. Bundled decks are in 'data/engine_decks'.
+"""
+
+import os
+import numpy as np
+
+DECK_DIRECTORY = os.path.join("data", "engine_decks")
+
+
+def atmosphere_density(altitude, temperature=None):
+    """
+    Returns the density of air[kg/m3] at a pressure altitude[m], with the ISA pressure and the given or the ISA temperature[°C].
+    Works on arrays.
+    """
+    altitude = np.asarray(altitude, dtype=float)
+    pressure = 101325 * (1 - 0.0065 * altitude / 288.15)**5.2559
+    temperature = 15 - 0.0065 * altitude if temperature is None else np.asarray(temperature, dtype=float)
+    return pressure / (287.05 * (temperature + 273.15))
+
+def find_deck(name):
+    """Returns the path of a deck file, or of a bundled deck by name, e.g. 'TV3-117'. Raises FileNotFoundError."""
+    if os.path.exists(name):
+        return name
+    for root in (os.getcwd(), os.path.join(os.path.dirname(__file__), "..", "..")):
+        path = os.path.abspath(os.path.join(root, DECK_DIRECTORY, name + ".txt"))
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"Engine deck '{name}' not found. Give a file path or the name of a deck in '{DECK_DIRECTORY}'.")
+
+def _interval(axis, values):
+    """Returns the interval indices of values on an increasing axis, extrapolating the end intervals, and the interval weights."""
+    i = np.clip(np.searchsorted(axis, values) - 1, 0, len(axis) - 2)
+    return i, (values - axis[i]) / (axis[i+1] - axis[i])
+
+
+class Engine():
+    """
+    An engine deck, or several identical engines sharing the load. Powers are the shaft powers of all engines together.
+    Densities outside the flight conditions of the deck are evaluated at the nearest one, as the deck is not extrapolated.
+
+    Methods
+    -------
+    power_available(density: float or ndarray) -> float or ndarray
+        Returns the shaft power available[kW].
+    fuel_flow(power: float or ndarray, density: float or ndarray) -> float or ndarray
+        Returns the fuel flow[kg/h] at a shaft power[kW].
+    sfc(power: float or ndarray, density: float or ndarray) -> float or ndarray
+        Returns the specific fuel consumption[kg/kWh] at a shaft power[kW].
+    """
+    def __init__(self, deck="TV3-117", engines=1):
+        """
+        Parameters
+        ----------
+        deck : str
+            Deck file path, or the name of a bundled deck.
+        engines : int
+            Number of engines.
+        """
+        self.path = find_deck(deck)
+        self.engines = engines
+        data = np.loadtxt(self.path, comments="#", ndmin=2)
+        if data.shape[1] != 5:
+            raise ValueError(f"Engine deck '{self.path}' must have the columns altitude, temperature, power_fraction, power_available, fuel_flow.")
+
+        conditions, rows = np.unique(data[:, :2], axis=0, return_inverse=True)
+        rows = rows.reshape(-1)
+        self.fractions = np.unique(data[:, 2])
+        densities = atmosphere_density(conditions[:, 0], conditions[:, 1])
+        order = np.argsort(densities)
+        if np.any(np.diff(densities[order]) <= 0):
+            raise ValueError(f"Flight conditions of engine deck '{self.path}' must have distinct densities.")
+        self.densities = densities[order]
+        self.power_table = np.empty(len(conditions))
+        self.fuel_table = np.empty((len(conditions), len(self.fractions)))
+        for position, condition in enumerate(order):
+            table = data[rows == condition]
+            table = table[np.argsort(table[:, 2])]
+            if not np.array_equal(table[:, 2], self.fractions):
+                raise ValueError(f"Every flight condition of engine deck '{self.path}' must list the power fractions {self.fractions.tolist()}.")
+            self.power_table[position] = table[0, 3]
+            self.fuel_table[position] = table[:, 4]
+
+    def power_available(self, density):
+        density = self._deck_density(density)
+        i, weight = _interval(self.densities, density)
+        power = self.engines * (self.power_table[i] * (1 - weight) + self.power_table[i+1] * weight)
+        return power if power.ndim else float(power)
+
+    def fuel_flow(self, power, density):
+        """
+        Returns the fuel flow[kg/h] of the engines at a total shaft power[kW], linearly interpolated in density and power fraction.
+        Powers below the lowest fraction of the deck are extrapolated, powers above the power available are NaN.
+        """
+        power, density = np.broadcast_arrays(np.asarray(power, dtype=float), self._deck_density(density))
+        fraction = power / self.power_available(density)
+        i, density_weight = _interval(self.densities, density)
+        j, fraction_weight = _interval(self.fractions, fraction)
+        table = self.fuel_table
+        fuel_flow = (table[i, j] * (1 - fraction_weight) + table[i, j+1] * fraction_weight) * (1 - density_weight) \
+                    + (table[i+1, j] * (1 - fraction_weight) + table[i+1, j+1] * fraction_weight) * density_weight
+        fuel_flow = np.where(fraction <= 1 + 1e-9, self.engines * fuel_flow, np.nan)
+        return fuel_flow if fuel_flow.ndim else float(fuel_flow)
+
+    def _deck_density(self, density):
+        """Returns densities clipped to the density range of the deck."""
+        return np.clip(np.asarray(density, dtype=float), self.densities[0], self.densities[-1])
+
+    def sfc(self, power, density):
+        return self.fuel_flow(power, density) / np.asarray(power, dtype=float)
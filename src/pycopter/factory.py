@@ -0,0 +1,135 @@
+"""
+Pool of 'Rotor' instances interned by their constructor arguments. A rotor is built once per geometry, and rotors whose
+polars would be requested for the same airfoil at nearly the same Mach and Reynolds numbers share one 'Polar', so sweeps
+over weight, density or velocity don't rebuild rotors or rerun XFOIL. Both caches are bounded with LRU eviction.
+
+Pooled rotors are shared: their result attributes are overwritten by whoever calls 'hover' or 'forward_flight' next.
+"""
+
+from collections import OrderedDict
+import threading
+import inspect
+import hashlib
+import json
+import io
+import contextlib
+import numpy as np
+
+from .pycopter import Rotor, polar_conditions
+from .utils import Polar
+
+
+class RotorFactory():
+    """
+    Interns 'Rotor' objects by a hash of their constructor arguments and shares their polars.
+
+    Methods
+    -------
+    get(**kwargs) -> Rotor
+        Returns the pooled rotor for the 'Rotor' constructor arguments, building it on the first request.
+    polar(airfoil: str, mach: float, reynolds: float, new_polar: bool) -> Polar
+        Returns a pooled polar within the tolerances of the requested conditions, or requests a new one.
+    clear() -> None
+        Empties both pools.
+    """
+    def __init__(self, max_rotors=32, max_polars=64, mach_tolerance=0.005, reynolds_tolerance=0.02, quiet=False):
+        """
+        Parameters
+        ----------
+        max_rotors : int
+            Rotors kept in the pool.
+        max_polars : int
+            Polars kept in the pool.
+        mach_tolerance : float
+            Largest Mach number difference for sharing a polar.
+        reynolds_tolerance : float
+            Largest relative Reynolds number difference for sharing a polar.
+        quiet : bool
+            Whether to silence the prints of the rotor and polar construction.
+        """
+        self.max_rotors = max_rotors
+        self.max_polars = max_polars
+        self.mach_tolerance = mach_tolerance
+        self.reynolds_tolerance = reynolds_tolerance
+        self.quiet = quiet
+        self.stats = {"rotor_hits": 0, "rotors_built": 0, "polar_hits": 0, "polars_built": 0}
+        self._rotors = OrderedDict()
+        self._polars = OrderedDict() # (airfoil, new_polar, mach, reynolds) -> Polar
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._rotors)
+
+    @staticmethod
+    def _arguments(kwargs):
+        """Returns the 'Rotor' constructor arguments completed with the defaults."""
+        arguments = inspect.signature(Rotor).bind(**kwargs)
+        arguments.apply_defaults()
+        return dict(arguments.arguments)
+
+    @classmethod
+    def rotor_key(cls, **kwargs):
+        """Returns the hash of 'Rotor' constructor arguments, completed with the defaults."""
+        values = cls._arguments(kwargs)
+        polar = values.pop("polar")
+        values["airfoil"] = values["airfoil"].lower()
+        values["polar"] = None if polar is None else id(polar)
+        values["inflow"] = values["inflow"] if isinstance(values["inflow"], str) else id(values["inflow"])
+        for name in ("num_blades", "chord", "rotor_diameter", "tip_speed_mach", "washout", "rotor_root_cutout"):
+            value = values[name]
+            if callable(value): # Chord and twist distributions.
+                values[name] = id(value)
+            else:
+                values[name] = float(value) if not np.ndim(value) else np.asarray(value, dtype=float).tolist()
+        return hashlib.sha256(json.dumps(values, sort_keys=True).encode()).hexdigest()
+
+    def get(self, **kwargs):
+        key = self.rotor_key(**kwargs)
+        with self._lock:
+            if key in self._rotors:
+                self.stats["rotor_hits"] += 1
+                self._rotors.move_to_end(key)
+                return self._rotors[key]
+
+            kwargs = self._arguments(kwargs)
+            if kwargs["polar"] is None:
+                kwargs["polar"] = self.polar(kwargs["airfoil"], *polar_conditions(kwargs["chord"], kwargs["tip_speed_mach"]), kwargs["new_polar"])
+            with self._silence():
+                rotor = Rotor(**kwargs)
+            self.stats["rotors_built"] += 1
+            self._rotors[key] = rotor
+            if len(self._rotors) > self.max_rotors:
+                self._rotors.popitem(last=False)
+            return rotor
+
+    def polar(self, airfoil, mach, reynolds, new_polar=True):
+        airfoil = airfoil.lower()
+        with self._lock:
+            for key, polar in self._polars.items():
+                if key[:2] == (airfoil, new_polar) and abs(key[2] - mach) <= self.mach_tolerance \
+                        and abs(key[3] - reynolds) <= self.reynolds_tolerance * reynolds:
+                    self.stats["polar_hits"] += 1
+                    self._polars.move_to_end(key)
+                    return polar
+            with self._silence():
+                polar = Polar(airfoil, mach, reynolds, new_polar)
+            self.stats["polars_built"] += 1
+            self._polars[(airfoil, new_polar, mach, reynolds)] = polar
+            if len(self._polars) > self.max_polars:
+                self._polars.popitem(last=False)
+            return polar
+
+    def clear(self):
+        with self._lock:
+            self._rotors.clear()
+            self._polars.clear()
+
+    def _silence(self):
+        return contextlib.redirect_stdout(io.StringIO()) if self.quiet else contextlib.nullcontext()
+
+
+_default_factory = RotorFactory()
+
+def get_rotor(**kwargs):
+    """Returns a rotor from the factory shared by the process. Takes the 'Rotor' constructor arguments."""
+    return _default_factory.get(**kwargs)
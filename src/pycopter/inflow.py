@@ -0,0 +1,126 @@
+"""
+Inflow models of the blade element grid of 'pycopter.azimuth' and a fixed-step integrator for their dynamics.
+
+The induced inflow over the disk is described by first harmonic states (λ0, λ1s, λ1c),
+    λ(r, ψ) = λ0 + λ1s r/R sin(ψ) + λ1c r/R cos(ψ),
+driven by the rotor loading (CT, Cs, Cc): the thrust coefficient and the sine and cosine first harmonic disk moment coefficients
+(Cs > 0 loads the advancing side, Cc > 0 the rear). Every function broadcasts over leading axes of the states, so variants,
+e.g. gust amplitudes, are integrated together.
+
+Models are selected by name with 'Rotor(inflow=...)':
+    'bemt'          Uniform momentum inflow that follows the loading instantly. The fast default.
+    'pitt-peters'   Pitt-Peters dynamic inflow with the three first harmonic states and apparent mass lag.
+"""
+
+import numpy as np
+
+
+class InflowModel():
+    """
+    Base class of the inflow models.
+
+    Methods
+    -------
+    steady(forcing, advance_ratio, inflow_ratio) -> ndarray
+        Returns the induced inflow states in equilibrium with the loading.
+    derivatives(states, forcing, advance_ratio, inflow_ratio) -> ndarray
+        Returns the rate of change of the states per rotor radian. Only for dynamic models.
+    """
+    name = None
+    dynamic = False # Whether the states lag the loading.
+
+    def steady(self, forcing, advance_ratio, inflow_ratio):
+        raise NotImplementedError
+
+    def derivatives(self, states, forcing, advance_ratio, inflow_ratio):
+        raise NotImplementedError(f"Inflow model '{self.name}' has no dynamics.")
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+
+class MomentumInflow(InflowModel):
+    """Uniform momentum (Glauert) inflow, λ0 = CT / (2 sqrt(μ² + λ²)), the inflow of the BEMT hover and Wald's equation solutions."""
+    name = "bemt"
+
+    def steady(self, forcing, advance_ratio, inflow_ratio):
+        forcing = np.asarray(forcing, dtype=float)
+        states = np.zeros_like(forcing)
+        states[..., 0] = forcing[..., 0] / (2 * np.sqrt(advance_ratio**2 + inflow_ratio**2))
+        return states
+
+
+class PittPeters(InflowModel):
+    """
+    Pitt-Peters dynamic inflow, M dλ/dτ + V L⁻¹ λ = C with τ = Ωt. The skewed wake couples λ1c to the thrust and λ0 to the
+    pitching moment with opposite signs, so L isn't symmetric and the inflow stays stable at high wake skew.
+    Ref: 'Peters and HaQuang, Dynamic Inflow for Practical Applications, JAHS 1988'.
+    """
+    name = "pitt-peters"
+    dynamic = True
+    apparent_mass = np.array([8 / (3*np.pi), 16 / (45*np.pi), 16 / (45*np.pi)])
+
+    def gain_matrix(self, states, advance_ratio, inflow_ratio):
+        """Returns the matrices L V⁻¹ (..., 3, 3) of the wake skew and mass flow of the flight condition."""
+        advance_ratio, inflow_ratio = np.asarray(advance_ratio, dtype=float), np.asarray(inflow_ratio, dtype=float)
+        mass_flow_total = np.sqrt(advance_ratio**2 + inflow_ratio**2)
+        mass_flow = (advance_ratio**2 + inflow_ratio * (inflow_ratio + states[..., 0])) / mass_flow_total
+        x = np.tan(np.arctan2(advance_ratio, inflow_ratio) / 2) # Tangent of half the wake skew angle.
+        shape = np.broadcast_shapes(np.shape(x), np.shape(mass_flow))
+        gain = np.zeros(shape + (3, 3))
+        gain[..., 0, 0] = 0.5 / mass_flow_total
+        gain[..., 0, 2] = -15*np.pi/64 * x / mass_flow
+        gain[..., 2, 0] = 15*np.pi/64 * x / mass_flow_total
+        gain[..., 1, 1] = 2 * (1 + x**2) / mass_flow
+        gain[..., 2, 2] = 2 * (1 - x**2) / mass_flow
+        return gain
+
+    def steady(self, forcing, advance_ratio, inflow_ratio):
+        forcing = np.asarray(forcing, dtype=float)
+        states = MomentumInflow().steady(forcing, advance_ratio, inflow_ratio)
+        for _ in range(4): # The mass flow of the harmonics depends on λ0 only weakly.
+            states = np.einsum("...ij,...j->...i", self.gain_matrix(states, advance_ratio, inflow_ratio), forcing)
+        return states
+
+    def derivatives(self, states, forcing, advance_ratio, inflow_ratio):
+        states = np.asarray(states, dtype=float)
+        gain = self.gain_matrix(states, advance_ratio, inflow_ratio)
+        return (forcing - np.linalg.solve(gain, states[..., None])[..., 0]) / self.apparent_mass
+
+
+INFLOW_MODELS = {"bemt": MomentumInflow, "pitt-peters": PittPeters}
+
+def resolve_inflow(inflow):
+    """Returns the inflow model of a name in INFLOW_MODELS, or the given 'InflowModel'. Raises ValueError for unknown names."""
+    if isinstance(inflow, InflowModel):
+        return inflow
+    if inflow not in INFLOW_MODELS:
+        raise ValueError(f"Unknown inflow model '{inflow}'. Use one of {list(INFLOW_MODELS)} or an InflowModel.")
+    return INFLOW_MODELS[inflow]()
+
+def inflow_distribution(states, psi, r):
+    """Returns the induced inflow ratio on the grid of 'azimuth_grid' from states of shape (..., 3), as (..., n_azimuth, n)."""
+    states = np.asarray(states, dtype=float)[..., None, None, :]
+    return states[..., 0] + states[..., 1] * r * np.sin(psi) + states[..., 2] * r * np.cos(psi)
+
+def rk4(derivative, y0, dt, steps, t0=0.0):
+    """
+    Integrates dy/dt = derivative(t, y) with fixed-step classical Runge-Kutta. y may be an array of any shape, e.g. variants x states.
+
+    Returns
+    -------
+    ndarray, ndarray
+        Times (steps + 1) and states (steps + 1, *y0.shape).
+    """
+    y = np.array(y0, dtype=float)
+    history = np.empty((steps + 1,) + y.shape)
+    history[0] = y
+    for step in range(steps):
+        t = t0 + step * dt
+        k1 = derivative(t, y)
+        k2 = derivative(t + dt/2, y + dt/2 * k1)
+        k3 = derivative(t + dt/2, y + dt/2 * k2)
+        k4 = derivative(t + dt, y + dt * k3)
+        y = y + dt / 6 * (k1 + 2*k2 + 2*k3 + k4)
+        history[step + 1] = y
+    return t0 + dt * np.arange(steps + 1), history
@@ -0,0 +1,272 @@
+"""
+Compiled and NumPy kernels for the blade element inflow iteration of 'Rotor.hover', and its blade element grids.
+
+Both backends work on preallocated buffers and don't allocate inside the fixed point iteration. The polar is looked up
+from a uniformly resampled table whose nodes include the integer angles of the XFOIL polars, so the lookup reproduces
+the linear interpolation of 'Polar.get_polar'. The Numba backend is used when Numba is installed.
+"""
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+BACKENDS = ("auto", "numpy", "numba")
+SPACINGS = ("uniform", "cosine")
+ALFA_MIN = -1 # Element angle of attack limits[°] of the hover iteration.
+ALFA_MAX = 20
+
+
+def resolve_backend(backend):
+    """Returns 'numpy' or 'numba' for the requested backend. 'auto' picks Numba if it is installed."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}'. Use one of {BACKENDS}.")
+    if backend == "auto":
+        return "numba" if numba is not None else "numpy"
+    if backend == "numba" and numba is None:
+        raise ImportError("The 'numba' backend requires the numba package. Install it or use backend='numpy'.")
+    return backend
+
+def element_edges(root_cutout=0.0, n=10, spacing="uniform"):
+    """
+    Returns the normalized radii r/R of the n + 1 blade element edges of the hover grid.
+
+    Parameters
+    ----------
+    root_cutout : float
+        Normalized radius where the blade begins.
+    n : int
+        Number of blade elements.
+    spacing : str or array_like
+        'uniform' elements from the rotor center (the classic grid), or 'cosine' elements from the root cutout, clustered at the
+        tip with half cosine spacing. Given edges are returned as they are.
+    """
+    if not isinstance(spacing, str):
+        return np.asarray(spacing, dtype=float)
+    if spacing not in SPACINGS:
+        raise ValueError(f"Unknown element spacing '{spacing}'. Use one of {SPACINGS}.")
+    if spacing == "uniform":
+        return np.linspace(0, 1, n + 1)
+    return root_cutout + (1 - root_cutout) * np.sin(np.pi / 2 * np.arange(n + 1) / n)
+
+def refine_edges(edges, load, threshold):
+    """
+    Splits the elements whose midpoint integration error of a load may exceed a threshold. The error of an element is estimated
+    as half the largest jump of the load to its neighbours times the element length, so the elements across steps of the load,
+    e.g. where the hover inflow changes branch, are split until the step is located.
+
+    Parameters
+    ----------
+    edges : ndarray
+        Element edges[r/R] from 'element_edges'.
+    load : ndarray
+        Load per normalized span at the element centers, e.g. dT/d(r/R)[N].
+    threshold : float
+        Largest error of an element, in the units of the integrated load.
+
+    Returns
+    -------
+    ndarray
+        Refined edges. The same array if no element is split.
+    """
+    jumps = np.abs(np.diff(load))
+    error = np.maximum(np.append(jumps, 0), np.insert(jumps, 0, 0)) * np.diff(edges) / 2
+    split = error > threshold
+    if not split.any():
+        return edges
+    centers = (edges[:-1] + edges[1:]) / 2
+    return np.sort(np.concatenate([edges, centers[split]]))
+
+def polar_table(polar, step=1/64):
+    """
+    Resamples polar data onto a uniform alfa grid.
+
+    Parameters
+    ----------
+    polar : ndarray
+        Polar data with the columns alfa[°], cl, cd.
+    step : float [°]
+        Table resolution. A power of two fraction keeps integer angles on the table nodes.
+
+    Returns
+    -------
+    tuple
+        (alfa of the first node, 1/step, cl table, cl increments, cd table, cd increments)
+    """
+    alfa_min, alfa_max = polar[0, 0], polar[-1, 0]
+    nodes = alfa_min + step * np.arange(int(np.floor((alfa_max - alfa_min) / step)) + 1)
+    cl, cd = np.interp(nodes, polar[:, 0], polar[:, 1]), np.interp(nodes, polar[:, 0], polar[:, 2])
+    return (float(alfa_min), 1 / step, cl, np.append(np.diff(cl), 0), cd, np.append(np.diff(cd), 0))
+
+def table_lookup(alfa, table):
+    """Returns (cl, cd) arrays for an array of angles of attack[°] from a 'polar_table'. Allocating, for the batched solvers."""
+    alfa0, inv_step, cl_table, cl_delta, cd_table, cd_delta = table
+    position = (np.asarray(alfa) - alfa0) * inv_step
+    index = np.clip(np.floor(position), 0, len(cl_table) - 2)
+    weight = position - index
+    index = index.astype(np.intp)
+    return cl_table[index] + cl_delta[index] * weight, cd_table[index] + cd_delta[index] * weight
+
+
+def _hover_inflow_loop(theta, element_center, element_twist, inflow_factor, omega, alfa0, inv_step, cl_table, cl_delta, cd_table, cd_delta,
+                       induced_vel, induced_vel_old, phi, alfa, max_iterations, tolerance):
+    """Element by element inflow iteration. Compiled with Numba for the 'numba' backend."""
+    n = element_center.shape[0]
+    last = cl_table.shape[0] - 1
+    iterations = 0
+    while iterations < max_iterations:
+        for i in range(n):
+            induced_vel_old[i] = induced_vel[i]
+        for i in range(n):
+            phi[i] = np.arctan(induced_vel[i] / (omega * element_center[i]))
+            alfa[i] = min(max(theta + element_twist[i] - np.rad2deg(phi[i]), ALFA_MIN), ALFA_MAX)
+            position = (alfa[i] - alfa0) * inv_step
+            index = min(max(int(np.floor(position)), 0), last - 1)
+            weight = position - index
+            cl = cl_table[index] + cl_delta[index] * weight
+            cd = cd_table[index] + cd_delta[index] * weight
+            inner_root = element_center[i] * (cl * np.cos(phi[i]) - cd * np.sin(phi[i]))
+            if inner_root < 0:
+                induced_vel[i] = -np.sqrt(-inner_root) * inflow_factor[i]
+            else:
+                induced_vel[i] = np.sqrt(inner_root) * inflow_factor[i]
+        iterations += 1
+        change = 0.0
+        for i in range(n):
+            change += (induced_vel[i] - induced_vel_old[i])**2
+        if change <= tolerance**2:
+            break
+    return iterations
+
+_hover_inflow_numba = numba.njit(cache=True)(_hover_inflow_loop) if numba is not None else None
+
+
+class HoverKernel():
+    """
+    Preallocated work buffers and the inflow fixed point iteration of 'Rotor.hover' for one blade element grid.
+
+    Methods
+    -------
+    solve(theta: float, initial: ndarray) -> int
+        Iterates the elemental induced velocities for a collective pitch and returns the number of iterations.
+    """
+    def __init__(self, element_center, element_twist, inflow_factor, omega, table, backend="auto"):
+        """
+        Parameters
+        ----------
+        element_center : ndarray [m]
+            Radial position of the blade element centers.
+        element_twist : ndarray [°]
+            Blade pitch of each element relative to the collective.
+        inflow_factor : ndarray [1/s]
+            sqrt(num_blades * chord / (8 * pi)) * omega of each element.
+        omega : float [rad/s]
+            Rotor angular velocity.
+        table : tuple
+            Polar lookup table from 'polar_table'.
+        backend : str
+            'auto', 'numpy' or 'numba'.
+        """
+        self.backend = resolve_backend(backend)
+        self.element_center = np.ascontiguousarray(element_center, dtype=float)
+        self.element_twist = np.ascontiguousarray(element_twist, dtype=float)
+        self.inflow_factor = np.ascontiguousarray(inflow_factor, dtype=float)
+        self.omega = float(omega)
+        self.table = table
+
+        n = len(self.element_center)
+        self.induced_vel = np.ones(n)
+        self.induced_vel_old = np.zeros(n)
+        self.phi = np.zeros(n)
+        self.alfa = np.zeros(n)
+        self.converged = False
+        # Work buffers of the NumPy backend.
+        self._rotational_speed = self.omega * self.element_center
+        self._pitch = np.empty(n)
+        self._position = np.empty(n)
+        self._weight = np.empty(n)
+        self._index = np.empty(n, dtype=np.intp)
+        self._cl = np.empty(n)
+        self._cd = np.empty(n)
+        self._work = np.empty(n)
+
+    def solve(self, theta, initial=None, max_iterations=11, tolerance=1e-12):
+        """
+        Iterates the elemental induced velocities until they change less than 'tolerance'[m/s] (L2 norm) or 'max_iterations' is reached.
+        The result is left in 'induced_vel', 'phi' and 'alfa', and whether the tolerance was met in 'converged'.
+
+        Parameters
+        ----------
+        theta : float [°]
+            Collective pitch.
+        initial : ndarray [m/s]
+            Initial induced velocities. Starts from 1 m/s if not given.
+
+        Returns
+        -------
+        int
+            Number of iterations. Equals 'max_iterations' if the iteration was capped, or converged on the last one; 'converged'
+            tells them apart.
+        """
+        if initial is None:
+            self.induced_vel.fill(1.0)
+        else:
+            np.copyto(self.induced_vel, initial)
+
+        if self.backend == "numba":
+            iterations = _hover_inflow_numba(float(theta), self.element_center, self.element_twist, self.inflow_factor, self.omega,
+                                             *self.table, self.induced_vel, self.induced_vel_old, self.phi, self.alfa, max_iterations, tolerance)
+        else:
+            iterations = self._solve_numpy(theta, max_iterations, tolerance)
+        change = self.induced_vel - self.induced_vel_old
+        self.converged = bool(np.dot(change, change) <= tolerance**2)
+        return iterations
+
+    def _solve_numpy(self, theta, max_iterations, tolerance):
+        alfa0, inv_step, cl_table, cl_delta, cd_table, cd_delta = self.table
+        induced_vel, induced_vel_old, phi, alfa, work = self.induced_vel, self.induced_vel_old, self.phi, self.alfa, self._work
+        cl, cd, position, weight, index = self._cl, self._cd, self._position, self._weight, self._index
+        np.add(self.element_twist, theta, out=self._pitch)
+
+        for iterations in range(1, max_iterations + 1):
+            np.copyto(induced_vel_old, induced_vel)
+            np.divide(induced_vel, self._rotational_speed, out=phi)
+            np.arctan(phi, out=phi)
+            np.rad2deg(phi, out=alfa)
+            np.subtract(self._pitch, alfa, out=alfa)
+            np.clip(alfa, ALFA_MIN, ALFA_MAX, out=alfa)
+
+            # Table lookup.
+            np.subtract(alfa, alfa0, out=position)
+            np.multiply(position, inv_step, out=position)
+            np.floor(position, out=weight)
+            np.clip(weight, 0, len(cl_table) - 2, out=weight)
+            np.copyto(index, weight, casting="unsafe")
+            np.subtract(position, weight, out=weight)
+            np.take(cl_table, index, out=cl)
+            np.take(cl_delta, index, out=work)
+            np.multiply(work, weight, out=work)
+            np.add(cl, work, out=cl)
+            np.take(cd_table, index, out=cd)
+            np.take(cd_delta, index, out=work)
+            np.multiply(work, weight, out=work)
+            np.add(cd, work, out=cd)
+
+            # Momentum balance.
+            np.cos(phi, out=work)
+            np.multiply(cl, work, out=cl)
+            np.sin(phi, out=work)
+            np.multiply(cd, work, out=cd)
+            np.subtract(cl, cd, out=work)
+            np.multiply(work, self.element_center, out=work)
+            np.abs(work, out=induced_vel)
+            np.sqrt(induced_vel, out=induced_vel)
+            np.copysign(induced_vel, work, out=induced_vel)
+            np.multiply(induced_vel, self.inflow_factor, out=induced_vel)
+
+            np.subtract(induced_vel, induced_vel_old, out=work)
+            if np.dot(work, work) <= tolerance**2:
+                break
+        return iterations
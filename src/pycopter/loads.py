@@ -0,0 +1,119 @@
+"""
+Spanwise blade loads of a hover solution. 'SpanwiseLoads' keeps references to the converged elemental induced velocities and
+the blade geometry of 'Rotor.hover', and derives the distributions from them on first access, so a hover that nobody asks
+for loads of allocates nothing extra.
+"""
+
+from functools import cached_property
+import numpy as np
+
+from .kernels import table_lookup
+
+
+class SpanwiseLoads():
+    """
+    Spanwise distributions of one blade element hover solution, each an array with one value per element from root to tip.
+    Computed on first access and cached. The loads integrate to the hover thrust and, within the tip loss and the mean drag
+    coefficient of 'hover_power_profile', to the hover power.
+
+    Attributes
+    ----------
+    radius : ndarray [m]
+        Element centers.
+    width : ndarray [m]
+        Element lengths, the weights of the integrals over the span.
+    inflow : ndarray [m/s]
+        Converged induced velocity.
+    inflow_ratio : ndarray
+        Induced velocity divided by the tip speed.
+    phi : ndarray [°]
+        Inflow angle.
+    alfa : ndarray [°]
+        Angle of attack, limited as in the inflow iteration.
+    cl, cd : ndarray
+        Lift and drag coefficients.
+    thrust_per_span : ndarray [N/m]
+        Thrust of all blades per unit radius, dT/dr.
+    torque_per_span : ndarray [Nm/m]
+        Torque of all blades per unit radius, dQ/dr.
+
+    Methods
+    -------
+    as_dict() -> dict
+        Returns all distributions by name.
+    """
+    FIELDS = ("radius", "width", "inflow", "inflow_ratio", "phi", "alfa", "cl", "cd", "thrust_per_span", "torque_per_span")
+
+    def __init__(self, element_center, induced_vel, alfa, omega, r, density, num_blades, chord, table, tip_loss=0.97, element_width=None):
+        """
+        Parameters
+        ----------
+        element_center : ndarray [m]
+            Radial position of the blade element centers.
+        induced_vel : ndarray [m/s]
+            Converged elemental induced velocities.
+        alfa : ndarray [°]
+            Angles of attack of the last pass of the inflow iteration, whose lift gave 'induced_vel'.
+        omega : float [rad/s]
+            Rotor angular velocity.
+        r : float [m]
+            Rotor radius.
+        density : float [kg/m3]
+            Density of air.
+        num_blades, chord :
+            Number of blades and chord[m].
+        table : tuple
+            Polar lookup table of the hover kernels, from 'Polar.lookup_table'.
+        tip_loss : float
+            Thrust factor of the hover thrust.
+        element_width : ndarray [m]
+            Element lengths. Uniform elements from the rotor center if not given.
+        """
+        self.radius = element_center
+        self.width = np.full(len(element_center), r / len(element_center)) if element_width is None else element_width
+        self.inflow = induced_vel
+        self.alfa = alfa
+        self.omega = omega
+        self.r = r
+        self.density = density
+        self.num_blades = num_blades
+        self.chord = chord
+        self.table = table
+        self.tip_loss = tip_loss
+
+    def __len__(self):
+        return len(self.radius)
+
+    @cached_property
+    def inflow_ratio(self):
+        return self.inflow / (self.omega * self.r)
+
+    @cached_property
+    def phi(self):
+        return np.rad2deg(np.arctan(self.inflow / (self.omega * self.radius)))
+
+    @cached_property
+    def _coefficients(self):
+        return table_lookup(self.alfa, self.table)
+
+    @cached_property
+    def cl(self):
+        return self._coefficients[0]
+
+    @cached_property
+    def cd(self):
+        return self._coefficients[1]
+
+    @cached_property
+    def thrust_per_span(self):
+        """Momentum thrust 4πρr·v² of the elements with the tip loss, the integrand of the hover thrust."""
+        return self.tip_loss * 4 * np.pi * self.density * self.radius * self.inflow**2
+
+    @cached_property
+    def torque_per_span(self):
+        """Induced torque dT/dr·v/Ω and profile torque of the element drag."""
+        profile = 0.5 * self.density * (self.omega * self.radius)**2 * self.num_blades * self.chord * self.cd * self.radius
+        return self.thrust_per_span * self.inflow / self.omega + profile
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
@@ -0,0 +1,327 @@
+"""
+Monte-Carlo uncertainty propagation of the rotor performance. Uncertain inputs are given as distributions and sampled in
+chunks, which are solved with the batched hover solver and the vectorized forward flight model, optionally across worker
+processes. Only running statistics are kept: mean and variance with Welford's algorithm and percentiles with a mergeable
+quantile sketch, so the memory use doesn't grow with the number of samples.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+import os
+import numpy as np
+
+from .batch import hover_batch, forward_flight_performance, range_endurance
+
+
+class Normal():
+    """Normal distribution with the given mean and standard deviation."""
+    def __init__(self, mean, std):
+        self.mean, self.std = mean, std
+
+    def sample(self, rng, size):
+        return rng.normal(self.mean, self.std, size)
+
+class LogNormal():
+    """Log-normal distribution with the given median and standard deviation of the logarithm."""
+    def __init__(self, median, sigma):
+        self.median, self.sigma = median, sigma
+
+    def sample(self, rng, size):
+        return self.median * np.exp(rng.normal(0, self.sigma, size))
+
+class Uniform():
+    """Uniform distribution between 'low' and 'high'."""
+    def __init__(self, low, high):
+        self.low, self.high = low, high
+
+    def sample(self, rng, size):
+        return rng.uniform(self.low, self.high, size)
+
+class Triangular():
+    """Triangular distribution between 'low' and 'high' with its peak at 'mode'."""
+    def __init__(self, low, mode, high):
+        self.low, self.mode, self.high = low, mode, high
+
+    def sample(self, rng, size):
+        return rng.triangular(self.low, self.mode, self.high, size)
+
+
+class QuantileSketch():
+    """
+    Streaming quantile sketch with a stack of compactors (ref: 'Karnin, Lang & Liberty, Optimal Quantile Approximation in Streams').
+    A level holding 2k values is sorted and every other value moves to the next level with twice the weight. The memory grows with
+    log2(count / k) and the rank error is about 1/k. Sketches of separate chunks can be merged.
+
+    Methods
+    -------
+    update(values: ndarray) -> None
+        Adds values to the sketch.
+    merge(other: QuantileSketch) -> None
+        Adds the values summarized by another sketch.
+    quantile(q: float) -> float
+        Returns the approximate q quantile, 0 <= q <= 1.
+    """
+    def __init__(self, k=256, seed=None):
+        self.k = k
+        self.count = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        self.count += values.size
+        self.levels[0] = np.concatenate((self.levels[0], values))
+        self._compress()
+
+    def merge(self, other):
+        self.count += other.count
+        for level, values in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate((self.levels[level], values))
+        self._compress()
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            values = self.levels[level]
+            if values.size >= 2 * self.k:
+                values = np.sort(values)
+                kept, values = values[:values.size % 2], values[values.size % 2:]
+                promoted = values[self._rng.integers(2)::2] # Random offset keeps the rank estimates unbiased.
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level] = kept
+                self.levels[level + 1] = np.concatenate((self.levels[level + 1], promoted))
+            level += 1
+
+    def quantile(self, q):
+        values = np.concatenate(self.levels)
+        if values.size == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        weights = np.concatenate([np.full(len(values), 2.0**level) for level, values in enumerate(self.levels)])
+        order = np.argsort(values)
+        cumulative = np.cumsum(weights[order])
+        index = np.searchsorted(cumulative, np.asarray(q) * cumulative[-1], side="left")
+        return values[order][np.minimum(index, values.size - 1)]
+
+
+class RunningStats():
+    """
+    Streaming count, mean, variance, extremes and percentiles of a sample. Non-finite values, e.g. of diverged solutions,
+    are counted in 'rejected' and left out.
+
+    Methods
+    -------
+    update(values: ndarray) -> None
+        Adds a chunk of values.
+    merge(other: RunningStats) -> None
+        Adds the statistics of another chunk.
+    percentile(p: float) -> float
+        Returns the approximate p percentile, 0 <= p <= 100.
+    summary(percentiles: tuple) -> dict
+        Returns the statistics as a dictionary.
+    """
+    def __init__(self, k=256, seed=None):
+        self.count = 0
+        self.rejected = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self.sketch = QuantileSketch(k, seed)
+
+    @property
+    def variance(self):
+        """Sample variance."""
+        return self.m2 / (self.count - 1) if self.count > 1 else np.nan
+
+    @property
+    def std(self):
+        """Sample standard deviation."""
+        return np.sqrt(self.variance)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        finite = values[np.isfinite(values)]
+        self.rejected += values.size - finite.size
+        if finite.size == 0:
+            return
+        mean = finite.mean()
+        self._combine(finite.size, mean, np.sum((finite - mean)**2), finite.min(), finite.max())
+        self.sketch.update(finite)
+
+    def merge(self, other):
+        self.rejected += other.rejected
+        if other.count == 0:
+            return
+        self._combine(other.count, other.mean, other.m2, other.minimum, other.maximum)
+        self.sketch.merge(other.sketch)
+
+    def _combine(self, count, mean, m2, minimum, maximum):
+        """Chan's parallel update of the count, mean and sum of squared deviations."""
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta**2 * self.count * count / total
+        self.count = total
+        self.minimum, self.maximum = min(self.minimum, minimum), max(self.maximum, maximum)
+
+    def percentile(self, p):
+        return self.sketch.quantile(np.asarray(p) / 100)
+
+    def summary(self, percentiles=(5, 50, 95)):
+        summary = {"count": self.count, "rejected": self.rejected, "mean": self.mean, "std": self.std, "min": self.minimum, "max": self.maximum}
+        for p in percentiles:
+            summary[f"p{p:g}"] = float(self.percentile(p))
+        return summary
+
+
+class MonteCarloResult():
+    """
+    Running statistics of every output of a Monte-Carlo study, see 'monte_carlo'.
+
+    Methods
+    -------
+    summary(percentiles: tuple) -> dict
+        Returns the summary dictionary of every output.
+    """
+    def __init__(self, stats, samples):
+        self.stats = stats
+        self.samples = samples
+
+    def __getitem__(self, output):
+        return self.stats[output]
+
+    def __contains__(self, output):
+        return output in self.stats
+
+    def summary(self, percentiles=(5, 50, 95)):
+        return {output: stats.summary(percentiles) for output, stats in self.stats.items()}
+
+
+def _draw(spec, rng, size):
+    """Samples a distribution, or repeats a constant."""
+    if hasattr(spec, "sample"):
+        return np.asarray(spec.sample(rng, size), dtype=float)
+    return np.full(size, float(spec))
+
+def _evaluate_chunk(task):
+    """Samples and solves one chunk and returns the running statistics of its outputs. Runs in the worker processes."""
+    rotor, inputs, settings, seed, size = task
+    sampling_seed, sketch_seed = seed.spawn(2)
+    rng = np.random.default_rng(sampling_seed)
+    values = {name: _draw(spec, rng, size) for name, spec in inputs.items()}
+
+    hover = hover_batch(rotor["polar"], rotor["num_blades"], rotor["chord"], rotor["rotor_diameter"], rotor["tip_speed_mach"], rotor["washout"],
+                        rotor["rotor_root_cutout"], values["weight"], values["density"], settings["n"], rotor["speed_of_sound"],
+                        values["cl_scale"], values["cd_scale"], **rotor["sections"])
+    outputs = {"theta": hover.theta, "hover_power_total": hover.hover_power_total, "merit": hover.merit}
+
+    if "velocity" in values:
+        flight = forward_flight_performance(values["velocity"], values["density"], values["flat_plate_area"], hover.hover_induced_vel,
+                                            hover.hover_power_induced, hover.cd_mean, hover.r, hover.omega, hover.num_blades, hover.chord,
+                                            exact_wald=True)
+        outputs["power_total"] = flight["power_total"]
+        outputs["ld"] = hover.hover_thrust / (flight["drag_induced"] + flight["drag_profile"] + flight["body_drag"])
+        if "fuel" in values:
+            outputs["range"], outputs["endurance"] = range_endurance(outputs["power_total"], outputs["ld"], values["weight"], values["fuel"],
+                                                                     values["sfc"], values["transmission_loss"], settings["tail_rotor_factor"])
+
+    stats = {}
+    for output, output_seed in zip(outputs, sketch_seed.spawn(len(outputs))):
+        stats[output] = RunningStats(settings["k"], output_seed)
+        stats[output].update(outputs[output])
+    return stats
+
+def monte_carlo(rotor, samples=100000, weight=13000, density=1.225, flat_plate_area=3.5, velocity=None, sfc=None, fuel=None,
+                transmission_loss=0.1, cl_scale=1.0, cd_scale=1.0, chunk_size=10000, workers=None, seed=None, n=10, k=256,
+                tail_rotor_factor=1.13):
+    """
+    Propagates the input uncertainties to the rotor performance. Every input can be a number or a distribution (Normal, LogNormal,
+    Uniform, Triangular, or any object with a 'sample(rng, size)' method). The samples are drawn and solved in chunks; the results
+    don't depend on the number of workers for a given seed.
+
+    Parameters
+    ----------
+    rotor : Rotor
+        Rotor geometry and polar. The rotor doesn't need to be hovered. Chord and twist distributions are solved with their element
+        sections.
+    samples : int
+        Number of samples.
+    weight : float or distribution [kg]
+        Gross weight.
+    density : float or distribution [kg/m3]
+        Density of air.
+    flat_plate_area : float or distribution [m2]
+        Equivalent flat plate area of the aircraft body.
+    velocity : float or distribution [m/s]
+        Level forward flight velocity. Only the hover is evaluated if not given.
+    sfc : float or distribution [kg/kWh]
+        Specific fuel consumption. Required for the range and endurance.
+    fuel : float or distribution [kg]
+        Fuel weight. The range and endurance are evaluated if given together with 'velocity' and 'sfc'.
+    transmission_loss : float or distribution
+        Ratio of the engine power lost in the transmission.
+    cl_scale, cd_scale : float or distribution
+        Factors on the lift and drag coefficients of the polar.
+    chunk_size : int
+        Samples solved together. Bounds the memory use of a worker.
+    workers : int
+        Worker processes. 0 or 1 solve the chunks in this process, None uses one per CPU.
+    seed : int
+        Seed of the random sampling.
+    n : int
+        Blade element theory resolution.
+    k : int
+        Quantile sketch accuracy, the rank error of the percentiles is about 1/k.
+    tail_rotor_factor : float
+        Ratio of the total to the main rotor power.
+
+    Returns
+    -------
+    MonteCarloResult
+        Statistics of 'theta'[°], 'hover_power_total'[W] and 'merit', and with a velocity 'power_total'[W] and 'ld',
+        and with fuel 'endurance'[hr] and 'range'[km]. Non-finite samples are left out, counted in 'rejected' and reported.
+    """
+    if samples < 1 or chunk_size < 1:
+        raise ValueError("Number of samples and chunk size must be positive.")
+    if fuel is not None and (velocity is None or sfc is None):
+        raise ValueError("Range and endurance require the velocity and sfc along with the fuel.")
+
+    inputs = {"weight": weight, "density": density, "cl_scale": cl_scale, "cd_scale": cd_scale}
+    if velocity is not None:
+        inputs.update(velocity=velocity, flat_plate_area=flat_plate_area)
+    if fuel is not None:
+        inputs.update(fuel=fuel, sfc=sfc, transmission_loss=transmission_loss)
+    geometry = {"polar": rotor.polar, "num_blades": rotor.num_blades, "chord": rotor.chord, "rotor_diameter": rotor.rotor_diameter,
+                "tip_speed_mach": rotor.tip_speed_mach, "washout": rotor.washout, "rotor_root_cutout": rotor.rotor_root_cutout,
+                "speed_of_sound": rotor.speed_of_sound, "sections": rotor.batch_sections(n)}
+    settings = {"n": n, "k": k, "tail_rotor_factor": tail_rotor_factor}
+
+    sizes = [chunk_size] * (samples // chunk_size) + ([samples % chunk_size] if samples % chunk_size else [])
+    tasks = ((geometry, inputs, settings, chunk_seed, size) for chunk_seed, size in zip(np.random.SeedSequence(seed).spawn(len(sizes)), sizes))
+
+    stats = {}
+    def collect(chunk_stats):
+        for output, values in chunk_stats.items():
+            stats.setdefault(output, RunningStats(k, 0)).merge(values)
+
+    if workers in (0, 1):
+        for task in tasks:
+            collect(_evaluate_chunk(task))
+    else:
+        # Chunks are merged in order, with a bounded number of them in flight.
+        workers = workers or os.cpu_count()
+        with ProcessPoolExecutor(workers) as executor:
+            pending = deque()
+            for task in tasks:
+                pending.append(executor.submit(_evaluate_chunk, task))
+                if len(pending) >= 2 * workers:
+                    collect(pending.popleft().result())
+            while pending:
+                collect(pending.popleft().result())
+    rejected = {output: values.rejected for output, values in stats.items() if values.rejected}
+    if rejected:
+        print(f"Monte-Carlo | Non-finite samples left out of the statistics: {rejected}")
+    return MonteCarloResult(stats, samples)
@@ -0,0 +1,193 @@
+"""
+Pure NumPy polar generator for NACA 4 and 5 digit sections. Used in place of XFOIL when it is not available.
+
+Lift comes from a linear-strength vortex panel method (ref: 'Kuethe & Chow, Foundations of Aerodynamics, ch.5.10')
+solved for every angle of attack at once, with Prandtl-Glauert compressibility and an empirical stall model.
+Drag is an empirical skin friction + form factor + lift dependent model.
+"""
+
+import numpy as np
+
+# NACA 5 digit mean line constants for the position digit P=1..5 (non-reflexed): m, k1.
+NACA5_MEAN_LINES = {1: (0.0580, 361.400), 2: (0.1260, 51.640), 3: (0.2025, 15.957), 4: (0.2900, 6.643), 5: (0.3910, 3.230)}
+
+
+def naca_parameters(airfoil:str):
+    """
+    Parses a NACA 4 or 5 digit designation.
+
+    Parameters
+    ----------
+    airfoil : str
+        E.g. 'naca0012' or 'naca23012'.
+
+    Returns
+    -------
+    dict
+        'digits', 'thickness' (max thickness/chord), 'camber' (max camber/chord) and 'camber_position' (x/c).
+    """
+    digits = airfoil.lower().replace("naca", "").strip()
+    if not digits.isdigit() or len(digits) not in (4, 5):
+        raise ValueError(f"Invalid airfoil '{airfoil}'. Only 4 and 5 digits NACA profiles are supported by the panel method.")
+    if len(digits) == 5:
+        if digits[2] != "0":
+            raise ValueError(f"Invalid airfoil '{airfoil}'. Reflexed NACA 5 digit mean lines are not supported.")
+        if int(digits[1]) not in NACA5_MEAN_LINES:
+            raise ValueError(f"Invalid airfoil '{airfoil}'. The second digit of a NACA 5 digit profile must be 1-5.")
+        x = np.linspace(0, 1, 201)
+        camber = _naca5_camber(x, int(digits[0]), int(digits[1]))[0]
+        return {"digits": digits, "thickness": int(digits[3:]) / 100, "camber": float(camber.max()), "camber_position": float(x[camber.argmax()])}
+    return {"digits": digits, "thickness": int(digits[2:]) / 100, "camber": int(digits[0]) / 100, "camber_position": int(digits[1]) / 10}
+
+def _naca4_camber(x, m, p):
+    """Returns the NACA 4 digit mean line and its slope."""
+    if m == 0 or p == 0:
+        return np.zeros_like(x), np.zeros_like(x)
+    front = x < p
+    yc = np.where(front, m / p**2 * (2*p*x - x**2), m / (1-p)**2 * (1 - 2*p + 2*p*x - x**2))
+    dyc = np.where(front, 2*m / p**2 * (p - x), 2*m / (1-p)**2 * (p - x))
+    return yc, dyc
+
+def _naca5_camber(x, design_lift_digit, position_digit):
+    """Returns the non-reflexed NACA 5 digit mean line and its slope."""
+    m, k1 = NACA5_MEAN_LINES[position_digit]
+    scale = design_lift_digit / 2 # Constants are tabulated for a design cl of 0.3, the first digit is design cl / 0.15.
+    front = x < m
+    yc = np.where(front, k1 / 6 * (x**3 - 3*m*x**2 + m**2 * (3-m) * x), k1 * m**3 / 6 * (1 - x))
+    dyc = np.where(front, k1 / 6 * (3*x**2 - 6*m*x + m**2 * (3-m)), -k1 * m**3 / 6)
+    return scale * yc, scale * dyc
+
+def naca_coordinates(airfoil:str, n_panels=100):
+    """
+    Returns the panel node coordinates of a NACA 4 or 5 digit profile with unit chord. Nodes are cosine spaced and ordered
+    clockwise from the trailing edge along the lower surface to the leading edge and back along the upper surface.
+
+    Parameters
+    ----------
+    airfoil : str
+        E.g. 'naca0012'.
+    n_panels : int
+        Number of panels. Rounded up to an even number.
+
+    Returns
+    -------
+    ndarray, ndarray
+        x and y coordinates of the n_panels+1 nodes.
+    """
+    params = naca_parameters(airfoil)
+    digits = params["digits"]
+    n_side = (n_panels + 1) // 2
+    x = 0.5 * (1 - np.cos(np.linspace(0, np.pi, n_side + 1)))
+
+    t = params["thickness"]
+    yt = 5 * t * (0.2969*np.sqrt(x) - 0.1260*x - 0.3516*x**2 + 0.2843*x**3 - 0.1036*x**4) # Closed trailing edge.
+    if len(digits) == 4:
+        yc, dyc = _naca4_camber(x, int(digits[0]) / 100, int(digits[1]) / 10)
+    else:
+        yc, dyc = _naca5_camber(x, int(digits[0]), int(digits[1]))
+    theta = np.arctan(dyc)
+
+    x_upper, y_upper = x - yt*np.sin(theta), yc + yt*np.cos(theta)
+    x_lower, y_lower = x + yt*np.sin(theta), yc - yt*np.cos(theta)
+    return np.concatenate((x_lower[::-1], x_upper[1:])), np.concatenate((y_lower[::-1], y_upper[1:]))
+
+def panel_lift(x, y, alfa):
+    """
+    Solves the linear-strength vortex panel method for all requested angles of attack at once.
+
+    Parameters
+    ----------
+    x, y : ndarray
+        Clockwise node coordinates from 'naca_coordinates'.
+    alfa : ndarray [°]
+        Angles of attack.
+
+    Returns
+    -------
+    ndarray
+        Inviscid, incompressible lift coefficients.
+    """
+    alfa = np.deg2rad(np.atleast_1d(alfa))
+    n = len(x) - 1
+    theta = np.arctan2(np.diff(y), np.diff(x))
+    s = np.hypot(np.diff(x), np.diff(y))
+    xc, yc = (x[:-1] + x[1:]) / 2, (y[:-1] + y[1:]) / 2
+
+    # Geometric coefficients, rows for control points i and columns for panels j.
+    dx, dy = xc[:, None] - x[None, :-1], yc[:, None] - y[None, :-1]
+    th_i, th_j, s_j = theta[:, None], theta[None, :], s[None, :]
+    a = -dx*np.cos(th_j) - dy*np.sin(th_j)
+    b = dx**2 + dy**2
+    c = np.sin(th_i - th_j)
+    d = np.cos(th_i - th_j)
+    e = dx*np.sin(th_j) - dy*np.cos(th_j)
+    f = np.log1p(s_j * (s_j + 2*a) / b)
+    g = np.arctan2(e * s_j, b + a*s_j)
+    q = dx*np.cos(th_i - 2*th_j) - dy*np.sin(th_i - 2*th_j)
+    cn2 = d + 0.5*q*f/s_j - (a*c + d*e)*g/s_j
+    cn1 = 0.5*d*f + c*g - cn2
+    diagonal = np.arange(n)
+    cn1[diagonal, diagonal], cn2[diagonal, diagonal] = -1, 1
+
+    influence = np.zeros((n + 1, n + 1))
+    influence[:n, :n] += cn1
+    influence[:n, 1:] += cn2
+    influence[n, 0] = influence[n, n] = 1 # Kutta condition.
+
+    rhs = np.zeros((n + 1, len(alfa)))
+    rhs[:n] = np.sin(theta[:, None] - alfa[None, :])
+    gamma = np.linalg.solve(influence, rhs) # Vortex strengths / (2*pi*V), one column per alfa.
+
+    circulation = 2 * np.pi * np.sum((gamma[:-1] + gamma[1:]) / 2 * s[:, None], axis=0)
+    return 2 * circulation
+
+def drag_divergence_mach(thickness, cl, kappa=0.87):
+    """Returns the drag divergence Mach number from Korn's equation. kappa=0.87 for conventional sections."""
+    return kappa - thickness - np.asarray(cl) / 10
+
+def panel_polar(airfoil:str, mach:float, reynolds:float, alfa=None, n_panels=100):
+    """
+    Returns a polar in the same layout as the XFOIL polars, without running XFOIL.
+
+    Parameters
+    ----------
+    airfoil : str
+        NACA 4 or 5 digit profile. E.g. 'naca23012'.
+    mach : float
+        Mach number of the airfoil.
+    reynolds : float
+        The Reynold's number.
+    alfa : ndarray [°]
+        Angles of attack. Defaults to the XFOIL request range, -8° to 20°.
+    n_panels : int
+        Panel method resolution.
+
+    Returns
+    -------
+    ndarray
+        Polar data with the columns alfa[°], cl, cd.
+    """
+    params = naca_parameters(airfoil)
+    alfa = np.arange(-8, 21, dtype=float) if alfa is None else np.asarray(alfa, dtype=float)
+    t = params["thickness"]
+    beta = np.sqrt(1 - min(mach, 0.9)**2)
+
+    x, y = naca_coordinates(airfoil, n_panels)
+    cl_linear = 0.93 * panel_lift(x, y, np.append(alfa, (-2, 2))) / beta # 0.93 for the boundary layer decambering, ~XFOIL at Re 1e6.
+    cl_linear, (cl_low, cl_high) = cl_linear[:-2], cl_linear[-2:]
+    cl_zero, slope = (cl_low + cl_high) / 2, (cl_high - cl_low) / 4
+
+    # Empirical stall. Maximum lift grows with thickness, camber and Reynolds number.
+    cl_max = (0.9 + 5*t + 3*params["camber"]) * min(1, (reynolds / 6e6)**0.1)
+    cl_min = -(0.9 + 5*t - 3*params["camber"]) * min(1, (reynolds / 6e6)**0.1)
+    alfa_stall, alfa_stall_negative = (cl_max - cl_zero) / slope, (cl_min - cl_zero) / slope
+    beyond = np.maximum(alfa - alfa_stall, 0) + np.maximum(alfa_stall_negative - alfa, 0)
+    cl = np.clip(cl_linear, cl_min, cl_max)
+    cl -= np.sign(cl) * 0.04 * beyond**1.3 # Post stall lift loss.
+
+    # Skin friction with a laminar run (Prandtl-Schlichting), thickness form factor and lift dependent drag.
+    cf = max(0.074 / reynolds**0.2 - 1742 / reynolds, 1.328 / np.sqrt(reynolds))
+    cd = 2 * cf * (1 + 1.2*t + 100*t**4) + 0.005 * (cl - cl_zero)**2 + 0.02 * beyond
+    mach_critical = drag_divergence_mach(t, cl) - (0.1 / 80)**(1/3)
+    cd += 20 * np.maximum(mach - mach_critical, 0)**4 # Lock's wave drag.
+    return np.column_stack((alfa, cl, cd))
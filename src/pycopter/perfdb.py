@@ -0,0 +1,184 @@
+"""
+Memory-mapped performance database. A computed hover/forward flight grid is stored as a directory bundle of '.npy' arrays
+with a small 'header.json' describing the axes, so that any number of processes on one machine can open it zero-copy:
+the arrays are memory-mapped read-only and share one physical copy in the page cache.
+
+A bundle is written to a temporary directory next to its path and renamed into place when complete, so readers never
+see a half written grid.
+"""
+
+import json
+import os
+import shutil
+import numpy as np
+from scipy.interpolate import RegularGridInterpolator
+
+from .sweep import solve_grid_chunk, HOVER_FIELDS, FLIGHT_FIELDS
+
+HEADER = "header.json"
+FORMAT_VERSION = 1
+
+
+class PerformanceGrid():
+    """
+    Performance arrays on a rectilinear grid, opened by 'open_grid'. The arrays are read-only memory maps unless the
+    grid was opened with mmap_mode=None.
+
+    Methods
+    -------
+    interpolate(name: str, **point) -> float or ndarray
+        Linearly interpolates an array at the given axis values, e.g. interpolate('power_total', weight=1300, density=1.1, velocity=42).
+    """
+    def __init__(self, path, axes, arrays, metadata):
+        self.path = path
+        self.axes = axes
+        self.arrays = arrays
+        self.metadata = metadata
+        self._interpolators = {}
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def __contains__(self, name):
+        return name in self.arrays
+
+    def interpolate(self, name, **point):
+        array = self.arrays[name]
+        axes = list(self.axes)[:array.ndim]
+        if set(point) != set(axes):
+            raise ValueError(f"'{name}' is interpolated on the axes {tuple(axes)}.")
+        if name not in self._interpolators:
+            self._interpolators[name] = RegularGridInterpolator([self.axes[axis] for axis in axes], array)
+        values = np.broadcast_arrays(*(np.asarray(point[axis], dtype=float) for axis in axes))
+        result = self._interpolators[name](np.stack(values, axis=-1).reshape(-1, len(axes))).reshape(values[0].shape)
+        return result if result.ndim else float(result)
+
+
+def save_grid(path, axes, arrays, metadata=None):
+    """
+    Saves performance arrays as a bundle that 'open_grid' can memory-map.
+
+    Parameters
+    ----------
+    path : str
+        Bundle directory. Replaced if it exists.
+    axes : dict
+        Axis name -> increasing 1-D values, in the order of the array dimensions. E.g. {'weight': ..., 'density': ..., 'velocity': ...}.
+    arrays : dict
+        Array name -> ndarray. The dimensions of an array follow the leading axes, e.g. (weight, density) for hover arrays.
+    metadata : dict
+        JSON serializable description of the grid, e.g. the rotor geometry.
+    """
+    def write(directory):
+        for name, array in arrays.items():
+            np.save(os.path.join(directory, name + ".npy"), np.ascontiguousarray(array))
+    _write_bundle(path, axes, {name: np.shape(array) for name, array in arrays.items()}, metadata, write)
+
+def compute_grid(rotor, path, weights, densities, velocities=None, flat_plate_area=3.5, n=10, chunk_size=256):
+    """
+    Solves the hover, and with velocities the level forward flight, of a rotor on a weight x density x velocity grid and
+    saves it as a bundle. The arrays are written chunk by chunk into memory-mapped files, so the grid may exceed the memory.
+
+    Parameters
+    ----------
+    rotor : Rotor
+        Rotor geometry and polar. Chord and twist distributions are solved with their element sections.
+    path : str
+        Bundle directory. Replaced if it exists.
+    weights, densities : array_like
+        Increasing weights[kg] and densities[kg/m3].
+    velocities : array_like [m/s]
+        Increasing level forward flight velocities. Only the hover is solved if not given.
+    flat_plate_area : float [m2]
+    n : int
+        Blade element theory resolution.
+    chunk_size : int
+        Weight x density points solved together.
+
+    Returns
+    -------
+    PerformanceGrid
+        The saved grid, opened read-only.
+    """
+    axes = {"weight": np.asarray(weights, dtype=float), "density": np.asarray(densities, dtype=float)}
+    if velocities is not None:
+        axes["velocity"] = np.asarray(velocities, dtype=float)
+    shape = (len(axes["weight"]), len(axes["density"]))
+    shapes = {field: shape for field in HOVER_FIELDS}
+    if velocities is not None:
+        shapes.update({field: shape + (len(axes["velocity"]),) for field in FLIGHT_FIELDS})
+    geometry = ("num_blades", "chord", "rotor_diameter", "tip_speed_mach", "washout", "rotor_root_cutout")
+    metadata = {"rotor": dict(airfoil=rotor.airfoil, **{name: float(getattr(rotor, name)) for name in geometry}),
+                "flat_plate_area": float(flat_plate_area), "n": int(n)}
+
+    def write(directory):
+        arrays = {name: np.lib.format.open_memmap(os.path.join(directory, name + ".npy"), mode="w+", dtype=float, shape=array_shape)
+                  for name, array_shape in shapes.items()}
+        weight, density = (grid.ravel() for grid in np.meshgrid(axes["weight"], axes["density"], indexing="ij"))
+        for start in range(0, weight.size, chunk_size):
+            rows = slice(start, start + chunk_size)
+            solution = solve_grid_chunk(rotor, weight[rows], density[rows], velocities, flat_plate_area, n)
+            for name, array in arrays.items():
+                array.reshape((-1,) + array.shape[2:])[rows] = solution[name]
+        for array in arrays.values():
+            array.flush()
+    _write_bundle(path, axes, shapes, metadata, write)
+    return open_grid(path)
+
+def open_grid(path, mmap_mode="r"):
+    """
+    Opens a bundle saved by 'save_grid' or 'compute_grid'.
+
+    Parameters
+    ----------
+    path : str
+        Bundle directory.
+    mmap_mode : str
+        Memory map mode of np.load. 'r' shares the arrays read-only between processes, None loads them into memory.
+
+    Returns
+    -------
+    PerformanceGrid
+    """
+    with open(os.path.join(path, HEADER)) as file:
+        header = json.load(file)
+    if header.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported performance grid version {header.get('version')} in '{path}'.")
+    axes = {name: np.asarray(values, dtype=float) for name, values in header["axes"].items()}
+    arrays = {}
+    for name, shape in header["arrays"].items():
+        arrays[name] = np.load(os.path.join(path, name + ".npy"), mmap_mode=mmap_mode)
+        if arrays[name].shape != tuple(shape):
+            raise ValueError(f"Array '{name}' of '{path}' doesn't match its header.")
+    return PerformanceGrid(path, axes, arrays, header["metadata"])
+
+def _write_bundle(path, axes, shapes, metadata, write):
+    """Writes the arrays with 'write' and the header to a temporary directory, then moves it to 'path'."""
+    lengths = tuple(len(values) for values in axes.values())
+    for name, shape in shapes.items():
+        if tuple(shape) != lengths[:len(shape)]:
+            raise ValueError(f"Shape {tuple(shape)} of '{name}' doesn't match the axes {dict(zip(axes, lengths))}.")
+    for name, values in axes.items():
+        if np.any(np.diff(values) <= 0):
+            raise ValueError(f"Axis '{name}' must be strictly increasing.")
+
+    path = os.path.abspath(path)
+    temporary = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(temporary, ignore_errors=True)
+    os.makedirs(temporary)
+    try:
+        write(temporary)
+        header = {"version": FORMAT_VERSION, "axes": {name: np.asarray(values, dtype=float).tolist() for name, values in axes.items()},
+                  "arrays": {name: list(shape) for name, shape in shapes.items()}, "metadata": metadata or {}}
+        with open(os.path.join(temporary, HEADER), "w") as file:
+            json.dump(header, file, indent=1)
+        if os.path.exists(path):
+            previous = f"{path}.old-{os.getpid()}"
+            os.replace(path, previous)
+            os.replace(temporary, path)
+            shutil.rmtree(previous, ignore_errors=True) # Open memory maps of readers stay valid on POSIX.
+        else:
+            os.replace(temporary, path)
+    except BaseException:
+        shutil.rmtree(temporary, ignore_errors=True)
+        raise
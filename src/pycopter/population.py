@@ -0,0 +1,199 @@
+"""
+Compact storage for large rotor design populations. 'Rotor' keeps its geometry and some 40 results as loose instance
+attributes and a 'Polar' per instance, which costs far more than the numbers themselves for 100k candidates.
+'RotorGeometry' is a slotted record of one geometry, and 'RotorPopulation' stores the geometries and results of many
+candidates as contiguous float64 columns, with the polars shared by reference through an integer column.
+"""
+
+import numpy as np
+
+from .batch import hover_batch, forward_flight_performance
+from .factory import _default_factory
+from .pycopter import Rotor, polar_conditions
+
+GEOMETRY_COLUMNS = ("num_blades", "chord", "rotor_diameter", "tip_speed_mach", "washout", "rotor_root_cutout")
+HOVER_COLUMNS = ("weight", "density", "theta", "hover_thrust", "hover_induced_vel", "hover_power_induced", "hover_power_profile",
+                 "hover_power_total", "ct", "cp", "tip_loss", "cd_mean", "merit", "merit_max", "solidity", "rotor_disk_area", "tip_speed")
+FLIGHT_COLUMNS = ("velocity", "flat_plate_area", "downwash_velocity_ratio", "power_induced", "power_profile", "power_parasite",
+                  "power_total", "ld")
+
+
+class RotorGeometry():
+    """
+    Geometry of one rotor with the parameters of 'Rotor', without its results. Slotted, so it has no instance dictionary.
+
+    Methods
+    -------
+    rotor() -> Rotor
+        Returns a full 'Rotor' of this geometry.
+    as_dict() -> dict
+        Returns the 'Rotor' constructor arguments.
+    """
+    __slots__ = ("airfoil",) + GEOMETRY_COLUMNS + ("polar",)
+
+    def __init__(self, airfoil="naca23012", num_blades=5, chord=0.52, rotor_diameter=21.29, tip_speed_mach=0.624, washout=-8,
+                 rotor_root_cutout=0.01, polar=None):
+        """
+        Parameters
+        ----------
+        airfoil, num_blades, chord, rotor_diameter, tip_speed_mach, washout, rotor_root_cutout :
+            See 'Rotor'. Default values are for the rotor of a Mil Mi-8 helicopter.
+        polar : Polar
+            Polar of the rotor. The pooled polar of the geometry (see pycopter.factory) is used if not given.
+        """
+        self.airfoil = airfoil.lower()
+        self.num_blades = num_blades
+        self.chord = chord
+        self.rotor_diameter = rotor_diameter
+        self.tip_speed_mach = tip_speed_mach
+        self.washout = washout
+        self.rotor_root_cutout = rotor_root_cutout
+        self.polar = polar
+
+    def __repr__(self):
+        return "RotorGeometry(" + ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__[:-1]) + ")"
+
+    def __eq__(self, other):
+        return isinstance(other, RotorGeometry) and all(getattr(self, name) == getattr(other, name) for name in self.__slots__[:-1]) \
+            and self.polar is other.polar
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def rotor(self):
+        return Rotor(**self.as_dict())
+
+
+class RotorPopulation():
+    """
+    Structure-of-arrays container of rotor candidates. Every geometry and result is a float64 column with one entry per candidate;
+    the polars are kept once in 'polars' and referenced by the integer column 'polar_index'.
+
+    Methods
+    -------
+    from_geometries(geometries: iterable) -> RotorPopulation
+        Creates a population from 'RotorGeometry' records. Equal polars are stored once.
+    hover(weight, density, n: int) -> RotorPopulation
+        Solves the hover of all candidates with the batched solver and stores the HOVER_COLUMNS.
+    forward_flight(velocity, density, flat_plate_area) -> RotorPopulation
+        Solves the level forward flight of the hovered candidates and stores the FLIGHT_COLUMNS.
+    filter(mask) -> RotorPopulation
+        Returns the candidates selected by a boolean mask or index array, sharing the polars.
+    where(**bounds) -> RotorPopulation
+        Returns the candidates whose columns are within (low, high) bounds. None leaves a side open.
+    rank(column: str, descending: bool, top: int) -> RotorPopulation
+        Returns the candidates sorted by a column.
+    geometry(i: int) -> RotorGeometry
+        Returns the geometry of a candidate.
+    """
+    def __init__(self, polars, airfoils, polar_index=0, **columns):
+        """
+        Parameters
+        ----------
+        polars : Polar or list
+            Polars of the population.
+        airfoils : str or list
+            Airfoil names of the polars.
+        polar_index : array_like
+            Index of the polar of each candidate.
+        **columns : array_like
+            Geometry columns (GEOMETRY_COLUMNS, defaulting to the 'Rotor' defaults) and result columns. Broadcast against each other.
+        """
+        self.polars = list(polars) if isinstance(polars, (list, tuple)) else [polars]
+        self.airfoils = [airfoils] if isinstance(airfoils, str) else list(airfoils)
+        if len(self.airfoils) != len(self.polars):
+            raise ValueError("Every polar of a population needs an airfoil name.")
+        defaults = RotorGeometry()
+        columns = {**{name: getattr(defaults, name) for name in GEOMETRY_COLUMNS}, **columns}
+        arrays = np.broadcast_arrays(polar_index, *columns.values())
+        self.polar_index = np.array(arrays[0], dtype=np.intp).reshape(-1)
+        if self.polar_index.size and not 0 <= self.polar_index.min() <= self.polar_index.max() < len(self.polars):
+            raise ValueError("Polar indices are out of the range of the polars.")
+        self.columns = {name: np.array(array, dtype=float).reshape(-1) for name, array in zip(columns, arrays[1:])}
+
+    @classmethod
+    def from_geometries(cls, geometries):
+        geometries = list(geometries)
+        polars, airfoils, slots, polar_index = [], [], {}, []
+        for geometry in geometries:
+            if np.ndim(geometry.chord) or np.ndim(geometry.washout) or callable(geometry.chord) or callable(geometry.washout):
+                raise ValueError("Population columns hold one chord and washout per candidate. Solve rotors with chord or twist "
+                                 "distributions with 'Rotor' or 'Copter'.")
+            polar = geometry.polar
+            if polar is None:
+                polar = _default_factory.polar(geometry.airfoil, *polar_conditions(geometry.chord, geometry.tip_speed_mach))
+            key = (id(polar), geometry.airfoil)
+            if key not in slots:
+                slots[key] = len(polars)
+                polars.append(polar)
+                airfoils.append(geometry.airfoil)
+            polar_index.append(slots[key])
+        columns = {name: np.array([getattr(geometry, name) for geometry in geometries], dtype=float) for name in GEOMETRY_COLUMNS}
+        return cls(polars, airfoils, np.array(polar_index, dtype=np.intp), **columns)
+
+    def __len__(self):
+        return len(self.polar_index)
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __getitem__(self, key):
+        """Returns a column by name, or the candidates selected by a mask, index array or slice."""
+        if isinstance(key, str):
+            return self.columns[key]
+        return self.filter(key)
+
+    @property
+    def nbytes(self):
+        """Bytes of the columns, without the shared polars."""
+        return self.polar_index.nbytes + sum(column.nbytes for column in self.columns.values())
+
+    def filter(self, mask):
+        return RotorPopulation(self.polars, self.airfoils, self.polar_index[mask], **{name: column[mask] for name, column in self.columns.items()})
+
+    def where(self, **bounds):
+        mask = np.ones(len(self), dtype=bool)
+        for name, (low, high) in bounds.items():
+            if low is not None:
+                mask &= self.columns[name] >= low
+            if high is not None:
+                mask &= self.columns[name] <= high
+        return self.filter(mask)
+
+    def rank(self, column, descending=False, top=None):
+        order = np.argsort(-self.columns[column] if descending else self.columns[column], kind="stable")
+        return self.filter(order[:top])
+
+    def geometry(self, i):
+        index = self.polar_index[i]
+        return RotorGeometry(self.airfoils[index], *(self.columns[name][i].item() for name in GEOMETRY_COLUMNS), polar=self.polars[index])
+
+    def hover(self, weight=13000, density=1.225, n=10):
+        """Solves the hover of every candidate. Weight[kg] and density[kg/m3] are broadcast against the candidates. Returns self."""
+        weight, density = (np.broadcast_to(np.asarray(value, dtype=float), (len(self),)) for value in (weight, density))
+        results = {name: np.empty(len(self)) for name in HOVER_COLUMNS}
+        for index, polar in enumerate(self.polars):
+            rows = np.flatnonzero(self.polar_index == index)
+            if rows.size == 0:
+                continue
+            hover = hover_batch(polar, *(self.columns[name][rows] for name in GEOMETRY_COLUMNS), weight[rows], density[rows], n)
+            for name in HOVER_COLUMNS:
+                results[name][rows] = getattr(hover, name)
+        self.columns.update(results)
+        return self
+
+    def forward_flight(self, velocity, density=1.225, flat_plate_area=3.5):
+        """
+        Solves the level forward flight of every hovered candidate at a velocity[m/s], density[kg/m3] and flat plate area[m2],
+        broadcast against the candidates. Returns self.
+        """
+        if "hover_thrust" not in self.columns:
+            raise ValueError("Population must be hovered before forward flight.")
+        column = self.columns
+        r = column["rotor_diameter"] / 2
+        flight = forward_flight_performance(velocity, density, flat_plate_area, column["hover_induced_vel"], column["hover_power_induced"],
+                                            column["cd_mean"], r, column["tip_speed"] / r, column["num_blades"], column["chord"])
+        flight["ld"] = column["hover_thrust"] / (flight["drag_induced"] + flight["drag_profile"] + flight["body_drag"])
+        flight.update(velocity=velocity, flat_plate_area=flat_plate_area)
+        self.columns.update({name: np.array(np.broadcast_to(flight[name], (len(self),)), dtype=float) for name in FLIGHT_COLUMNS})
+        return self
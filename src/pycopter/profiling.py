@@ -0,0 +1,200 @@
+"""
+Opt-in instrumentation for the solver hot paths.
+
+Counters (inner iterations, polar lookups, theta steps, XFOIL launches, ...) and wall-time spans are only
+collected while profiling is enabled. When it is disabled, every hook reduces to a single truth test.
+
+Example
+-------
+>>> from pycopter import profiling
+>>> with profiling.Profiler() as prof:
+...     rotor.hover(13000)
+...     rotor.forward_flight(40)
+>>> print(rotor.hover_stats.report())
+>>> print(prof.stats.report())
+"""
+
+import time
+import functools
+from contextlib import nullcontext
+
+_enabled = False
+_stack = [] # Active SolverStats objects. Counters go to the innermost one.
+_null_span = nullcontext()
+
+
+class SolverStats():
+    """
+    Counters and wall-time spans collected during a solver call. Stats of several calls can be merged
+    with 'merge' or '+' to aggregate a whole sweep.
+
+    Methods
+    -------
+    count(name: str, k: int) -> None
+        Increments the counter 'name' by k.
+    span(name: str) -> context manager
+        Times the enclosed block and adds it to the span 'name'.
+    merge(other: SolverStats) -> SolverStats
+        Adds the counters and spans of another stats object into this one.
+    report() -> str
+        Returns a human readable summary.
+    """
+    def __init__(self, name=""):
+        """
+        Parameters
+        ----------
+        name : str
+            Name of the instrumented call. E.g. 'hover'.
+        """
+        self.name = name
+        self.counters = {}
+        self.spans = {} # name -> [total seconds, number of entries]
+
+    def count(self, name, k=1):
+        """Increments the counter 'name' by k."""
+        self.counters[name] = self.counters.get(name, 0) + k
+
+    def span(self, name):
+        """Returns a context manager timing the enclosed block under 'name'."""
+        return _Span(self, name)
+
+    def add_time(self, name, seconds):
+        """Adds a measured duration[s] to the span 'name'."""
+        entry = self.spans.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+    def merge(self, other):
+        """Adds the counters and spans of 'other' into this object and returns self."""
+        for name, value in other.counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+        for name, (seconds, entries) in other.spans.items():
+            entry = self.spans.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += entries
+        return self
+
+    def __add__(self, other):
+        return SolverStats(self.name).merge(self).merge(other)
+
+    def __getitem__(self, name):
+        return self.counters.get(name, 0)
+
+    def time(self, name):
+        """Returns the total wall time[s] spent in span 'name'."""
+        return self.spans.get(name, [0.0, 0])[0]
+
+    def report(self):
+        """Returns a human readable summary of the counters and spans."""
+        lines = [f"{self.name or 'stats'}:"]
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"  {name:<28} {value}")
+        for name, (seconds, entries) in sorted(self.spans.items()):
+            lines.append(f"  {name:<28} {seconds*1e3:.3f} [ms] in {entries} span(s)")
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return f"SolverStats(name={self.name!r}, counters={self.counters})"
+
+
+class _Span():
+    """Context manager adding the elapsed wall time of its block to a SolverStats span."""
+    __slots__ = ("stats", "name", "start")
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Profiler():
+    """
+    Enables profiling for the enclosed block and aggregates the stats of every instrumented call in it.
+
+    Attributes
+    ----------
+    stats : SolverStats
+        Aggregate of all instrumented calls made inside the block.
+    """
+    def __init__(self, name="profile"):
+        self.stats = SolverStats(name)
+        self._was_enabled = False
+
+    def __enter__(self):
+        global _enabled
+        self._was_enabled = _enabled
+        _enabled = True
+        _stack.append(self.stats)
+        return self
+
+    def __exit__(self, *exc):
+        global _enabled
+        _stack.remove(self.stats)
+        _enabled = self._was_enabled
+        return False
+
+
+def enable():
+    """Enables profiling globally. Stats are still attached to each instrumented call."""
+    global _enabled
+    _enabled = True
+
+def disable():
+    """Disables profiling globally."""
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    """Returns True if profiling is enabled."""
+    return _enabled
+
+def count(name, k=1):
+    """Increments the counter 'name' of the innermost active call. No-op when profiling is disabled."""
+    if _stack:
+        _stack[-1].count(name, k)
+
+def span(name):
+    """Returns a context manager timing its block in the innermost active call. No-op when profiling is disabled."""
+    if _stack:
+        return _Span(_stack[-1], name)
+    return _null_span
+
+def instrument(name, attribute=None):
+    """
+    Decorator collecting a SolverStats object for each call of the decorated function while profiling is enabled.
+    Stats of nested calls are merged into the calling one.
+
+    Parameters
+    ----------
+    name : str
+        Name of the stats object and of the span covering the whole call.
+    attribute : str
+        If given, the stats object is stored on the first argument (self) under this attribute name.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            stats = SolverStats(name)
+            stats.count(f"{name}_calls")
+            _stack.append(stats)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats.add_time(name, time.perf_counter() - start)
+                _stack.pop()
+                if _stack:
+                    _stack[-1].merge(stats)
+                if attribute is not None:
+                    setattr(args[0], attribute, stats)
+        return wrapper
+    return decorator
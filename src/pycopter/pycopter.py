@@ -1,9 +1,27 @@
 """Main module."""
 
+from concurrent.futures import ProcessPoolExecutor
+import copy
+import os
 import numpy as np
 import matplotlib.pyplot as plt
+from scipy.optimize import minimize_scalar
 
 from .utils import *
+from .kernels import HoverKernel, resolve_backend, element_edges, refine_edges
+from .batch import hover_performance, forward_flight_performance, hover_batch
+from .azimuth import azimuth_grid, blade_element_angles, trim_cyclic, airfoil_thickness, stall_and_drag_divergence
+from .trim import trim_loads, solve_trim, rotor_loads
+from .inflow import resolve_inflow, rk4
+from .loads import SpanwiseLoads
+from . import profiling
+
+def polar_conditions(chord, tip_speed_mach, speed_of_sound=343):
+    """
+    Returns the Mach and Reynolds numbers the rotor polar is requested for. Those of the middle element of the blade, with the
+    equivalent chord of a chord distribution.
+    """
+    return tip_speed_mach / 2, reynolds(tip_speed_mach * speed_of_sound / 2, equivalent_chord(chord), 1.5e-5)
 
 class Rotor():
     """
@@ -12,14 +30,35 @@ class Rotor():
 
     Methods
     -------
-    hover(weight: int, density: float, n: int) -> None
-        Calculates the hover performance and stores it in class variables.
+    hover(weight: int, density: float, n: int, spacing: str, tolerance: float) -> None
+        Calculates the hover performance and stores it in class variables. Optionally on a cosine spaced or adaptive element grid.
     forward_flight(velocity: int/float, density: float, flat_plate_area: float) -> None
         Calculates the forward flight performance and stores it in class variables. Function 'hover' must be called before.
+    trim(velocity: float or ndarray, density: float, flat_plate_area: float) -> dict
+        Trims the collective, cyclic and disk tilt in level forward flight with the blade element grid.
+    simulate(duration: float, dt: float, velocity: float, gust, collective) -> dict
+        Integrates the inflow model in time for gust and collective inputs from the trimmed flight.
+    blade_stall(velocity: float, density: float, flat_plate_area: float) -> None
+        Detects retreating blade stall and advancing tip drag divergence on an azimuth x radius grid.
+    stall_limited_speed(density: float, flat_plate_area: float) -> float
+        Returns the forward flight speed where the retreating blade starts to stall.
+    velocity_sweep(min_velocity: float, max_velocity: float, density: float, flat_plate_area: float) -> dict
+        Solves the forward flight over a velocity range with continuation and adaptive velocity spacing.
+    optimal_speeds(weight: int, density: float, flat_plate_area: float) -> dict
+        Returns the minimum power (maximum endurance) and best range speeds.
+    sensitivities(parameters: tuple, weight: int, density: float, velocity: float) -> dict
+        Returns the finite difference derivatives of the hover and forward flight outputs.
     ige(thrust: float, rotor_height: float) -> float
-        Returns the hover thrust in ground effect.   
+        Returns the hover thrust in ground effect.
+    ige_power(rotor_height: float, model: str) -> float
+        Returns the hover power required in ground effect.   
+    blade_sections(x: ndarray) -> (ndarray, ndarray)
+        Returns the twist and chord of the blade at normalized radii.
+    batch_sections(n: int) -> dict
+        Returns the element sections of a blade with distributions for 'hover_batch'.
     """
-    def __init__(self, airfoil="naca23012", num_blades=5, chord=0.52, rotor_diameter=21.29, tip_speed_mach=0.624, washout=-8, rotor_root_cutout=0.01, new_polar=True):
+    def __init__(self, airfoil="naca23012", num_blades=5, chord=0.52, rotor_diameter=21.29, tip_speed_mach=0.624, washout=-8, rotor_root_cutout=0.01, new_polar=True, polar=None, backend="auto",
+                 inflow="bemt"):
         """
         Initializes the Rotor class with the given configuration. Default values are for the rotor of a Mil Mi-8 helicopter.
 
@@ -29,40 +68,65 @@ class Rotor():
             Airfoil name. Only naca profiles are available. E.g. 'naca0012'.
         num_blades : int
             Number of blades in rotor.
-        chord : float [m]
-            Chord length of a blade.
+        chord : float, array_like or callable [m]
+            Chord length of a blade. A distribution is given as samples from root to tip, (r/R, chord) rows or a function of r/R
+            (see 'blade_distribution'); 'chord' is then its thrust weighted equivalent chord 3∫c(x)x²dx.
         rotor_diameter : float [m]
             Rotor disk diameter
         tip_speed_mach : float
             Rotor/blade tip speed in mach. E.g. '0.6'.
-        washout : float [°]
-            Blade root to tip twist in degrees.
+        washout : float, array_like or callable [°]
+            Blade root to tip twist in degrees. A nonlinear twist is given as a distribution of the blade pitch[°] like 'chord';
+            'washout' is then its tip minus root pitch, and the models without radial resolution use that linear twist.
         rotor_root_cutout : float
             Ratio of rotor disk middle hole area to rotor disk area. Also the same as the ratio of rotorhead/pylon diameter to rotor diameter.   
         new_polar : bool
             Whether to request new polars from Xfoil.
+        polar : Polar
+            Precomputed polar to use instead of requesting one from Xfoil. 'new_polar' is ignored if given.
+        backend : str
+            Hover inflow kernel. 'numba' for the compiled kernel, 'numpy' for the NumPy kernel, 'auto' for Numba if it is installed.
+            Can be switched later through the 'backend' attribute.
+        inflow : str or InflowModel
+            Inflow model of the blade element grid ('trim' and 'simulate'), see pycopter.inflow. 'bemt' for uniform momentum inflow,
+            'pitt-peters' for Pitt-Peters dynamic inflow. Hover and 'forward_flight' keep the BEMT and Wald's equation solutions.
         """
         self.airfoil = airfoil
         self.num_blades = num_blades
-        self.chord = chord
         self.rotor_diameter = rotor_diameter
         self.tip_speed_mach = tip_speed_mach
-        self.washout = washout
+        # Distributions are sampled onto the element grids once per grid, see '_hover_kernel'.
+        self.chord_distribution = blade_distribution(chord, "chord")
+        self.twist_distribution = blade_distribution(washout, "washout")
+        self.chord = equivalent_chord(chord)
+        self.washout = float(self.twist_distribution(1.0) - self.twist_distribution(0.0)) if self.twist_distribution is not None else washout
+        self._distribution_geometry = (self.chord, self.washout)
         self.rotor_root_cutout = rotor_root_cutout
+        self.backend = backend
+        resolve_backend(backend)
+        self.inflow = inflow
+        self.inflow_model = resolve_inflow(inflow)
 
         print("\nInitializing rotor...")
         self.speed_of_sound = 343 # TODO: Needs to be calculated per density. Also the mach variables below.
+        self._update_geometry()
+        print("Tip Speed:", self.tip_speed, "[m/s] | Rotor Disk Area:", self.rotor_disk_area, "[m2] | Solidity:", self.solidity)
+
+        if polar is None:
+            self.polar = Polar(self.airfoil, *polar_conditions(self.chord, self.tip_speed_mach, self.speed_of_sound), new_polar)
+        else:
+            self.polar = polar
+        self.is_hovered = False
+
+    def _update_geometry(self):
+        """Calculates the quantities derived from the rotor geometry. Must be called after changing a geometry attribute."""
         self.r = self.rotor_diameter / 2
         self.omega_mach = self.tip_speed_mach / self.r
         self.omega = self.omega_mach * self.speed_of_sound
         self.rpm = self.omega * 30 / np.pi
         self.tip_speed = self.omega * self.r
         self.rotor_disk_area = np.pi * self.r**2 - np.pi * (self.r * self.rotor_root_cutout)**2
-        self.solidity = num_blades * chord / (np.pi * self.r)
-        print("Tip Speed:", self.tip_speed, "[m/s] | Rotor Disk Area:", self.rotor_disk_area, "[m2] | Solidity:", self.solidity)
-
-        self.polar = Polar(self.airfoil, self.tip_speed_mach / 2, reynolds(self.tip_speed/2, self.chord, 1.5e-5), new_polar) # Creating XFOIL polar data for the middle element.
-        self.is_hovered = False
+        self.solidity = self.num_blades * self.chord / (np.pi * self.r)
 
     def calculate(self, density=1.225, theta=8):
         # Deprecated
@@ -88,25 +152,86 @@ class Rotor():
 
         print("T&HP:", self.thrust, self.horsepower, "Coefs:", self.ct, self.cp, self.cq, "Merits:", self.M, self.M_actual, self.FMR, "B =", self.tip_loss_2)"""
     
-    def ige(self, thrust:float, rotor_height:float): # In Ground Effect
+    def blade_sections(self, x):
+        """
+        Returns the blade pitch relative to the root[°] and the chord[m] at normalized radii x = r/R, from the distributions or the
+        linear twist and constant chord. A distribution follows later changes of 'chord' by scaling and of 'washout' by adding
+        linear twist, e.g. in 'sensitivities'.
+        """
+        x = np.asarray(x, dtype=float)
+        chord_reference, washout_reference = self._distribution_geometry
+        if self.twist_distribution is None:
+            twist = x * self.washout
+        else:
+            twist = self.twist_distribution(x) - self.twist_distribution(0.0) + x * (self.washout - washout_reference)
+        if self.chord_distribution is None:
+            chord = np.full(x.shape, float(self.chord))
+        else:
+            chord = self.chord_distribution(x) * (self.chord / chord_reference)
+        return twist, chord
+
+    def batch_sections(self, n):
+        """
+        Returns the 'element_twist' and 'element_chord' arguments of 'hover_batch' at its n element centers for a blade with chord or
+        twist distributions, or an empty dictionary for the linear twist and constant chord blade.
         """
-        Returns the thrust in ground effect.
+        if self.twist_distribution is None and self.chord_distribution is None:
+            return {}
+        twist, chord = self.blade_sections((np.arange(n) + 0.5) / n)
+        return {"element_twist": twist, "element_chord": chord}
+
+    def _grid_sections(self, x):
+        """Returns the 'twist' and 'chord' arguments of the azimuth grid models: the linear values, or the sections at radii x."""
+        if self.twist_distribution is None and self.chord_distribution is None:
+            return self.washout, self.chord
+        return self.blade_sections(x)
+
+    def ige(self, thrust:float, rotor_height:float, min_height=0.5): # In Ground Effect
+        """
+        Returns the thrust in ground effect at the power out of ground effect, with the Cheeseman-Bennett model.
 
         Parameters
         ----------
         thrust : float [N or kg]
             Rotor thrust out of ground effect.
-        rotor_height : float [m]
-            Rotor disk height from ground/obstacle below.
+        rotor_height : float or ndarray [m]
+            Rotor disk height from ground/obstacle below. An array evaluates a height sweep at once.
+        min_height : float
+            Lowest rotor height in rotor radii. Lower heights are evaluated at it, as the model is singular at r/4.
         
         Returns
         -------
-        float
+        float or ndarray
             New thrust amplified by the ground effect.
         """
-        return thrust / (1 - (self.r**2 / (16 * rotor_height**2)))
+        return thrust * ground_effect_thrust_ratio(rotor_height, self.r, min_height)
 
-    def hover(self, weight=13000, density=1.225, n=10): 
+    def ige_power(self, rotor_height, model="hayden", min_height=0.5):
+        """
+        Returns the power required to hover in ground effect at the hover thrust. The ground effect reduces the induced power,
+        the profile power is unchanged. Function 'hover' must be called before.
+
+        Parameters
+        ----------
+        rotor_height : float or ndarray [m]
+            Rotor disk height from ground/obstacle below. An array evaluates a height sweep at once.
+        model : str
+            'hayden' or 'cheeseman-bennett', see 'ground_effect_power_ratio'.
+        min_height : float
+            Lowest rotor height in rotor radii.
+
+        Returns
+        -------
+        float or ndarray [W]
+            Total power in ground effect.
+        """
+        if not self.is_hovered:
+            print("Running hover calculations for level blade first...")
+            self.hover()
+        return self.hover_power_induced * ground_effect_power_ratio(rotor_height, self.r, model, min_height) + self.hover_power_profile
+
+    @profiling.instrument("hover", "hover_stats")
+    def hover(self, weight=13000, density=1.225, n=10, spacing="uniform", tolerance=None, max_elements=400):
         """
         Calculates the hover performance of the initialized rotor. Finds the minimum blade collective 
         pitch angle that can lift the specified weight and calculates the remaining parameters with that angle.  
@@ -118,74 +243,131 @@ class Rotor():
         density : float [kg/m3]
             Density of air.
         n : int
-            Blade element theory resolution.
+            Blade element theory resolution. The initial number of elements of an adaptive grid.
+        spacing : str
+            'uniform' elements from the rotor center, or 'cosine' elements from the root cutout clustered at the tip (see
+            kernels.element_edges). Also the initial grid of an adaptive one.
+        tolerance : float
+            Relative thrust tolerance of an adaptive grid. If given, the elements across rapid changes of dT/dr are split at the
+            hover collective until the estimated thrust error of every element is below the tolerance, or the grid has
+            'max_elements'. The elemental inflow after the capped iteration steps where it changes between the branches of its
+            period two cycle, and the steps move with the collective, so only an adaptive grid reaches the accuracy of a fine
+            uniform grid with few elements: about 45 elements at 2e-3 against 200 uniform ones. The adapted grid is kept as the
+            start of the next call, so sweeps adapt it once.
+        max_elements : int
+            Largest number of elements of an adaptive grid.
+
+        The converged elemental induced velocities are stored in 'induced_vel', the element edges[r/R] in 'element_edges', and the
+        spanwise blade loads derived from them on request in 'spanwise' (see pycopter.loads).
+        While profiling is enabled (see pycopter.profiling), the counters and spans of the call are stored in 'hover_stats'.
         """
         weight *= 9.81
         print("\nCalculating Hover Conditions...")
         self.is_hovered = True
-        dr = self.r / n # Blade element radial length.
-        
-        # Blade elemental induced velocity.
-        phi = np.zeros((n))
-        alfa = np.zeros((n))
-        for theta in np.linspace(0, 15, 31, endpoint=True):
-            induced_vel_old = np.zeros((n))
-            induced_vel = np.ones((n))
-            iter = 0
-            while np.linalg.norm(induced_vel - induced_vel_old) > 1e-12:
-                induced_vel_old = induced_vel.copy()
-                for i, r_i in enumerate(np.linspace(0, self.r, n, endpoint=False)):
-                    element_center = (r_i + dr/2)
-                    elemental_theta = theta + (element_center / self.r) * (self.washout) # TODO: Implement dual washout
-                    phi[i] = np.arctan(induced_vel[i] / (self.omega * element_center))
-                    alfa[i] = elemental_theta - np.rad2deg(phi[i])
-                    if alfa[i] < -1: alfa[i] = -1
-                    if alfa[i] > 20: alfa[i] = 20
-                    cl, cd = self.polar.get_polar(alfa[i]) 
-                    inner_root = element_center * (cl * np.cos(phi[i]) - cd * np.sin(phi[i]))
-                    if inner_root < 0:
-                        induced_vel[i] = -np.sqrt(-inner_root)
-                    else:
-                        induced_vel[i] = np.sqrt(inner_root)
-                induced_vel *= np.sqrt(self.num_blades * self.chord / (8 * np.pi)) * self.omega
-                iter +=1
-                if iter > 10:
-                    break
+        edges = element_edges(self.rotor_root_cutout, n, spacing)
+        if tolerance is not None:
+            key = (edges.tobytes(), tolerance, max_elements)
+            adapted = getattr(self, "_adaptive_cache", (None, None))
+            edges = adapted[1] if adapted[0] == key else edges
+        table = self.polar.lookup_table()
 
-            # Blade elemental thrust.
-            thrust = 0
-            drag = 0
-            for i, r_i in enumerate(np.linspace(0, self.r, n, endpoint=False)):
-                element_center = (r_i + dr/2)
-                thrust += element_center * induced_vel[i]**2
-            thrust *= 4 * density * np.pi * dr * 0.97 # 0.97 for tip loss.
+        while True:
+            kernel = self._hover_kernel(len(edges) - 1, edges)
+            element_center, element_width = kernel.element_center, np.diff(edges) * self.r
+            theta, thrust = self._hover_collective(kernel, element_width, weight, density)
+            if tolerance is None:
+                break
+            refined = self._refine_grid(edges, theta, density, tolerance, max_elements, kernel)
+            if refined is edges: # Converged at this collective.
+                break
+            edges = refined
+        if tolerance is not None:
+            self._adaptive_cache = (key, edges)
 
-            if thrust >= weight: break
-
-        print(f"Theta = {theta}° | Induced Velocity= {np.mean(induced_vel)}[m/s] | Thrust = {thrust/9.81}[kg]")
+        print(f"Theta = {theta}° | Induced Velocity= {np.average(kernel.induced_vel, weights=element_width)}[m/s] | Thrust = {thrust/9.81}[kg] | Elements = {len(element_center)}")
 
-        # Parameters calculation based on maaaany simplifications.
         self.theta = theta
-        self.hover_induced_vel = np.mean(induced_vel)
+        self.element_edges = edges
+        self.hover_induced_vel = np.average(kernel.induced_vel, weights=element_width)
+        self.induced_vel = kernel.induced_vel.copy()
+        chord = self.chord if self.chord_distribution is None else self.blade_sections(element_center / self.r)[1]
+        self.spanwise = SpanwiseLoads(element_center, self.induced_vel, kernel.alfa.copy(), self.omega, self.r, density, self.num_blades,
+                                      chord, table, element_width=element_width)
         self.hover_thrust = thrust
-
-        self.ct = thrust / (density * np.pi * self.r**4 * self.omega**2)
-        self.tip_loss = 1 - np.sqrt(2 * self.ct) / self.num_blades
-        self.cl_mean = 6 * self.ct / (self.tip_loss**3 * self.solidity)
-        self.a = self.polar.get_cl_slope()
-        self.alfa = 6 * self.ct / (self.solidity * self.a * self.tip_loss**3)
-        self.cd_mean = 0.0087 - 0.0216*self.alfa + 0.4*self.alfa**2 # TODO: This depends on empirical data based on naca0012. Get the relation from the polar, instead. Furthermore, this needs to satisfy Fig3-1 for naca0012(prolly).
-        self.hover_power_induced = thrust**1.5 / (self.tip_loss * np.sqrt(2*density * self.rotor_disk_area))
-        self.hover_power_profile = density * self.num_blades * self.chord * (self.r**4) * (self.omega**3) * self.cd_mean / 8 
-        self.hover_power_total = self.hover_power_induced + self.hover_power_profile
-        self.cp = self.hover_power_total / (density * np.pi * self.r**5 * self.omega**3)
-        self.merit = 0.707 * self.ct**1.5 / self.cp
-        self.merit_max = 0.707 * self.ct**1.5 / (self.ct**1.5 / (np.sqrt(2) * self.tip_loss) + self.solidity * self.cd_mean / 8)
+        performance = hover_performance(thrust, density, self.r, self.omega, self.num_blades, self.chord, self.solidity,
+                                        self.rotor_disk_area, self.polar.get_cl_slope())
+        for name, value in performance.items():
+            setattr(self, name, value)
 
         print("SHP Induced:", self.hover_power_induced*0.00134102209, "| SHP Profile:", self.hover_power_profile*0.00134102209, "| SHP Total:", self.hover_power_total*0.00134102209)
         print("Coeffs:", self.ct, self.cp, "| Merits:", self.merit, self.merit_max, self.merit / self.merit_max, "| Tip Loss:", self.tip_loss)
 
-    def forward_flight(self, velocity, density=1.225, flat_plate_area=3.5):
+    def _hover_collective(self, kernel, element_width, weight, density):
+        """Returns the lowest collective[°] of the 0.5° steps whose thrust[N] lifts the weight[N], and that thrust."""
+        n = len(element_width)
+        for theta in np.linspace(0, 15, 31, endpoint=True):
+            profiling.count("theta_steps")
+            with profiling.span("hover.inflow"):
+                iterations = kernel.solve(theta)
+            profiling.count("inner_iterations", iterations)
+            profiling.count("polar_lookups", n * iterations)
+            if not kernel.converged:
+                profiling.count("inner_iteration_cap_hits") # Inflow did not converge to 1e-12.
+
+            with profiling.span("hover.thrust"):
+                thrust = self._kernel_thrust(kernel, element_width, density)
+            if thrust >= weight: break
+        return theta, thrust
+
+    @staticmethod
+    def _kernel_thrust(kernel, element_width, density):
+        """Returns the blade element thrust[N] of the converged inflow of a kernel."""
+        return np.dot(kernel.element_center * element_width, kernel.induced_vel**2) * 4 * density * np.pi * 0.97 # 0.97 for tip loss.
+
+    def _refine_grid(self, edges, theta, density, tolerance, max_elements=400, kernel=None):
+        """
+        Returns the element edges refined at a collective[°] until the estimated thrust error of every element is below 'tolerance'
+        of the thrust, or the grid would exceed 'max_elements' (see kernels.refine_edges). The same array if nothing is split.
+        'kernel' may hold the solution on 'edges' at the collective already.
+        """
+        table = self.polar.lookup_table()
+        while True:
+            if kernel is None:
+                kernel = self._element_kernel(edges, table)
+                kernel.solve(theta)
+                profiling.count("refinement_checks")
+            thrust = self._kernel_thrust(kernel, np.diff(edges) * self.r, density)
+            load = 4 * density * np.pi * 0.97 * kernel.element_center * kernel.induced_vel**2 * self.r # dT/d(r/R)
+            refined = refine_edges(edges, load, tolerance * thrust)
+            if refined is edges or len(refined) - 1 > max_elements:
+                return edges
+            edges, kernel = refined, None
+
+    def _hover_kernel(self, n, spacing="uniform"):
+        """
+        Returns the hover inflow kernel of the n element grid of a spacing or of element edges, see 'kernels.element_edges'.
+        Reused while the grid, geometry, polar and backend are unchanged.
+        """
+        table = self.polar.lookup_table()
+        edges = element_edges(self.rotor_root_cutout, n, spacing)
+        key = (edges.tobytes(), self.backend, id(table), self.r, self.washout, self.chord, self.num_blades, self.omega,
+               id(self.twist_distribution), id(self.chord_distribution))
+        kernel = getattr(self, "_kernel_cache", (None, None))
+        if kernel[0] != key:
+            kernel = (key, self._element_kernel(edges, table))
+            self._kernel_cache = kernel
+        return kernel[1]
+
+    def _element_kernel(self, edges, table):
+        """Returns a new hover inflow kernel of the elements between normalized edges."""
+        element_center = (edges[:-1] + edges[1:]) / 2 * self.r
+        element_twist, element_chord = self.blade_sections(element_center / self.r)
+        inflow_factor = np.sqrt(self.num_blades * element_chord / (8 * np.pi)) * self.omega
+        return HoverKernel(element_center, element_twist, inflow_factor, self.omega, table, self.backend)
+
+    @profiling.instrument("forward_flight", "forward_flight_stats")
+    def forward_flight(self, velocity, density=1.225, flat_plate_area=3.5, stall_check=False, initial_downwash=1, wald_tolerance=None,
+                       trim=False):
         """
         Calculates the forward flight performance of the initialized rotor according to hover conditions.  
 
@@ -197,6 +379,17 @@ class Rotor():
             Density of air.
         flat_plate_area : float [m2]
             Equivalent flat plate area of the aircraft body. Used for calculating the parasite drag.
+        stall_check : bool
+            Whether to also run 'blade_stall' for this flight condition.
+        initial_downwash : float
+            Initial downwash velocity ratio of 'walds_solver', e.g. the solution of a nearby velocity.
+        wald_tolerance : float
+            Convergence tolerance of 'walds_solver'. Its 100 iterations are all run if not given.
+        trim : bool
+            Whether to trim the rotor with 'trim' instead of using the hover collective and a level disk. The powers then come from
+            the blade element grid, 'alfa' is the trimmed disk tilt and the trim state is stored as in 'trim'.
+
+        While profiling is enabled (see pycopter.profiling), the counters and spans of the call are stored in 'forward_flight_stats'.
         """
         if not (isinstance(velocity, float) or isinstance(velocity, int)):
             raise ValueError("Forward flight velocity must be a numeric singleton.")
@@ -205,24 +398,15 @@ class Rotor():
             self.hover()
 
         print("\nCalculating Forward Flight Conditions...")
-        # Simplifications
-        self.alfa = 0 # pg.93, AMCP 706-201
-
-        advance_ratio = velocity / (self.omega * self.r) # velocity * np.cos(self.alfa) / (self.omega * self.r)
-        self.downwash_velocity_ratio = walds_solver(velocity, self.hover_induced_vel, self.alfa)
-        
-        self.power_induced = self.downwash_velocity_ratio * self.hover_power_induced
-        self.drag_induced = self.power_induced / (2*self.hover_induced_vel) # v2. not v.
-        if self.power_induced < 0: self.power_induced = 0
-        
-        self.power_profile = (density * self.num_blades * self.chord * self.r**4 * self.omega**3 * self.cd_mean / 8) * (1 + 4.65*advance_ratio**2)
-        self.drag_profile = self.power_profile / (self.omega * self.r)
-
-        self.body_drag = density * velocity**2 * flat_plate_area / 2 # Flat plate area is component_reference_area * drag_coefficient for the body.
-        self.power_parasite = self.body_drag * velocity
-
-        self.power_total = self.power_induced + self.power_profile + self.power_parasite
-        self.horsepower_total = self.power_total * 0.00134102209
+        if trim:
+            performance = self._trimmed_performance(velocity, density, flat_plate_area)
+        else:
+            # Simplifications
+            self.alfa = 0 # pg.93, AMCP 706-201
+            performance = forward_flight_performance(velocity, density, flat_plate_area, self.hover_induced_vel, self.hover_power_induced,
+                                                     self.cd_mean, self.r, self.omega, self.num_blades, self.chord, initial_downwash, wald_tolerance)
+        for key, value in performance.items():
+            setattr(self, key, value)
 
         thrust_profile = self.power_profile / self.r
         print(f"Alfa: {self.alfa} | Downwash Velocity Ratio: {self.downwash_velocity_ratio} | Check if {thrust_profile/(2*density*self.rotor_disk_area)} is smaller than {velocity**2 / 2} for horsepowers below.")
@@ -235,17 +419,559 @@ class Rotor():
         # Di_Lr_ratio = self.ct / (2 * advance_ratio * np.sqrt(advance_ratio**2 + inflow_ratio**2))
         # Dp_Lr_ratio = flat_plate_area / (self.rotor_disk_area * clr)
 
-        # TODO: Implement blade stall.
-    
+        if stall_check:
+            self.blade_stall(velocity, density, flat_plate_area)
+
+    @profiling.instrument("trim", "trim_stats")
+    def trim(self, velocity, density=1.225, flat_plate_area=3.5, weight=None, n_azimuth=24, n=20, tolerance=1e-8, max_iterations=30):
+        """
+        Trims the rotor in level forward flight. The collective θ0, longitudinal cyclic θ1s, forward disk tilt and uniform inflow ratio
+        are iterated until the rotor force balances the weight and the body drag with no flapping relative to the disk (see
+        pycopter.trim), with the steady inflow of the inflow model of the rotor. The Newton iteration starts from a finite difference Jacobian of the blade element grid and updates it with
+        Broyden's method. The trim state and Jacobian are kept for the next call at the same weight, density and flat plate area,
+        so neighbouring velocities, and the velocities of an array, start from them and mostly take no new Jacobian.
+        Function 'hover' must be called before.
+
+        The results of the last velocity are stored in 'theta_trim', 'theta1s_trim', 'alfa_trim', 'inflow_ratio_trim', 'power_trim'
+        and 'trim_converged'.
+
+        Parameters
+        ----------
+        velocity : float or ndarray [m/s]
+            Level forward flight velocity. Arrays are trimmed in their order, each from the previous velocity.
+        density : float [kg/m3]
+            Density of air.
+        flat_plate_area : float [m2]
+            Equivalent flat plate area of the aircraft body.
+        weight : int [kg]
+            Weight carried by the rotor. The hover thrust if not given.
+        n_azimuth, n : int
+            Azimuth stations and blade elements of the grid.
+        tolerance : float
+            Largest norm of the trim residuals.
+        max_iterations : int
+            Largest number of Newton steps per velocity.
+
+        Returns
+        -------
+        dict
+            'theta0'[°], 'theta1s'[°], 'alfa'[°] (disk tilt, forward positive), 'inflow_ratio', 'thrust'[N], 'power_total'[W],
+            'power_induced'[W], 'iterations', 'jacobians' and 'converged', per velocity.
+        """
+        if not self.is_hovered:
+            print("Running hover calculations for level blade first...")
+            self.hover()
+        lift = self.hover_thrust if weight is None else weight * 9.81
+        geometry = (self.r, self.omega, self.num_blades, self.chord, self.washout, self.rotor_root_cutout, id(self.polar.polar),
+                    id(self.twist_distribution), id(self.chord_distribution))
+        key = (geometry, float(lift), float(density), float(flat_plate_area), n_azimuth, n, id(self.inflow_model))
+        twist, chord = self._grid_sections(azimuth_grid(self.rotor_root_cutout, n_azimuth, n)[1][0])
+        cached = getattr(self, "_trim_cache", (None, None, None))
+        state, jacobian = cached[1:] if cached[0] == key else (None, None)
+
+        velocities = np.atleast_1d(np.asarray(velocity, dtype=float))
+        results = {name: np.empty(len(velocities)) for name in ("theta0", "theta1s", "alfa", "inflow_ratio", "thrust", "power_total",
+                                                                "power_induced")}
+        results.update(iterations=np.zeros(len(velocities), dtype=int), jacobians=np.zeros(len(velocities), dtype=int),
+                       converged=np.zeros(len(velocities), dtype=bool))
+        solved = [] # Velocities and trim states of the previous points of the array, for a secant predictor.
+        for i, v in enumerate(velocities):
+            def loads(states):
+                return trim_loads(states, v, density, flat_plate_area, lift, self.r, self.omega, self.num_blades, chord, twist,
+                                  self.polar.polar, self.rotor_root_cutout, n_azimuth, n, self.inflow_model)
+            if state is None: # Hover collective, the disk tilt balancing the body drag and the inflow of Wald's equation.
+                tilt = np.arctan(density * v**2 * flat_plate_area / (2 * lift))
+                downwash = walds_solver(v, self.hover_induced_vel, 0, 1000, 1, 1e-9) * self.hover_induced_vel
+                state = np.array([self.theta, 0, np.rad2deg(tilt), (downwash + v * np.sin(tilt)) / self.tip_speed])
+            elif len(solved) >= 2 and solved[-1][0] != solved[-2][0]:
+                (v1, state1), (v2, state2) = solved[-2:]
+                state = state2 + (state2 - state1) * (v - v2) / (v2 - v1)
+            state, jacobian, stats = solve_trim(lambda states: loads(states)["residual"], state, jacobian, tolerance, max_iterations)
+            solved.append((v, state))
+            solution = loads(state)
+            for name, value in zip(("theta0", "theta1s", "alfa", "inflow_ratio"), state):
+                results[name][i] = value
+            results["thrust"][i], results["power_total"][i], results["power_induced"][i] = solution["thrust"], solution["power"], solution["power_induced"]
+            results["iterations"][i], results["jacobians"][i], results["converged"][i] = stats["iterations"], stats["jacobians"], stats["converged"]
+            if not stats["converged"]:
+                print(f"Trim did not converge at {v}[m/s].")
+                state, jacobian, solved = None, None, [] # Don't continue from a diverged state.
+        self._trim_cache = (key, state, jacobian)
+
+        self.theta_trim, self.theta1s_trim, self.alfa_trim = results["theta0"][-1], results["theta1s"][-1], results["alfa"][-1]
+        self.inflow_ratio_trim, self.power_trim, self.trim_converged = results["inflow_ratio"][-1], results["power_total"][-1], bool(results["converged"][-1])
+        print(f"Trim: Theta0 = {self.theta_trim}° | Theta1s = {self.theta1s_trim}° | Disk Tilt = {self.alfa_trim}° | Power = {self.power_trim}[W]")
+        if np.ndim(velocity) == 0:
+            return {name: value[0].item() for name, value in results.items()}
+        return results
+
+    @profiling.instrument("simulate", "simulate_stats")
+    def simulate(self, duration, dt=0.01, velocity=0.0, density=1.225, flat_plate_area=3.5, gust=0.0, collective=0.0, n_azimuth=24, n=20):
+        """
+        Simulates the response of the rotor to vertical gusts and collective inputs from the trimmed level flight, e.g. for gust
+        loads and manoeuvre power. The cyclic and disk tilt stay at their trim. The inflow states of the inflow model of the rotor
+        are integrated with fixed-step Runge-Kutta ('pycopter.inflow.rk4'), so the loads lag the inputs; the 'bemt' model follows
+        them instantly and is solved at all times at once. Inputs may be arrays of variants, which are simulated together.
+
+        The results are stored in 'simulation_results' and returned.
+
+        Parameters
+        ----------
+        duration : float [s]
+            Simulated time.
+        dt : float [s]
+            Time step.
+        velocity : float [m/s]
+            Level forward flight velocity to trim at.
+        density : float [kg/m3]
+            Density of air.
+        flat_plate_area : float [m2]
+            Equivalent flat plate area of the aircraft body.
+        gust : float, ndarray or callable [m/s]
+            Vertical gust velocity, upwards positive. A callable is called with the time[s] and returns the gusts of the variants.
+        collective : float, ndarray or callable [°]
+            Collective pitch change from the trim, likewise.
+        n_azimuth, n : int
+            Azimuth stations and blade elements of the grid.
+
+        Returns
+        -------
+        dict
+            'time'[s] (steps + 1), and 'thrust'[N], 'power'[W] of shape (steps + 1, *variants) and the induced 'inflow' states
+            (λ0, λ1s, λ1c) of shape (steps + 1, *variants, 3).
+        """
+        gust_at = gust if callable(gust) else (lambda time: gust)
+        collective_at = collective if callable(collective) else (lambda time: collective)
+        trimmed = self.trim(float(velocity), density, flat_plate_area, n_azimuth=n_azimuth, n=n)
+        tilt = np.deg2rad(trimmed["alfa"])
+        free_stream = velocity * np.sin(tilt) / self.tip_speed # Inflow ratio of the free stream through the tilted disk.
+        advance_ratio = velocity * np.cos(tilt) / self.tip_speed
+        steps = int(round(duration / dt))
+        time = dt * np.arange(steps + 1)
+        shape = np.broadcast_shapes(np.shape(gust_at(0.0)), np.shape(collective_at(0.0)))
+        twist, chord = self._grid_sections(azimuth_grid(self.rotor_root_cutout, n_azimuth, n)[1][0])
+
+        def inputs(times, states):
+            """Returns the controls and the inflow of states at times, broadcast against each other."""
+            times = np.reshape(times, np.shape(times) + (1,) * len(shape))
+            controls = np.stack(np.broadcast_arrays(trimmed["theta0"] + np.asarray(collective_at(times), dtype=float), trimmed["theta1s"], trimmed["alfa"]), axis=-1)
+            inflow = np.array(states, dtype=float)
+            inflow[..., 0] += free_stream - np.asarray(gust_at(times), dtype=float) / self.tip_speed
+            return controls, inflow
+
+        def loads(times, states):
+            controls, inflow = inputs(times, states)
+            return rotor_loads(controls, velocity, density, inflow, self.r, self.omega, self.num_blades, chord, twist,
+                               self.polar.polar, self.rotor_root_cutout, n_azimuth, n), inflow[..., 0]
+
+        trim_state = [trimmed[name] for name in ("theta0", "theta1s", "alfa", "inflow_ratio")]
+        initial = trim_loads(trim_state, velocity, density, flat_plate_area, trimmed["thrust"], self.r, self.omega, self.num_blades,
+                             chord, twist, self.polar.polar, self.rotor_root_cutout, n_azimuth, n, self.inflow_model)
+        initial = np.array([initial["inflow_induced"], *initial["inflow"][1:]]) # Induced inflow of the trim.
+        if self.inflow_model.dynamic:
+            def derivative(t, states):
+                solution, inflow_ratio = loads(t, states)
+                return self.omega * self.inflow_model.derivatives(states, solution["forcing"], advance_ratio, inflow_ratio) # Per second.
+            time, states = rk4(derivative, np.broadcast_to(initial, shape + (3,)), dt, steps)
+        else: # Quasi-steady: the inflow of every time is in equilibrium with its loads.
+            states = np.broadcast_to(initial, (steps + 1,) + shape + (3,)).copy()
+            for iteration in range(200):
+                solution, inflow_ratio = loads(time, states)
+                change = self.inflow_model.steady(solution["forcing"], advance_ratio, inflow_ratio) - states
+                states += 0.5 * change
+                if np.max(np.abs(change)) < 1e-10:
+                    break
+            profiling.count("inflow_iterations", iteration + 1)
+
+        solution, _ = loads(time, states)
+        self.simulation_results = {"time": time, "thrust": solution["thrust"], "power": solution["power"], "inflow": states}
+        return self.simulation_results
+
+    def _trimmed_performance(self, velocity, density, flat_plate_area):
+        """Returns the 'forward_flight_performance' outputs of the trimmed rotor. The profile power includes the rotor H-force."""
+        trimmed = self.trim(velocity, density, flat_plate_area)
+        self.alfa = trimmed["alfa"]
+        body_drag = density * velocity**2 * flat_plate_area / 2
+        power_parasite = body_drag * velocity
+        power_induced = trimmed["power_induced"]
+        power_profile = trimmed["power_total"] - power_induced - power_parasite
+        return {"downwash_velocity_ratio": power_induced / trimmed["thrust"] / self.hover_induced_vel, "power_induced": power_induced,
+                "drag_induced": power_induced / (2*self.hover_induced_vel), "power_profile": power_profile,
+                "drag_profile": power_profile / (self.omega * self.r), "body_drag": body_drag, "power_parasite": power_parasite,
+                "power_total": trimmed["power_total"], "horsepower_total": trimmed["power_total"] * 0.00134102209}
+
+    def blade_stall(self, velocity, density=1.225, flat_plate_area=3.5, n_azimuth=72, n=50):
+        """
+        Evaluates the blade elements on an azimuth x radius grid in level forward flight with the hover collective, and detects
+        retreating blade stall and advancing tip drag divergence. Cyclic pitch removes the longitudinal flapping relative to the tip
+        path plane, which is tilted forward to balance the body drag. Function 'hover' must be called before.
+
+        Sets the grids 'grid_alfa', 'grid_mach', 'grid_stall', 'grid_drag_divergence' and 'grid_reverse_flow' (n_azimuth x n,
+        azimuth 0° at the tail, 90° advancing), and the flags 'retreating_blade_stall' and 'advancing_tip_drag_divergence'.
+
+        Parameters
+        ----------
+        velocity : int/float [m/s]
+            Level forward flight velocity.
+        density : float [kg/m3]
+            Density of air.
+        flat_plate_area : float [m2]
+            Equivalent flat plate area of the aircraft body.
+        n_azimuth : int
+            Number of azimuth stations.
+        n : int
+            Number of blade elements.
+        """
+        if not self.is_hovered:
+            print("Running hover calculations for level blade first...")
+            self.hover()
+
+        advance_ratio = velocity / self.tip_speed
+        tpp_tilt = np.arctan(density * velocity**2 * flat_plate_area / (2 * self.hover_thrust)) # Forward tilt balancing the body drag.
+        downwash_velocity_ratio = walds_closed_form(velocity, self.hover_induced_vel)
+        inflow_ratio = (downwash_velocity_ratio * self.hover_induced_vel + velocity * np.sin(tpp_tilt)) / self.tip_speed
+        theta1s = trim_cyclic(advance_ratio, inflow_ratio, self.theta, self.washout)
+
+        psi, r, _ = azimuth_grid(self.rotor_root_cutout, n_azimuth, n)
+        twist, _ = self._grid_sections(r[0])
+        pitch_offset, twist = (twist, 0.0) if np.ndim(twist) else (0.0, twist)
+        ut, _, alfa, mach = blade_element_angles(psi, r, self.tip_speed, velocity, inflow_ratio, self.theta + pitch_offset, twist,
+                                                 theta1s, speed_of_sound=self.speed_of_sound)
+        cl, _ = self.polar.get_polar(np.clip(alfa, self.polar.polar[0,0], self.polar.polar[-1,0]))
+        self.grid_reverse_flow, self.grid_stall, self.grid_drag_divergence = stall_and_drag_divergence(
+            ut, alfa, mach, self.polar.get_stall_angle(), cl, airfoil_thickness(self.airfoil))
+        self.grid_alfa = alfa
+        self.grid_mach = mach
+        self.theta1s = theta1s
+
+        retreating, advancing = (np.sin(psi) < 0), (np.sin(psi) > 0)
+        self.retreating_blade_stall = bool(np.any(self.grid_stall & retreating))
+        self.advancing_tip_drag_divergence = bool(np.any(self.grid_drag_divergence & advancing))
+        self.stall_fraction = np.mean(self.grid_stall)
+
+    def stall_limited_speed(self, density=1.225, flat_plate_area=3.5, max_velocity=150, step=5, tolerance=0.1, n_azimuth=72, n=50):
+        """
+        Returns the lowest forward flight speed[m/s] at which the retreating blade stalls. The speed range is scanned with 'blade_stall'
+        in coarse steps and the first stalling step is refined by bisection. Returns 'max_velocity' if there is no stall below it,
+        and 0 if the blade already stalls in hover. Function 'hover' must be called before.
+
+        Parameters
+        ----------
+        density : float [kg/m3]
+            Density of air.
+        flat_plate_area : float [m2]
+            Equivalent flat plate area of the aircraft body.
+        max_velocity : float [m/s]
+            Upper end of the search.
+        step : float [m/s]
+            Scan step.
+        tolerance : float [m/s]
+            Bisection tolerance.
+        """
+        def stalls(velocity):
+            self.blade_stall(velocity, density, flat_plate_area, n_azimuth, n)
+            return self.retreating_blade_stall
+
+        low = None
+        for velocity in np.arange(0, max_velocity + step, step):
+            velocity = min(velocity, max_velocity)
+            if stalls(velocity):
+                break
+            low = velocity
+        else:
+            return max_velocity
+        if low is None:
+            return 0.0
+
+        high = velocity
+        while high - low > tolerance:
+            middle = (low + high) / 2
+            if stalls(middle):
+                high = middle
+            else:
+                low = middle
+        self.blade_stall(high, density, flat_plate_area, n_azimuth, n)
+        return high
+
+    @profiling.instrument("velocity_sweep", "velocity_sweep_stats")
+    def velocity_sweep(self, min_velocity=10, max_velocity=80, density=1.225, flat_plate_area=3.5, initial_points=10, tolerance=0.02,
+                       velocity_tolerance=1, max_points=50, wald_tolerance=1e-9):
+        """
+        Solves the level forward flight over a velocity range by natural-parameter continuation. Each velocity starts 'walds_solver'
+        from the downwash velocity ratio extrapolated from the previous velocities, or interpolated between the neighbours of a refined
+        point, instead of from 1. The velocities start evenly spaced and intervals are halved where the power or lift/drag curve bends
+        away from a straight line, and around the minimum power and maximum lift/drag points (the bucket of the power curve) until they
+        are narrower than 'velocity_tolerance'. Function 'hover' must be called before.
+
+        The results are stored in 'sweep_results' and returned.
+
+        Parameters
+        ----------
+        min_velocity, max_velocity : float [m/s]
+            Velocity range.
+        density : float [kg/m3]
+            Density of air.
+        flat_plate_area : float [m2]
+            Equivalent flat plate area of the aircraft body.
+        initial_points : int
+            Evenly spaced velocities solved first.
+        tolerance : float
+            Largest deviation of a point from the straight line between its neighbours, relative to the range of the curve.
+        velocity_tolerance : float [m/s]
+            Width of the intervals around the minimum power and maximum lift/drag points.
+        max_points : int
+            Largest number of velocities solved.
+        wald_tolerance : float
+            Convergence tolerance of 'walds_solver'.
+
+        Returns
+        -------
+        dict
+            Increasing 'velocity' and the outputs of 'forward_flight' for each of them, and the lift to effective drag ratio 'ld'.
+        """
+        if not self.is_hovered:
+            print("Running hover calculations for level blade first...")
+            self.hover()
+        if not min_velocity < max_velocity:
+            raise ValueError("Sweep velocity range must be increasing.")
+
+        def solve(velocity, initial_downwash):
+            solution = forward_flight_performance(velocity, density, flat_plate_area, self.hover_induced_vel, self.hover_power_induced,
+                                                  self.cd_mean, self.r, self.omega, self.num_blades, self.chord, initial_downwash,
+                                                  wald_tolerance, 1000)
+            solution["ld"] = self.hover_thrust / (solution["drag_induced"] + solution["drag_profile"] + solution["body_drag"])
+            return solution
+
+        velocities = list(np.linspace(min_velocity, max_velocity, max(initial_points, 3)))
+        solutions = []
+        for i, velocity in enumerate(velocities):
+            if i >= 2: # Secant predictor.
+                slope = (solutions[-1]["downwash_velocity_ratio"] - solutions[-2]["downwash_velocity_ratio"]) / (velocities[i-1] - velocities[i-2])
+                initial_downwash = solutions[-1]["downwash_velocity_ratio"] + slope * (velocity - velocities[i-1])
+            else:
+                initial_downwash = solutions[-1]["downwash_velocity_ratio"] if solutions else 1
+            solutions.append(solve(velocity, max(initial_downwash, 1e-3)))
+
+        while len(velocities) < max_points:
+            v = np.array(velocities)
+            refine = set()
+            for name in ("power_total", "ld"):
+                y = np.array([solution[name] for solution in solutions])
+                line = y[:-2] + (y[2:] - y[:-2]) * (v[1:-1] - v[:-2]) / (v[2:] - v[:-2])
+                for j in np.flatnonzero(np.abs(y[1:-1] - line) > tolerance * np.ptp(y)) + 1:
+                    refine.update((j - 1, j))
+                best = np.argmin(y) if name == "power_total" else np.argmax(y)
+                refine.update(i for i in (best - 1, best) if 0 <= i < len(v) - 1 and v[i+1] - v[i] > velocity_tolerance)
+            if not refine:
+                break
+            for i in sorted(refine, reverse=True): # From the right, so that the indices to the left stay valid.
+                if len(velocities) >= max_points:
+                    break
+                middle = (velocities[i] + velocities[i+1]) / 2
+                initial_downwash = (solutions[i]["downwash_velocity_ratio"] + solutions[i+1]["downwash_velocity_ratio"]) / 2
+                velocities.insert(i + 1, middle)
+                solutions.insert(i + 1, solve(middle, initial_downwash))
+        profiling.count("sweep_points", len(velocities))
+
+        self.sweep_results = {"velocity": np.array(velocities)}
+        self.sweep_results.update({name: np.array([solution[name] for solution in solutions]) for name in solutions[0]})
+        return self.sweep_results
+
+    @profiling.instrument("optimal_speeds", "optimal_speeds_stats")
+    def optimal_speeds(self, weight=None, density=1.225, flat_plate_area=3.5, min_velocity=5, max_velocity=100, tolerance=0.01):
+        """
+        Finds the minimum power speed Vmp (maximum endurance) and the best range speed Vbr (maximum specific range, i.e. maximum
+        velocity per power) of level forward flight with a bounded Brent optimizer over the 'forward_flight' power. Each power
+        evaluation warm-starts 'walds_solver' from the previous one. The results are stored in 'velocity_min_power' and
+        'velocity_best_range', and cached per weight, density and flat plate area.
+
+        Parameters
+        ----------
+        weight : int [kg]
+            Weight of the aircraft. The rotor is hovered at it unless the result is cached. The current hover is used if not given.
+        density : float [kg/m3]
+            Density of air.
+        flat_plate_area : float [m2]
+            Equivalent flat plate area of the aircraft body.
+        min_velocity, max_velocity : float [m/s]
+            Search bounds. An optimum at a bound means the curve has no interior optimum in the bounds.
+        tolerance : float [m/s]
+            Velocity tolerance of the optimizer.
+
+        Returns
+        -------
+        dict
+            'velocity_min_power'[m/s], 'power_min_power'[W], 'velocity_best_range'[m/s], 'power_best_range'[W] and the number of
+            power 'evaluations'.
+        """
+        if not min_velocity < max_velocity:
+            raise ValueError("Velocity bounds must be increasing.")
+        geometry = (self.r, self.omega, self.num_blades, self.chord)
+        if weight is None:
+            if not self.is_hovered:
+                print("Running hover calculations for level blade first...")
+                self.hover()
+            condition = (self.hover_thrust, self.hover_induced_vel, self.hover_power_induced, self.cd_mean) # Current hover.
+        else:
+            condition = (float(weight),)
+        key = (condition, float(density), float(flat_plate_area), min_velocity, max_velocity, tolerance, geometry)
+        if not hasattr(self, "_optimal_speeds_cache"):
+            self._optimal_speeds_cache = {}
+        if key in self._optimal_speeds_cache:
+            profiling.count("optimal_speeds_cache_hits")
+            result = self._optimal_speeds_cache[key]
+        else:
+            if weight is not None:
+                self.hover(weight, density)
+            downwash_velocity_ratio = [1.0]
+            evaluations = [0]
+
+            def power(velocity):
+                performance = forward_flight_performance(velocity, density, flat_plate_area, self.hover_induced_vel, self.hover_power_induced,
+                                                         self.cd_mean, self.r, self.omega, self.num_blades, self.chord,
+                                                         downwash_velocity_ratio[0], 1e-9, 1000)
+                downwash_velocity_ratio[0] = performance["downwash_velocity_ratio"]
+                evaluations[0] += 1
+                return performance["power_total"]
+
+            options = {"xatol": tolerance}
+            min_power = minimize_scalar(power, bounds=(min_velocity, max_velocity), method="bounded", options=options)
+            best_range = minimize_scalar(lambda velocity: power(velocity) / velocity, bounds=(min_velocity, max_velocity),
+                                         method="bounded", options=options)
+            profiling.count("optimal_speed_evaluations", evaluations[0])
+            result = {"velocity_min_power": float(min_power.x), "power_min_power": float(min_power.fun), "velocity_best_range": float(best_range.x),
+                      "power_best_range": float(best_range.fun * best_range.x), "evaluations": evaluations[0]}
+            self._optimal_speeds_cache[key] = result
+
+        self.velocity_min_power = result["velocity_min_power"]
+        self.velocity_best_range = result["velocity_best_range"]
+        print(f"Minimum Power Speed: {self.velocity_min_power}[m/s] | Best Range Speed: {self.velocity_best_range}[m/s]")
+        return dict(result)
+
+    @profiling.instrument("sensitivities", "sensitivity_stats")
+    def sensitivities(self, parameters=("chord", "washout", "rotor_diameter", "tip_speed_mach"), weight=None, density=1.225, velocity=None,
+                      flat_plate_area=3.5, n=10, method="central", step=None, workers=0):
+        """
+        Calculates the finite difference Jacobian of the hover and forward flight outputs with respect to geometry and flight parameters.
+        The derivatives are taken at the hover collective pitch, which is held fixed: the collective found by 'hover' is a 0.5° step and
+        doesn't change smoothly with the parameters. Every perturbed inflow iteration is warm-started from the converged baseline
+        inflow, so a perturbed solve takes a few iterations at one collective instead of a full collective sweep.
+
+        Parameters
+        ----------
+        parameters : tuple
+            Differentiated parameters. Geometry: 'num_blades', 'chord', 'rotor_diameter', 'tip_speed_mach', 'washout', 'rotor_root_cutout'.
+            Flight: 'density', and with a velocity 'velocity' and 'flat_plate_area'. The polar is not regenerated for geometry changes.
+        weight : int [kg]
+            Weight to find the hover collective for. The collective of the last 'hover' call is used if not given.
+        density : float [kg/m3]
+            Density of air.
+        velocity : float [m/s]
+            Level forward flight velocity. Only the hover outputs are differentiated if not given.
+        flat_plate_area : float [m2]
+            Equivalent flat plate area of the aircraft body.
+        n : int
+            Blade element theory resolution of the hover solved here. The derivatives are taken on the element grid of the last
+            'hover', e.g. a cosine spaced or adapted one, which 'rotor_root_cutout' perturbations stretch onto the perturbed span.
+        method : str
+            'forward' (N perturbed solves) or 'central' (2N perturbed solves, more accurate) differences.
+        step : float
+            Relative step size. Chosen from the solver accuracy if not given: its square root for forward and its cube root
+            for central differences, scaled by max(|parameter|, 1).
+        workers : int
+            Worker processes for the perturbed solves. 0 or 1 solve them in this process, None uses one per CPU.
+
+        Returns
+        -------
+        dict
+            Derivatives as {output: {parameter: derivative}}. They are also stored in 'jacobian' (outputs x parameters) with the
+            labels in 'jacobian_outputs' and 'jacobian_parameters'.
+        """
+        if method not in ("forward", "central"):
+            raise ValueError(f"Unknown finite difference method '{method}'. Use 'forward' or 'central'.")
+        flight = ("density", "velocity", "flat_plate_area") if velocity is not None else ("density",)
+        for parameter in parameters:
+            if parameter not in SENSITIVITY_GEOMETRY + flight:
+                raise ValueError(f"Cannot differentiate with respect to '{parameter}'. Use one of {SENSITIVITY_GEOMETRY + flight}.")
+        if weight is not None or not self.is_hovered:
+            self.hover(13000 if weight is None else weight, density, n)
+
+        print("\nCalculating Sensitivities...")
+        conditions = {"density": density, "velocity": velocity, "flat_plate_area": flat_plate_area}
+        edges = self.element_edges # The grid the baseline collective was found on.
+        baseline, iterations = _sensitivity_solution((self, conditions, self.theta, edges, self.induced_vel))
+        profiling.count("inner_iterations", iterations)
+        outputs = SENSITIVITY_OUTPUTS + (SENSITIVITY_FLIGHT_OUTPUTS if velocity is not None else ())
+
+        noise = max(np.finfo(float).eps, SENSITIVITY_TOLERANCE / np.linalg.norm(baseline["induced_vel"]))
+        relative_step = step if step is not None else noise**(1/2 if method == "forward" else 1/3)
+        signs = (1,) if method == "forward" else (1, -1)
+        steps, tasks = [], []
+        for parameter in parameters:
+            value = float(getattr(self, parameter) if parameter in SENSITIVITY_GEOMETRY else conditions[parameter])
+            steps.append(relative_step * max(abs(value), 1))
+            for sign in signs:
+                rotor, perturbed, perturbed_edges = copy.copy(self), dict(conditions), edges
+                if parameter in SENSITIVITY_GEOMETRY:
+                    setattr(rotor, parameter, value + sign * steps[-1])
+                    rotor._update_geometry()
+                else:
+                    perturbed[parameter] = value + sign * steps[-1]
+                if parameter == "rotor_root_cutout" and edges[0] == value:
+                    # Grids spanning the blade from the root cutout (cosine and adapted ones) are stretched onto the perturbed span.
+                    perturbed_edges = rotor.rotor_root_cutout + (edges - value) * (1 - rotor.rotor_root_cutout) / (1 - value)
+                tasks.append((rotor, perturbed, self.theta, perturbed_edges, baseline["induced_vel"]))
+
+        workers = os.cpu_count() if workers is None else workers
+        if workers <= 1:
+            solutions = [_sensitivity_solution(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(workers) as executor:
+                solutions = list(executor.map(_sensitivity_solution, tasks))
+        profiling.count("inner_iterations", sum(iterations for _, iterations in solutions))
+
+        self.jacobian = np.zeros((len(outputs), len(parameters)))
+        for j, h in enumerate(steps):
+            for i, output in enumerate(outputs):
+                if method == "forward":
+                    self.jacobian[i, j] = (solutions[j][0][output] - baseline[output]) / h
+                else:
+                    self.jacobian[i, j] = (solutions[2*j][0][output] - solutions[2*j + 1][0][output]) / (2 * h)
+        self.jacobian_outputs, self.jacobian_parameters = outputs, tuple(parameters)
+        return {output: dict(zip(parameters, row)) for output, row in zip(outputs, self.jacobian)}
 
     def plot(self):
         print("\nPlot debug.")
         print("Ct/sigma:", self.ct / self.solidity)
         
-class Engine():
-    def __init__(self, sfc, test_wg, test_shp, test_wf):
-        self.sfc = sfc
-        pass
+SENSITIVITY_GEOMETRY = ("num_blades", "chord", "rotor_diameter", "tip_speed_mach", "washout", "rotor_root_cutout")
+SENSITIVITY_OUTPUTS = ("hover_thrust", "hover_power_induced", "hover_power_profile", "hover_power_total", "ct", "cp", "merit")
+SENSITIVITY_FLIGHT_OUTPUTS = ("power_induced", "power_profile", "power_parasite", "power_total")
+SENSITIVITY_TOLERANCE = 1e-13 # Inflow iteration tolerance[m/s] of the sensitivity solves.
+SENSITIVITY_MAX_ITERATIONS = 100
+
+def _sensitivity_solution(task):
+    """Solves a rotor at a fixed collective from an initial inflow. Runs in the worker processes of 'Rotor.sensitivities'."""
+    rotor, conditions, theta, edges, initial = task
+    kernel = rotor._hover_kernel(len(edges) - 1, edges)
+    # The inflow iteration can settle on a period two cycle instead of a fixed point. Iterating the two step map keeps the
+    # perturbed solution on the same branch of the cycle as the baseline.
+    previous = np.array(initial, dtype=float)
+    for iterations in range(2, SENSITIVITY_MAX_ITERATIONS + 1, 2):
+        kernel.solve(theta, previous, 2, SENSITIVITY_TOLERANCE)
+        if np.linalg.norm(kernel.induced_vel - previous) <= SENSITIVITY_TOLERANCE:
+            break
+        previous = kernel.induced_vel.copy()
+    element_width = np.diff(edges) * rotor.r
+    thrust = rotor._kernel_thrust(kernel, element_width, conditions["density"])
+    outputs = hover_performance(thrust, conditions["density"], rotor.r, rotor.omega, rotor.num_blades, rotor.chord, rotor.solidity,
+                                rotor.rotor_disk_area, rotor.polar.get_cl_slope())
+    outputs.update(hover_thrust=thrust, induced_vel=kernel.induced_vel.copy())
+    if conditions["velocity"] is not None:
+        outputs.update(forward_flight_performance(conditions["velocity"], conditions["density"], conditions["flat_plate_area"],
+                                                  np.average(kernel.induced_vel, weights=element_width), outputs["hover_power_induced"], outputs["cd_mean"],
+                                                  rotor.r, rotor.omega, rotor.num_blades, rotor.chord))
+    return outputs, iterations
 
 class Body():
     def __init__(self, dry_weight, fuel_capacity, flat_plate_area):
@@ -253,12 +979,214 @@ class Body():
         self.fuel_capacity = fuel_capacity
         self.fpa = flat_plate_area
 
+COAXIAL_INTERFERENCE = 1.16 # Induced power factor of a coaxial pair with equal thrusts, measured. Leishman, Principles of Helicopter Aerodynamics, 2006, pg.107.
+
 class Copter():
-    def __init__(self):
-        pass
+    """
+    An aircraft of several rotors: a single main rotor with a tail rotor, a coaxial pair, a tandem or a multicopter. The lifting rotors
+    share the weight and their induced powers are multiplied by interference factors. A tail rotor balances the torque of the lifting
+    rotors from its arm. All lifting rotors are solved together with the batched hover solver, once per distinct polar and once per
+    distinct geometry and thrust, so identical rotors cost one solve. The rotors themselves are not modified.
+
+    Methods
+    -------
+    single_main_rotor(main: Rotor, tail: Rotor, tail_arm: float) -> Copter
+        Main rotor with an anti-torque tail rotor.
+    coaxial(rotor: Rotor, interference: float) -> Copter
+        Two identical counter-rotating rotors on one shaft.
+    tandem(rotor: Rotor, separation: float) -> Copter
+        Two identical counter-rotating rotors, possibly overlapping.
+    multicopter(rotor: Rotor, arms: int, interference: float) -> Copter
+        Identical rotors on 'arms' arms, balanced in pairs.
+    hover(weight: int, density: float, n: int) -> None
+        Calculates the hover powers of all rotors and stores them in class variables.
+    forward_flight(velocity: float or ndarray, density: float, flat_plate_area: float) -> None
+        Calculates the level forward flight powers. Function 'hover' must be called before.
+    """
+    def __init__(self, rotors, thrust_shares=None, interference=1.0, tail_rotor=None, tail_arm=None, n=10):
+        """
+        Parameters
+        ----------
+        rotors : list
+            Lifting 'Rotor' objects. The same object may be listed several times for identical rotors.
+        thrust_shares : list
+            Ratio of the weight lifted by each rotor. Equal shares if not given.
+        interference : float or list
+            Induced power factor of each lifting rotor due to the other rotors.
+        tail_rotor : Rotor
+            Anti-torque rotor. Its thrust balances the torque of the lifting rotors, which must then turn the same way.
+        tail_arm : float [m]
+            Distance from the lifting rotor shaft to the tail rotor shaft.
+        n : int
+            Blade element theory resolution.
+        """
+        self.rotors = list(rotors)
+        if not self.rotors:
+            raise ValueError("A copter needs at least one lifting rotor.")
+        shares = np.ones(len(self.rotors)) if thrust_shares is None else np.asarray(thrust_shares, dtype=float)
+        if shares.shape != (len(self.rotors),) or np.any(shares <= 0):
+            raise ValueError("Thrust shares must be positive, one per lifting rotor.")
+        self.thrust_shares = shares / shares.sum()
+        self.interference = np.broadcast_to(np.asarray(interference, dtype=float), (len(self.rotors),)).copy()
+        if (tail_rotor is None) != (tail_arm is None):
+            raise ValueError("A tail rotor needs its arm, and an arm needs a tail rotor.")
+        self.tail_rotor = tail_rotor
+        self.tail_arm = tail_arm
+        self.n = n
+        self.is_hovered = False
+
+    @classmethod
+    def single_main_rotor(cls, main, tail=None, tail_arm=None):
+        """
+        Returns a single main rotor helicopter. Without a tail rotor, a typical one is sized from the main rotor: 0.18 of its diameter,
+        three blades of half its chord, its tip speed and polar, and an arm of 0.6 main rotor diameters.
+        """
+        if tail is None:
+            tail = Rotor(main.airfoil, 3, main.chord / 2, 0.18 * main.rotor_diameter, main.tip_speed_mach, 0, 0.1, polar=main.polar,
+                         backend=main.backend)
+        return cls([main], tail_rotor=tail, tail_arm=0.6 * main.rotor_diameter if tail_arm is None else tail_arm)
+
+    @classmethod
+    def coaxial(cls, rotor, interference=COAXIAL_INTERFERENCE):
+        return cls([rotor, rotor], interference=interference)
+
+    @classmethod
+    def tandem(cls, rotor, separation=None):
+        """
+        Returns a tandem of two rotors whose shafts are 'separation'[m] apart, 1.3 rotor radii if not given. The interference of the
+        overlapping disks follows momentum theory: the pair acts as one disk of the combined area, sqrt(2A / (2A - A_overlap)).
+        """
+        separation = 1.3 * rotor.r if separation is None else separation
+        ratio = min(separation / (2 * rotor.r), 1)
+        overlap = 2 * rotor.r**2 * (np.arccos(ratio) - ratio * np.sqrt(1 - ratio**2)) # Lens shaped overlap area of the two disks.
+        area = np.pi * rotor.r**2
+        return cls([rotor, rotor], interference=np.sqrt(2 * area / (2 * area - overlap)))
+
+    @classmethod
+    def multicopter(cls, rotor, arms=4, interference=1.0):
+        return cls([rotor] * arms, interference=interference)
+
+    def _solve_hover(self, rotors, weights, density):
+        """
+        Returns the batched hover results of rotors lifting 'weights', as a dictionary of arrays with one entry per rotor. Rotors with
+        chord or twist distributions are solved with their element sections.
+        """
+        fields = ("theta", "hover_thrust", "hover_induced_vel", "hover_power_induced", "hover_power_profile", "cd_mean", "r", "omega")
+        geometry = ("num_blades", "chord", "rotor_diameter", "tip_speed_mach", "washout", "rotor_root_cutout")
+        results = {field: np.empty(len(rotors)) for field in fields}
+        x = (np.arange(self.n) + 0.5) / self.n # Element centers of the batched grid [r/R].
+        polars = {}
+        for i, rotor in enumerate(rotors):
+            polars.setdefault(id(rotor.polar), []).append(i)
+        for indices in polars.values():
+            polar = rotors[indices[0]].polar
+            rows = np.array([[getattr(rotors[i], name) for name in geometry] + [weights[i], rotors[i].speed_of_sound] for i in indices], dtype=float)
+            distributed = any(rotors[i].twist_distribution is not None or rotors[i].chord_distribution is not None for i in indices)
+            if distributed:
+                rows = np.hstack([rows, [np.concatenate(rotors[i].blade_sections(x)) for i in indices]])
+            unique, inverse = np.unique(rows, axis=0, return_inverse=True) # Identical rotors lifting the same weight are solved once.
+            for speed_of_sound in np.unique(unique[:, 7]):
+                selected = np.flatnonzero(unique[:, 7] == speed_of_sound)
+                sections = {"element_twist": unique[selected, 8:8 + self.n], "element_chord": unique[selected, 8 + self.n:]} if distributed else {}
+                hover = hover_batch(polar, *unique[selected, :6].T, unique[selected, 6], density, self.n, speed_of_sound, **sections)
+                for j, row in enumerate(selected):
+                    targets = np.array(indices)[inverse.reshape(-1) == row]
+                    for field in fields:
+                        results[field][targets] = getattr(hover, field)[j]
+        return results
+
+    def hover(self, weight=13000, density=1.225, n=None):
+        """
+        Calculates the hover of all rotors. Sets the per rotor arrays 'rotor_theta', 'rotor_thrust', 'rotor_power_induced' (with
+        interference) and 'rotor_power_profile', and the totals 'hover_power_main', 'hover_power_tail', 'hover_power_total',
+        'hover_tail_thrust' and 'hover_tail_rotor_factor' (total over lifting rotor power).
+
+        Parameters
+        ----------
+        weight : int [kg]
+            Weight of the entire aircraft.
+        density : float [kg/m3]
+            Density of air.
+        n : int
+            Blade element theory resolution. The one of the copter if not given.
+        """
+        self.n = self.n if n is None else n
+        self.weight = weight
+        self.density = density
+        lifting = self._solve_hover(self.rotors, weight * self.thrust_shares, density)
+        self._lifting = lifting
+        self.rotor_theta = lifting["theta"]
+        self.rotor_thrust = lifting["hover_thrust"]
+        self.rotor_power_induced = self.interference * lifting["hover_power_induced"]
+        self.rotor_power_profile = lifting["hover_power_profile"]
+        self.hover_power_main = np.sum(self.rotor_power_induced + self.rotor_power_profile)
+        self.hover_tail_thrust, self.hover_power_tail = self._tail(self.rotor_power_induced + self.rotor_power_profile)
+        self.hover_power_total = self.hover_power_main + self.hover_power_tail
+        self.hover_tail_rotor_factor = self.hover_power_total / self.hover_power_main
+        self.is_hovered = True
+        print(f"Copter Hover | SHP Main: {self.hover_power_main*0.00134102209} | SHP Tail: {self.hover_power_tail*0.00134102209} | Tail Rotor Factor: {self.hover_tail_rotor_factor}")
+
+    def _tail(self, rotor_powers, velocity=None, density=None):
+        """Returns the tail rotor thrust[N] and power[W] balancing the torque of the lifting rotors, in hover or at a velocity."""
+        if self.tail_rotor is None:
+            zero = np.zeros(np.shape(velocity)) if velocity is not None else 0.0
+            return zero, zero
+        omega = self._lifting["omega"]
+        torque = np.sum(rotor_powers / (omega[:, None] if np.ndim(rotor_powers) == 2 else omega), axis=0)
+        thrust = np.atleast_1d(torque / self.tail_arm)
+        tail = self._solve_hover([self.tail_rotor] * thrust.size, thrust / 9.81, self.density if density is None else density)
+        power = tail["hover_power_induced"] + tail["hover_power_profile"]
+        if velocity is not None:
+            power = forward_flight_performance(velocity, density, 0, tail["hover_induced_vel"], tail["hover_power_induced"], tail["cd_mean"],
+                                               tail["r"], tail["omega"], self.tail_rotor.num_blades, self.tail_rotor.chord,
+                                               exact_wald=True)["power_total"]
+        return (thrust, power) if np.ndim(torque) else (thrust[0], power[0])
+
+    def forward_flight(self, velocity, density=1.225, flat_plate_area=3.5):
+        """
+        Calculates the level forward flight of all rotors with the model of 'Rotor.forward_flight'. The lifting rotors share one body
+        drag; the tail rotor is re-trimmed to the torque at each velocity. Function 'hover' must be called before.
+
+        Sets 'power_induced' (with interference), 'power_profile', 'power_parasite', 'power_main', 'power_tail', 'power_total',
+        'horsepower_total', 'tail_thrust', 'tail_rotor_factor' and 'ld', with the shape of 'velocity'.
+
+        Parameters
+        ----------
+        velocity : float or ndarray [m/s]
+            Level forward flight velocities, solved together.
+        density : float [kg/m3]
+            Density of air.
+        flat_plate_area : float [m2]
+            Equivalent flat plate area of the aircraft body.
+        """
+        if not self.is_hovered:
+            print("Running hover calculations for the copter first...")
+            self.hover()
+        lifting = self._lifting
+        column = lambda values: np.asarray(values)[:, None]
+        velocities = np.atleast_1d(np.asarray(velocity, dtype=float))
+        flight = forward_flight_performance(velocities[None, :], density, 0, column(lifting["hover_induced_vel"]), column(lifting["hover_power_induced"]),
+                                            column(lifting["cd_mean"]), column(lifting["r"]), column(lifting["omega"]),
+                                            column([rotor.num_blades for rotor in self.rotors]), column([rotor.chord for rotor in self.rotors]),
+                                            exact_wald=True)
+        interference = column(self.interference)
+        rotor_powers = interference * flight["power_induced"] + flight["power_profile"]
+        body_drag = density * velocities**2 * flat_plate_area / 2
+        self.power_parasite = body_drag * velocities
+        rotor_powers = rotor_powers + self.power_parasite * column(self.thrust_shares) # The rotors propel the body in their shares.
+        self.power_induced = np.sum(interference * flight["power_induced"], axis=0)
+        self.power_profile = np.sum(flight["power_profile"], axis=0)
+        self.power_main = np.sum(rotor_powers, axis=0)
+        self.tail_thrust, self.power_tail = self._tail(rotor_powers, velocities, density)
+        self.power_total = self.power_main + self.power_tail
+        self.tail_rotor_factor = self.power_total / self.power_main
+        self.ld = np.sum(lifting["hover_thrust"]) / (np.sum(interference * flight["drag_induced"] + flight["drag_profile"], axis=0) + body_drag)
+        self.horsepower_total = self.power_total * 0.00134102209
+        if np.ndim(velocity) == 0:
+            for name in ("power_parasite", "power_induced", "power_profile", "power_main", "tail_thrust", "power_tail", "power_total",
+                         "tail_rotor_factor", "ld", "horsepower_total"):
+                setattr(self, name, getattr(self, name)[0])
 
-        
-    
 class RotorImperial(Rotor):
     def __init__(self, a):
         pass
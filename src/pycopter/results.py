@@ -0,0 +1,248 @@
+"""
+Result sinks that sweeps and batch runs stream their records into. Records are dictionaries with a fixed set of fields,
+buffered in memory and appended to the file every 'buffer_size' records, so a crashed run loses at most one buffer.
+A sink opened with resume=True reads the keys of the records already written, so an interrupted sweep can skip them.
+
+Formats: JSON lines (.jsonl), CSV (.csv) and Parquet (.parquet, requires pyarrow). A Parquet sink is a directory of
+part files, one per flushed buffer, because a Parquet file is unreadable until it is closed.
+"""
+
+import json
+import csv
+import os
+import numpy as np
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+def result_fields(result):
+    """
+    Returns the field names of a result object: the keys of a dictionary, or the per-candidate (1-D) arrays of a
+    'BatchHoverResult'. 2-D arrays like 'induced_vel' are left out.
+    """
+    values = result.as_dict() if hasattr(result, "as_dict") else result
+    return tuple(name for name, value in values.items() if np.ndim(value) <= 1)
+
+def result_records(result, fields=None):
+    """Yields one record dictionary per candidate of a 'BatchHoverResult' or a dictionary of equal length arrays."""
+    values = result.as_dict() if hasattr(result, "as_dict") else result
+    fields = result_fields(values) if fields is None else tuple(fields)
+    length = max(np.size(values[field]) for field in fields)
+    columns = [np.broadcast_to(values[field], (length,)) for field in fields]
+    for row in zip(*columns):
+        yield dict(zip(fields, row))
+
+def _plain(value):
+    """Converts NumPy scalars to Python ones so that they can be serialized."""
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+def _complete_lines(path):
+    """Returns the lines of a text file. A last line without a line break was cut off by a crash and is truncated from the file."""
+    with open(path, "rb") as file:
+        data = file.read()
+    complete = data[:data.rfind(b"\n") + 1]
+    if len(complete) != len(data):
+        with open(path, "r+b") as file:
+            file.truncate(len(complete))
+    return complete.decode().splitlines()
+
+
+class ResultSink():
+    """
+    Base class of the result sinks. Subclasses implement '_read_records' and '_write_records'.
+
+    Methods
+    -------
+    write(record: dict) -> None
+        Buffers a record. The buffer is written when it holds 'buffer_size' records.
+    write_many(records: iterable) -> None
+        Buffers several records.
+    has(record_or_key) -> bool
+        Whether a record with this key was already written or buffered.
+    flush() -> None
+        Writes the buffered records to the file.
+    close() -> None
+        Flushes and closes the sink.
+    """
+    def __init__(self, path, fields, key=None, buffer_size=1000, resume=False):
+        """
+        Parameters
+        ----------
+        path : str
+            Output file.
+        fields : tuple
+            Field names of the records. Records with other fields are rejected, missing fields are written empty.
+        key : tuple
+            Fields that identify a record, e.g. ('weight', 'density', 'velocity'). Required for resuming.
+        buffer_size : int
+            Records kept in memory between writes.
+        resume : bool
+            Whether to append to an existing output and skip the keys it already has. The output is overwritten otherwise.
+        """
+        self.path = path
+        self.fields = tuple(fields)
+        self.key = tuple(key) if key is not None else None
+        self.buffer_size = buffer_size
+        self.count = 0
+        self.keys = set()
+        self._buffer = []
+        if self.key is not None and not set(self.key) <= set(self.fields):
+            raise ValueError(f"Key fields {self.key} must be among the fields of the sink.")
+        if resume and self.key is None:
+            raise ValueError("Resuming a sink requires key fields.")
+
+        existing = resume and os.path.exists(path)
+        if existing:
+            for record in self._read_records():
+                self.keys.add(self._record_key(record))
+                self.count += 1
+        self._open(append=existing)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def _record_key(self, record):
+        return tuple(float(record[field]) if record[field] is not None else None for field in self.key)
+
+    def has(self, record_or_key):
+        if self.key is None:
+            return False
+        key = self._record_key(record_or_key) if isinstance(record_or_key, dict) else tuple(None if value is None else float(value)
+                                                                                                  for value in record_or_key)
+        return key in self.keys
+
+    def write(self, record):
+        unknown = set(record) - set(self.fields)
+        if unknown:
+            raise ValueError(f"Fields {sorted(unknown)} are not in the schema of the sink.")
+        record = {field: _plain(record.get(field)) for field in self.fields}
+        if self.key is not None:
+            self.keys.add(self._record_key(record))
+        self._buffer.append(record)
+        self.count += 1
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        if self._buffer:
+            self._write_records(self._buffer)
+            self._buffer = []
+
+    def close(self):
+        self.flush()
+        self._close()
+
+    def _open(self, append):
+        pass
+
+    def _close(self):
+        pass
+
+
+class JsonLinesSink(ResultSink):
+    """Writes one JSON object per line. A line cut off by a crash is dropped when resuming."""
+    def _read_records(self):
+        for line in _complete_lines(self.path):
+            if line.strip():
+                yield json.loads(line)
+
+    def _open(self, append):
+        self._file = open(self.path, "a" if append else "w")
+
+    def _write_records(self, records):
+        self._file.write("".join(json.dumps(record) + "\n" for record in records))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _close(self):
+        self._file.close()
+
+
+class CsvSink(ResultSink):
+    """Writes a CSV file with a header row. Empty cells are missing values. A row cut off by a crash is dropped when resuming."""
+    def _read_records(self):
+        rows = csv.reader(_complete_lines(self.path))
+        header = next(rows, None)
+        if header is not None and tuple(header) != self.fields:
+            raise ValueError(f"Fields of '{self.path}' don't match the schema of the sink.")
+        for row in rows:
+            yield {field: (float(value) if value != "" else None) for field, value in zip(self.fields, row)}
+
+    def _open(self, append):
+        has_header = append and os.path.getsize(self.path) > 0
+        self._file = open(self.path, "a" if append else "w", newline="")
+        self._writer = csv.writer(self._file, lineterminator="\n")
+        if not has_header:
+            self._writer.writerow(self.fields)
+
+    def _write_records(self, records):
+        self._writer.writerows([("" if record[field] is None else repr(record[field]) if isinstance(record[field], float) else record[field])
+                                for field in self.fields] for record in records)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _close(self):
+        self._file.close()
+
+
+class ParquetSink(ResultSink):
+    """Writes a directory of Parquet part files, one per flushed buffer. Requires pyarrow."""
+    def __init__(self, path, fields, key=None, buffer_size=10000, resume=False):
+        if pyarrow is None:
+            raise ImportError("Parquet sinks require the pyarrow package. Install it or use a '.jsonl' or '.csv' output.")
+        super().__init__(path, fields, key, buffer_size, resume)
+
+    def _parts(self):
+        return sorted(name for name in os.listdir(self.path) if name.startswith("part-") and name.endswith(".parquet"))
+
+    def _read_records(self):
+        for name in self._parts():
+            try:
+                table = pyarrow.parquet.read_table(os.path.join(self.path, name))
+            except (OSError, pyarrow.ArrowInvalid): # Part file cut off by a crash.
+                os.remove(os.path.join(self.path, name))
+                continue
+            yield from table.to_pylist()
+
+    def _open(self, append):
+        os.makedirs(self.path, exist_ok=True)
+        if not append:
+            for name in self._parts():
+                os.remove(os.path.join(self.path, name))
+        self._part = int(self._parts()[-1][5:-8]) + 1 if self._parts() else 0
+
+    def _write_records(self, records):
+        table = pyarrow.table({field: [record[field] for record in records] for field in self.fields})
+        name = os.path.join(self.path, f"part-{self._part:05d}.parquet")
+        pyarrow.parquet.write_table(table, name + ".tmp")
+        os.replace(name + ".tmp", name) # Part files appear complete or not at all.
+        self._part += 1
+
+
+SINKS = {".jsonl": JsonLinesSink, ".ndjson": JsonLinesSink, ".csv": CsvSink, ".parquet": ParquetSink}
+
+def open_sink(path, fields, key=None, buffer_size=1000, resume=False):
+    """
+    Opens the result sink for the file extension of 'path': '.jsonl'/'.ndjson', '.csv' or '.parquet'.
+    See 'ResultSink' for the parameters.
+    """
+    extension = os.path.splitext(path.rstrip("/\\"))[1].lower()
+    if extension not in SINKS:
+        raise ValueError(f"Unknown result format '{extension}'. Use one of {tuple(SINKS)}.")
+    return SINKS[extension](path, fields, key, buffer_size, resume)
@@ -0,0 +1,280 @@
+"""
+Local HTTP/JSON job server for rotor computations, built on asyncio streams.
+
+POST /evaluate takes a configuration with the keys of the GUI preset files ('airfoil', 'num_blades', 'chord', 'rotor_diam',
+'tip_speed_mach', 'washout', 'root_cutout', 'gross', 'density', 'transmission_loss', 'fuel_cap', 'sfc', 'velocity'[km/h], 'fpa')
+and answers the hover results, and the forward flight and range results when the velocity and fuel are given.
+GET /status answers the request counters.
+
+Computations run in a process pool. Rotors and their polars are pooled in the workers by a 'RotorFactory',
+results are cached in the server by the hash of the whole configuration, and identical requests arriving while one is being
+computed wait for the same computation.
+
+Run with 'python -m pycopter.server --port 8000'.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from collections import OrderedDict
+import contextlib
+import argparse
+import hashlib
+import asyncio
+import json
+import io
+
+from .factory import RotorFactory
+from .batch import range_endurance
+
+ROTOR_KEYS = {"airfoil": "airfoil", "num_blades": "num_blades", "chord": "chord", "rotor_diam": "rotor_diameter",
+              "tip_speed_mach": "tip_speed_mach", "washout": "washout", "root_cutout": "rotor_root_cutout"}
+DEFAULTS = {"airfoil": "naca23012", "num_blades": 5, "chord": 0.52, "rotor_diam": 21.29, "tip_speed_mach": 0.624, "washout": -8,
+            "root_cutout": 0.01, "gross": 13000, "density": 1.225, "transmission_loss": 0.1, "fuel_cap": None, "sfc": None,
+            "velocity": None, "fpa": 3.5} # Mil Mi-8, as the 'Rotor' defaults.
+IGNORED_KEYS = ("output", "battery_cap") # GUI preset keys without a computation here.
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+                500: "Internal Server Error"}
+MAX_BODY = 1 << 20
+
+
+def normalize_config(config):
+    """
+    Returns the configuration completed with the defaults, without the ignored GUI keys. Raises ValueError for unknown keys
+    and for values of the wrong type.
+    """
+    if not isinstance(config, dict):
+        raise ValueError("Configuration must be a JSON object.")
+    unknown = set(config) - set(DEFAULTS) - set(IGNORED_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown configuration keys {sorted(unknown)}. Use the keys of the preset files: {sorted(DEFAULTS)}.")
+    normalized = dict(DEFAULTS)
+    normalized.update({key: value for key, value in config.items() if key in DEFAULTS})
+    for key, value in normalized.items():
+        if key == "airfoil":
+            if not isinstance(value, str):
+                raise ValueError("'airfoil' must be a string, e.g. 'naca0012'.")
+            normalized[key] = value.lower()
+        elif value is not None:
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"'{key}' must be a number.")
+            normalized[key] = int(value) if key == "num_blades" else float(value)
+    return normalized
+
+def config_hash(config):
+    """Returns the hash of a normalized configuration."""
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+
+_factory = RotorFactory(max_rotors=16, quiet=True)
+
+def _rotor(config):
+    """Returns the rotor of a configuration from the rotor pool of this process."""
+    return _factory.get(**{ROTOR_KEYS[name]: config[name] for name in ROTOR_KEYS})
+
+def evaluate(config):
+    """
+    Computes the results of a normalized configuration. Runs in the worker processes.
+
+    Returns
+    -------
+    dict
+        'hover', and with a velocity 'forward_flight', and with the fuel capacity and sfc 'range'. Powers in [W].
+    """
+    with contextlib.redirect_stdout(io.StringIO()): # Rotor reports its progress with prints.
+        rotor = _rotor(config)
+        rotor.hover(config["gross"], config["density"])
+        results = {"hover": {"theta": rotor.theta, "thrust": rotor.hover_thrust, "induced_velocity": rotor.hover_induced_vel,
+                             "power_induced": rotor.hover_power_induced, "power_profile": rotor.hover_power_profile,
+                             "power_total": rotor.hover_power_total, "ct": rotor.ct, "cp": rotor.cp, "merit": rotor.merit,
+                             "merit_max": rotor.merit_max}}
+        if config["velocity"] is not None:
+            rotor.forward_flight(config["velocity"] / 3.6, config["density"], config["fpa"])
+            ld = rotor.hover_thrust / (rotor.drag_induced + rotor.drag_profile + rotor.body_drag)
+            results["forward_flight"] = {"power_induced": rotor.power_induced, "power_profile": rotor.power_profile,
+                                         "power_parasite": rotor.power_parasite, "power_total": rotor.power_total, "ld": ld}
+            if config["fuel_cap"] is not None and config["sfc"] is not None:
+                breguet_range, endurance = range_endurance(rotor.power_total, ld, config["gross"], config["fuel_cap"], config["sfc"],
+                                                           config["transmission_loss"])
+                results["range"] = {"range": breguet_range, "endurance": endurance}
+    return json.loads(json.dumps(results, default=float)) # NumPy scalars to plain numbers.
+
+
+class RotorServer():
+    """
+    Asyncio HTTP/JSON server for rotor computations. See the module documentation for the API.
+
+    Methods
+    -------
+    start() -> None
+        Binds the server and starts accepting connections. Coroutine.
+    stop() -> None
+        Closes the server and its worker pool. Coroutine.
+    submit(config: dict) -> dict
+        Computes a configuration through the caches, as a request would. Coroutine.
+    """
+    def __init__(self, host="127.0.0.1", port=8000, workers=None, cache_size=1024):
+        """
+        Parameters
+        ----------
+        host : str
+            Interface to listen on. The server has no authentication; keep it local.
+        port : int
+            Port to listen on. 0 picks a free port, see 'port' after 'start'.
+        workers : int
+            Worker processes. 0 computes in a thread of this process, None uses one process per CPU.
+        cache_size : int
+            Results kept in the result cache.
+        """
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.cache_size = cache_size
+        self.stats = {"requests": 0, "computed": 0, "cache_hits": 0, "coalesced": 0, "errors": 0}
+        self._results = OrderedDict()
+        self._in_flight = {}
+        self._server = None
+        self._executor = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def start(self):
+        self._executor = ThreadPoolExecutor(1) if self.workers == 0 else ProcessPoolExecutor(self.workers)
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def submit(self, config):
+        config = normalize_config(config)
+        key = config_hash(config)
+        if key in self._results:
+            self.stats["cache_hits"] += 1
+            self._results.move_to_end(key)
+            return self._results[key]
+        if key in self._in_flight:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(self._in_flight[key])
+
+        future = asyncio.get_running_loop().run_in_executor(self._executor, evaluate, config)
+        self._in_flight[key] = future
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            del self._in_flight[key]
+        self.stats["computed"] += 1
+        self._results[key] = result
+        if len(self._results) > self.cache_size:
+            self._results.popitem(last=False)
+        return result
+
+    async def _handle(self, reader, writer):
+        """Serves one HTTP request per connection."""
+        try:
+            status, payload = await self._respond(reader)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        body = json.dumps(payload).encode()
+        writer.write(f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def _respond(self, reader):
+        """Parses a request and returns the status code and the JSON payload of the answer."""
+        request_line = (await reader.readline()).decode("latin-1").split()
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if len(request_line) != 3:
+            return 400, {"error": "Malformed request line."}
+        method, path = request_line[0], request_line[1].split("?")[0]
+        self.stats["requests"] += 1
+
+        if path == "/status":
+            if method != "GET":
+                return 405, {"error": "Use GET for /status."}
+            return 200, dict(self.stats, in_flight=len(self._in_flight), cached=len(self._results))
+        if path != "/evaluate":
+            return 404, {"error": f"Unknown path '{path}'. Use POST /evaluate or GET /status."}
+        if method != "POST":
+            return 405, {"error": "Use POST for /evaluate."}
+
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY:
+            return 413, {"error": "Request body is too large."}
+        try:
+            config = json.loads(await reader.readexactly(length) or b"{}")
+            return 200, await self.submit(config)
+        except (ValueError, TypeError) as error: # Includes JSON decode errors.
+            self.stats["errors"] += 1
+            return 400, {"error": str(error)}
+        except Exception as error:
+            self.stats["errors"] += 1
+            return 500, {"error": f"{type(error).__name__}: {error}"}
+
+
+async def request(host, port, method, path, payload=None):
+    """
+    Minimal HTTP/JSON client for the server.
+
+    Returns
+    -------
+    int, dict
+        Status code and the decoded JSON answer.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}:{port}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    answer = json.loads(await reader.readexactly(length))
+    writer.close()
+    await writer.wait_closed()
+    return status, answer
+
+async def serve(host="127.0.0.1", port=8000, workers=None):
+    """Runs the server until it is cancelled."""
+    async with RotorServer(host, port, workers) as server:
+        print(f"Serving pycopter on http://{server.host}:{server.port}")
+        await asyncio.Event().wait()
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON server for pycopter rotor computations.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None)
+    arguments = parser.parse_args()
+    try:
+        asyncio.run(serve(arguments.host, arguments.port, arguments.workers))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,120 @@
+"""
+Hover and forward flight sweeps over weight x density x velocity grids. The grid is solved in chunks with the batched hover
+solver and the vectorized forward flight model and the records are streamed into a result sink (see pycopter.results),
+so that long sweeps can be interrupted and resumed without holding their results in memory.
+"""
+
+import numpy as np
+
+from .batch import hover_batch, forward_flight_performance
+from .results import open_sink
+
+HOVER_FIELDS = ("theta", "hover_thrust", "hover_induced_vel", "hover_power_total", "merit")
+FLIGHT_FIELDS = ("power_induced", "power_profile", "power_parasite", "power_total", "ld")
+SWEEP_FIELDS = ("weight", "density", "velocity", "flat_plate_area") + HOVER_FIELDS + FLIGHT_FIELDS
+SWEEP_KEY = ("weight", "density", "velocity")
+
+
+def solve_grid_chunk(rotor, weight, density, velocities=None, flat_plate_area=3.5, n=10):
+    """
+    Solves a chunk of (weight, density) points with the batched hover solver and the vectorized forward flight model.
+
+    Parameters
+    ----------
+    rotor : Rotor
+        Rotor geometry and polar. Chord and twist distributions are solved with their element sections.
+    weight, density : ndarray
+        Weight[kg] and density[kg/m3] of each point.
+    velocities : array_like [m/s]
+        Level forward flight velocities, solved at every point.
+    flat_plate_area : float [m2]
+    n : int
+        Blade element theory resolution.
+
+    Returns
+    -------
+    dict
+        HOVER_FIELDS arrays of shape (points,) and with velocities FLIGHT_FIELDS arrays of shape (points, velocities).
+    """
+    hover = hover_batch(rotor.polar, rotor.num_blades, rotor.chord, rotor.rotor_diameter, rotor.tip_speed_mach, rotor.washout,
+                        rotor.rotor_root_cutout, weight, density, n, rotor.speed_of_sound, **rotor.batch_sections(n))
+    solution = {field: getattr(hover, field) for field in HOVER_FIELDS}
+    if velocities is not None:
+        column = lambda values: values[:, None]
+        flight = forward_flight_performance(np.asarray(velocities, dtype=float)[None, :], column(hover.density), flat_plate_area,
+                                            column(hover.hover_induced_vel), column(hover.hover_power_induced), column(hover.cd_mean),
+                                            column(hover.r), column(hover.omega), column(hover.num_blades), column(hover.chord))
+        solution.update({field: flight[field] for field in FLIGHT_FIELDS if field in flight})
+        solution["ld"] = column(hover.hover_thrust) / (flight["drag_induced"] + flight["drag_profile"] + flight["body_drag"])
+    return solution
+
+
+def sweep_records(rotor, weights, densities, velocities=None, flat_plate_area=3.5, n=10, chunk_size=256, skip=None):
+    """
+    Yields one record per grid point of the sweep, with the fields of SWEEP_FIELDS. See 'sweep' for the parameters.
+
+    Parameters
+    ----------
+    skip : callable
+        Called with the (weight, density, velocity) key of a grid point. Points it returns True for are not solved nor yielded.
+    """
+    velocities = [None] if velocities is None else [float(velocity) for velocity in np.atleast_1d(velocities)]
+    points = [(float(weight), float(density)) for weight in np.atleast_1d(weights) for density in np.atleast_1d(densities)]
+    todo = {point: [velocity for velocity in velocities if skip is None or not skip((*point, velocity))] for point in points}
+    points = [point for point in points if todo[point]]
+
+    for start in range(0, len(points), chunk_size):
+        chunk = points[start:start + chunk_size]
+        weight, density = np.array(chunk).T
+        solution = solve_grid_chunk(rotor, weight, density, None if velocities == [None] else velocities, flat_plate_area, n)
+
+        for i, point in enumerate(chunk):
+            record = dict.fromkeys(SWEEP_FIELDS)
+            record.update(weight=point[0], density=point[1], **{field: solution[field][i] for field in HOVER_FIELDS})
+            for j, velocity in enumerate(velocities):
+                if velocity not in todo[point]:
+                    continue
+                if velocity is None:
+                    yield record
+                    continue
+                yield dict(record, velocity=velocity, flat_plate_area=flat_plate_area, **{field: solution[field][i, j] for field in FLIGHT_FIELDS})
+
+def sweep(rotor, weights, densities, velocities=None, flat_plate_area=3.5, sink=None, n=10, chunk_size=256):
+    """
+    Solves the hover, and with velocities the level forward flight, of a rotor on a weight x density x velocity grid.
+
+    Parameters
+    ----------
+    rotor : Rotor
+        Rotor geometry and polar. The rotor doesn't need to be hovered.
+    weights : array_like [kg]
+    densities : array_like [kg/m3]
+    velocities : array_like [m/s]
+        Level forward flight velocities. Only the hover is solved if not given.
+    flat_plate_area : float [m2]
+        Equivalent flat plate area of the aircraft body.
+    sink : ResultSink or str
+        Sink to stream the records into. A path opens a sink for its extension that resumes the file if it exists, skipping the
+        grid points it already has. The records are returned as a list if not given.
+    n : int
+        Blade element theory resolution.
+    chunk_size : int
+        Weight x density points solved together.
+
+    Returns
+    -------
+    list or int
+        The records, or the number of records written to the sink.
+    """
+    if sink is None:
+        return list(sweep_records(rotor, weights, densities, velocities, flat_plate_area, n, chunk_size))
+    if isinstance(sink, str):
+        with open_sink(sink, SWEEP_FIELDS, SWEEP_KEY, resume=True) as opened:
+            return sweep(rotor, weights, densities, velocities, flat_plate_area, opened, n, chunk_size)
+
+    written = 0
+    for record in sweep_records(rotor, weights, densities, velocities, flat_plate_area, n, chunk_size, sink.has):
+        sink.write(record)
+        written += 1
+    sink.flush()
+    return written
@@ -0,0 +1,204 @@
+"""
+Level forward flight trim of a rotor with the azimuth x radius blade element grid of 'pycopter.azimuth'.
+
+The trim variables are the collective θ0[°], the longitudinal cyclic θ1s[°], the forward disk tilt α[°] and the inflow ratio λ.
+They are found from four residuals: the vertical force against the weight, the horizontal force against the body drag, the
+first harmonic blade flap moment (no flapping relative to the disk) and the steady inflow of an inflow model (see
+pycopter.inflow). 'trim_loads' evaluates any number of trim states at once by broadcasting them along a leading axis, so a
+finite difference Jacobian costs one grid evaluation, and 'solve_trim' iterates them with Broyden updates of that Jacobian.
+"""
+
+import numpy as np
+
+from .azimuth import azimuth_grid, blade_element_angles
+from .inflow import MomentumInflow, inflow_distribution
+from . import profiling
+
+TRIM_VARIABLES = ("theta0", "theta1s", "alfa", "inflow_ratio")
+
+
+def rotor_loads(controls, velocity, density, inflow, r, omega, num_blades, chord, twist, polar, root_cutout=0.0, n_azimuth=24, n=20):
+    """
+    Returns the loads of the blade element grid at controls and an inflow distribution.
+
+    Parameters
+    ----------
+    controls : array_like
+        Collective θ0[°], longitudinal cyclic θ1s[°] and forward disk tilt α[°], of shape (..., 3).
+    velocity : float or array_like [m/s]
+        Level forward flight velocity.
+    density : float [kg/m3]
+        Density of air.
+    inflow : array_like
+        Uniform inflow ratio λ through the disk (induced, free stream and gusts) and the induced harmonics λ1s, λ1c of
+        'pycopter.inflow', of shape (..., 3).
+    r, omega, num_blades, chord, twist :
+        Rotor radius[m], angular velocity[rad/s], number of blades, chord[m] and linear root to tip twist[°]. Chord and twist
+        may also be arrays with one value per blade element, the twist as the pitch relative to the root, e.g. from
+        'Rotor.blade_sections'.
+    polar : ndarray
+        Airfoil polar as (alfa[°], cl, cd) rows.
+    root_cutout : float
+        Normalized radius r/R where the blade begins.
+    n_azimuth, n : int
+        Azimuth stations and blade elements of the grid.
+
+    Returns
+    -------
+    dict
+        'thrust'[N], 'h_force'[N] (aft in the disk plane), 'power'[W], 'flap_moment'[Nm] (1/rev sine harmonic of one blade),
+        'advance_ratio' and the loading 'forcing' (CT, Cs, Cc) of shape (..., 3) of the inflow models.
+    """
+    controls, inflow = np.asarray(controls, dtype=float), np.asarray(inflow, dtype=float)
+    theta0, theta1s, alfa = (controls[..., i, None, None] for i in range(3)) # Against the (azimuth, radius) grid.
+    psi, x, dx = azimuth_grid(root_cutout, n_azimuth, n)
+    tip_speed = omega * r
+    advance_ratio = np.asarray(velocity, dtype=float)[..., None, None] * np.cos(np.deg2rad(alfa)) / tip_speed
+    inflow_ratio = inflow_distribution(inflow, psi, x)
+
+    pitch_offset, twist = (np.asarray(twist, dtype=float), 0.0) if np.ndim(twist) else (0.0, twist)
+    ut, up, alfa_element, _ = blade_element_angles(psi, x, tip_speed, advance_ratio * tip_speed, inflow_ratio, theta0 + pitch_offset,
+                                                   twist, theta1s)
+    alfa_element = np.clip(alfa_element, polar[0, 0], polar[-1, 0])
+    cl = np.interp(alfa_element, polar[:, 0], polar[:, 1])
+    cd = np.interp(alfa_element, polar[:, 0], polar[:, 2])
+    profiling.count("polar_lookups", 2 * alfa_element.size)
+
+    # Element loads per unit span, perpendicular to the disk and in its plane against the rotation.
+    phi = np.arctan2(up, np.abs(ut))
+    dynamic_pressure = 0.5 * density * (ut**2 + up**2) * chord
+    lift_element, drag_element = dynamic_pressure * cl, dynamic_pressure * cd * np.sign(ut)
+    normal = lift_element * np.cos(phi) - drag_element * np.sin(phi)
+    in_plane = lift_element * np.sin(phi) + drag_element * np.cos(phi)
+
+    dr = dx * r
+    def integral(load): # Over the blades and a revolution.
+        return num_blades * np.mean(np.sum(load, axis=-1), axis=-1) * dr
+    thrust = integral(normal)
+    moments = np.stack([thrust, integral(normal * x * np.sin(psi)), integral(normal * x * np.cos(psi))], axis=-1)
+    disk_area = np.pi * r**2 * (1 - root_cutout**2)
+    return {"thrust": thrust, "h_force": integral(in_plane * np.sin(psi)), "power": integral(in_plane * x * r) * omega,
+            "flap_moment": 2 * r * moments[..., 1] / num_blades, "advance_ratio": advance_ratio[..., 0, 0],
+            "forcing": moments / (density * disk_area * tip_speed**2)}
+
+def trim_loads(state, velocity, density, flat_plate_area, lift, r, omega, num_blades, chord, twist, polar, root_cutout=0.0,
+               n_azimuth=24, n=20, inflow_model=None, inflow_passes=3):
+    """
+    Returns the rotor loads and the trim residuals of trim states.
+
+    Parameters
+    ----------
+    state : array_like
+        Trim states (θ0[°], θ1s[°], α[°], λ) of shape (..., 4). λ is the uniform part of the inflow ratio.
+    velocity : float [m/s]
+        Level forward flight velocity.
+    density : float [kg/m3]
+        Density of air.
+    flat_plate_area : float [m2]
+        Equivalent flat plate area of the aircraft body.
+    lift : float [N]
+        Weight carried by the rotor.
+    r, omega, num_blades, chord, twist, polar, root_cutout, n_azimuth, n :
+        See 'rotor_loads'.
+    inflow_model : InflowModel
+        Inflow model giving the steady induced inflow of the loading. Uniform momentum inflow if not given.
+    inflow_passes : int
+        Load evaluations converging the induced inflow harmonics of models that have them.
+
+    Returns
+    -------
+    dict
+        'residual' of shape (..., 4), 'inflow' (λ, λ1s, λ1c) of shape (..., 3), the outputs of 'rotor_loads', and
+        'inflow_induced' and 'power_induced'[W] of shape (...).
+    """
+    state = np.asarray(state, dtype=float)
+    inflow_model = MomentumInflow() if inflow_model is None else inflow_model
+    tilt = np.deg2rad(state[..., 2])
+    inflow = np.zeros(state.shape[:-1] + (3,))
+    inflow[..., 0] = state[..., 3]
+    for _ in range(inflow_passes if not isinstance(inflow_model, MomentumInflow) else 1):
+        loads = rotor_loads(state[..., :3], velocity, density, inflow, r, omega, num_blades, chord, twist, polar, root_cutout, n_azimuth, n)
+        induced = inflow_model.steady(loads["forcing"], loads["advance_ratio"], state[..., 3])
+        inflow[..., 1:] = induced[..., 1:]
+
+    thrust, h_force = loads["thrust"], loads["h_force"]
+    body_drag = density * velocity**2 * flat_plate_area / 2
+    loads["residual"] = np.stack([(thrust * np.cos(tilt) + h_force * np.sin(tilt) - lift) / lift,
+                                  (thrust * np.sin(tilt) - h_force * np.cos(tilt) - body_drag) / lift,
+                                  loads["flap_moment"] / (lift * r / num_blades),
+                                  state[..., 3] - loads["advance_ratio"] * np.tan(tilt) - induced[..., 0]], axis=-1)
+    loads.update(inflow=inflow, inflow_induced=induced[..., 0], power_induced=thrust * induced[..., 0] * omega * r)
+    return loads
+
+def trim_jacobian(residual, state, steps=(1e-4, 1e-4, 1e-4, 1e-6)):
+    """
+    Returns the residual of a trim state and its forward difference Jacobian, from one call of 'residual' on the state and its
+    four perturbations stacked along a leading axis.
+    """
+    steps = np.asarray(steps, dtype=float)
+    states = state + np.vstack([np.zeros(4), np.diag(steps)])
+    residuals = residual(states)
+    return residuals[0], (residuals[1:] - residuals[0]).T / steps
+
+def solve_trim(residual, state, jacobian=None, tolerance=1e-8, max_iterations=30):
+    """
+    Solves the trim residuals with Newton steps on a Broyden updated Jacobian. The finite difference Jacobian is computed
+    at the start if not given, e.g. from a neighbouring velocity, and again when a step doesn't reduce the residual.
+
+    Parameters
+    ----------
+    residual : callable
+        Returns the residuals of trim states of shape (..., 4).
+    state : ndarray
+        Initial trim state.
+    jacobian : ndarray
+        Initial 4 x 4 Jacobian.
+    tolerance : float
+        Largest residual norm of a trimmed state.
+    max_iterations : int
+        Largest number of Newton steps.
+
+    Returns
+    -------
+    ndarray, ndarray, dict
+        Trim state, the last Jacobian, and 'iterations', 'evaluations' (residual calls), 'jacobians' (finite difference
+        Jacobians) and 'converged'.
+    """
+    state = np.array(state, dtype=float)
+    stats = {"iterations": 0, "evaluations": 0, "jacobians": 0, "converged": False}
+    if jacobian is None:
+        f, jacobian = trim_jacobian(residual, state)
+        stats["jacobians"] += 1
+    else:
+        f = residual(state)
+        jacobian = np.array(jacobian, dtype=float)
+    stats["evaluations"] += 1
+
+    fresh = stats["jacobians"] > 0
+    for iteration in range(1, max_iterations + 1):
+        if np.linalg.norm(f) < tolerance:
+            stats["converged"] = True
+            break
+        stats["iterations"] = iteration
+        try:
+            step = -np.linalg.solve(jacobian, f)
+        except np.linalg.LinAlgError:
+            step = np.full(4, np.inf)
+        f_new = residual(state + step) if np.all(np.isfinite(step)) else np.full(4, np.inf)
+        stats["evaluations"] += 1
+        if not np.linalg.norm(f_new) < np.linalg.norm(f):
+            if not fresh: # Stale Jacobian: recompute it and retry from the same state.
+                f, jacobian = trim_jacobian(residual, state)
+                stats["evaluations"] += 1
+                stats["jacobians"] += 1
+                fresh = True
+                continue
+            step, f_new = step / 2, residual(state + step / 2) # Damped step with a fresh Jacobian.
+            stats["evaluations"] += 1
+        jacobian = jacobian + np.outer(f_new - f - jacobian @ step, step) / np.dot(step, step) # Broyden update.
+        state, f, fresh = state + step, f_new, False
+    else:
+        stats["converged"] = bool(np.linalg.norm(f) < tolerance)
+    profiling.count("trim_iterations", stats["iterations"])
+    profiling.count("trim_jacobians", stats["jacobians"])
+    return state, jacobian, stats
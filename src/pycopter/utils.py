@@ -3,7 +3,10 @@ from scipy.interpolate import interp1d
 from PIL import Image
 import sys
 
-from .xfoil import Xfoil
+from .xfoil import get_session, XfoilError
+from .panel import panel_polar
+from .kernels import polar_table
+from . import profiling
 
 
 def find_nearest_idx(array, val):
@@ -56,14 +59,21 @@ class Polar():
 
     Methods
     -------
+    from_data(data: ndarray, reynolds: float) -> Polar
+        Creates a Polar from existing polar data without running Xfoil.
     get_polar(alfa: float) -> float, float
         Returns the cl, cd values of the airfoil for the given alfa.
     get_cl_slope() -> float
         Returns the cl/alfa slope of the airfoil around alfa=1°.
+    get_stall_angle() -> float
+        Returns the angle of attack of the maximum lift coefficient.
+    lookup_table() -> tuple
+        Returns the resampled polar table used by the hover kernels.
     """
-    def __init__(self, airfoil, mach, reynolds, new_polar=True):
+    def __init__(self, airfoil, mach, reynolds, new_polar=True, xfoil=None, method="auto"):
         """
-        Initializes the Polar class. The parameters are used to create polar data from Xfoil.
+        Initializes the Polar class. The parameters are used to create polar data from Xfoil, or from the built-in
+        panel method (see pycopter.panel) if XFOIL is not available.
 
         Parameters
         ----------
@@ -75,28 +85,80 @@ class Polar():
             Reynolds number of the flow around the airfoil.
         new_polar : bool
             Whether to request new polar data or use the existing one.
+        xfoil : Xfoil
+            XFOIL session to request the polar from. The session shared by the process is used if not given.
+        method : str
+            'xfoil', 'panel', or 'auto' to use XFOIL and fall back to the panel method if it cannot run.
         """
+        if method not in ("auto", "xfoil", "panel"):
+            raise ValueError(f"Unknown polar method '{method}'. Use 'auto', 'xfoil' or 'panel'.")
         self.reynolds = reynolds
+        self.method = method
 
-        xfoil = Xfoil(new_polar)
+        if method == "panel":
+            self.polar = panel_polar(airfoil, mach, reynolds)
+            return
+        try:
+            self._request_polar(airfoil, mach, reynolds, new_polar, xfoil)
+        except XfoilError as error:
+            if method == "xfoil":
+                raise
+            print(f"{error} Using the panel method polar instead.")
+            self.method = "panel"
+            self.polar = panel_polar(airfoil, mach, reynolds)
+
+    def _request_polar(self, airfoil, mach, reynolds, new_polar, xfoil):
+        """Requests the polar from XFOIL, or reads the last one if new_polar is False."""
+        self.method = "xfoil"
+        xfoil = get_session() if xfoil is None else xfoil
         if new_polar:
             print("Generating XFOIL polar...")
-            xfoil.simulate(airfoil, mach, reynolds)
-            self.polar = xfoil.read_polar()
+            self.polar = xfoil.simulate(airfoil, mach, reynolds)
         else:
             try:
                 self.polar = xfoil.read_polar()
-            except FileNotFoundError:
+            except (FileNotFoundError, OSError):
                 print("Polar data not found. Generating new XFOIL polar...")
-                xfoil.simulate(airfoil, mach, reynolds)
-                self.polar = xfoil.read_polar()
+                self.polar = xfoil.simulate(airfoil, mach, reynolds)
+
+    @classmethod
+    def from_data(cls, data, reynolds=None):
+        """
+        Creates a Polar from existing data without running Xfoil.
+
+        Parameters
+        ----------
+        data : ndarray
+            Polar array with the columns alfa[°], cl, cd. Additional columns are ignored.
+        reynolds : float
+            Reynolds number the data belongs to.
+        """
+        polar = cls.__new__(cls)
+        polar.reynolds = reynolds
+        polar.method = "data"
+        polar.polar = np.asarray(data, dtype=float)
+        return polar
 
     def get_polar(self, alfa):
         """Returns (cl, cd) values for the requested angle of attack in degrees."""
+        if profiling.is_enabled(): # Sized only while profiling.
+            profiling.count("polar_lookups", np.size(alfa))
         func = interp1d(self.polar[:,0], [self.polar[:,1], self.polar[:,2]], kind='linear', axis=1)
         cl, cd = func(alfa)
         return cl, cd
     
+    def lookup_table(self):
+        """Returns the uniformly resampled polar table used by the hover kernels. Cached until 'polar' is replaced."""
+        cached = getattr(self, "_lookup_table", None)
+        if cached is None or cached[0] is not self.polar:
+            cached = (self.polar, polar_table(self.polar))
+            self._lookup_table = cached
+        return cached[1]
+
+    def get_stall_angle(self):
+        """Returns the angle of attack[°] of the maximum lift coefficient."""
+        return self.polar[np.argmax(self.polar[:,1]), 0]
+
     def get_cl_slope(self):
         """Returns the initial slope[1/rad] of the cl vs alfa curve."""
         return (self.polar[2,1] - self.polar[0,1]) / (np.deg2rad(self.polar[2,0]) - np.deg2rad(self.polar[0,0]))
@@ -140,6 +202,120 @@ def calculate_component_reference_area(image_path:str, width:float, height:float
     component_reference_area = ratio * height * width
     return component_reference_area
 
+class BladeDistribution():
+    """
+    A radial blade property as a function of the normalized radius r/R. Unlike a closure it can be pickled, so that rotors with
+    distributions can be sent to worker processes.
+
+    Methods
+    -------
+    __call__(x: ndarray) -> ndarray
+        Returns the property at the normalized radii, interpolated between the stations or evaluated by the function.
+    """
+    def __init__(self, stations=None, samples=None, function=None):
+        """
+        Parameters
+        ----------
+        stations, samples : ndarray
+            Increasing normalized radii and the property values at them.
+        function : callable
+            Function of an array of normalized radii, used instead of the samples.
+        """
+        self.stations = stations
+        self.samples = samples
+        self.function = function
+
+    def __call__(self, x):
+        if self.function is not None:
+            return np.broadcast_to(np.asarray(self.function(x), dtype=float), np.shape(x))
+        return np.interp(x, self.stations, self.samples)
+
+def blade_distribution(value, name="distribution"):
+    """
+    Returns a radial blade property as a 'BladeDistribution' of the normalized radius r/R, or None for a number (constant or linear property).
+
+    Parameters
+    ----------
+    value : float, array_like or callable
+        A number, samples at evenly spaced radii from the root (r/R = 0) to the tip (r/R = 1), (r/R, value) rows, or a function of
+        an array of normalized radii.
+    name : str
+        Name of the property for the error messages.
+    """
+    if callable(value):
+        return BladeDistribution(function=value)
+    samples = np.asarray(value, dtype=float)
+    if samples.ndim == 0:
+        return None
+    if samples.ndim == 1 and len(samples) >= 2:
+        stations = np.linspace(0, 1, len(samples))
+    elif samples.ndim == 2 and samples.shape[1] == 2 and len(samples) >= 2 and np.all(np.diff(samples[:, 0]) > 0):
+        stations, samples = samples[:, 0], samples[:, 1]
+    else:
+        raise ValueError(f"Blade {name} must be a number, at least two samples from root to tip, increasing (r/R, value) rows or a function of r/R.")
+    return BladeDistribution(stations, samples)
+
+def equivalent_chord(chord):
+    """
+    Returns the thrust weighted equivalent chord 3∫c(x)x²dx[m] of a chord or chord distribution (see 'blade_distribution'), the
+    chord of the constant chord blade of the same thrust at uniform inflow. A number is returned as it is.
+    """
+    distribution = blade_distribution(chord, "chord")
+    if distribution is None:
+        return chord
+    x = (np.arange(1000) + 0.5) / 1000
+    return float(3 * np.mean(distribution(x) * x**2))
+
+def ground_effect_thrust_ratio(rotor_height, r, min_height=0.5):
+    """
+    Returns the ratio of the thrust in ground effect to the thrust out of ground effect at constant power, with the
+    Cheeseman-Bennett image method: 1 / (1 - (r/4z)^2). Works on arrays of heights.
+
+    Parameters
+    ----------
+    rotor_height : float [m]
+        Rotor disk height from ground/obstacle below.
+    r : float [m]
+        Rotor radius.
+    min_height : float
+        Lowest rotor height in rotor radii. Lower heights are evaluated at it, as the model is singular at r/4 and
+        is not valid close to it.
+    """
+    rotor_height = _ground_effect_height(rotor_height, r, min_height)
+    return 1 / (1 - r**2 / (16 * rotor_height**2))
+
+def ground_effect_power_ratio(rotor_height, r, model="hayden", min_height=0.5):
+    """
+    Returns the ratio of the induced power in ground effect to the induced power out of ground effect at constant thrust.
+    Works on arrays of heights.
+
+    Parameters
+    ----------
+    rotor_height : float [m]
+        Rotor disk height from ground/obstacle below.
+    r : float [m]
+        Rotor radius.
+    model : str
+        'hayden' for Hayden's flight test fit 1 / (0.9926 + 0.0379 (2r/z)^2), or 'cheeseman-bennett' for 1 - (r/4z)^2.
+    min_height : float
+        Lowest rotor height in rotor radii, see 'ground_effect_thrust_ratio'.
+    """
+    rotor_height = _ground_effect_height(rotor_height, r, min_height)
+    if model == "hayden":
+        return 1 / (0.9926 + 0.0379 * (2 * r / rotor_height)**2)
+    if model == "cheeseman-bennett":
+        return 1 - r**2 / (16 * rotor_height**2)
+    raise ValueError(f"Unknown ground effect model '{model}'. Use 'hayden' or 'cheeseman-bennett'.")
+
+def _ground_effect_height(rotor_height, r, min_height):
+    """Returns the rotor heights clipped to min_height rotor radii. Raises ValueError for negative heights."""
+    rotor_height = np.asarray(rotor_height, dtype=float)
+    if np.any(rotor_height < 0):
+        raise ValueError("Rotor height must not be negative.")
+    if min_height <= 0.25:
+        raise ValueError("Minimum rotor height must be above r/4, where the ground effect model is singular.")
+    return np.maximum(rotor_height, min_height * r)
+
 def walds_equation(normalized_flight_speed:float, downwash_velocity_ratio:float, alfa=0):
     """
     Wald's Equation as defined in ref: 'AMCP 706-201, pdf pg.92'.
@@ -162,7 +338,8 @@ def walds_equation(normalized_flight_speed:float, downwash_velocity_ratio:float,
             + normalized_flight_speed**2 * downwash_velocity_ratio**2
     return output
 
-def walds_solver(free_stream_velocity:float, hover_induced_velocity:float, alfa=0, iter=100):
+@profiling.instrument("walds_solver")
+def walds_solver(free_stream_velocity:float, hover_induced_velocity:float, alfa=0, iter=100, initial=1, tol=None):
     """
     Numerically solves the Wald's Equation and returns the downwash velocity ratio [v/v0].
     
@@ -175,7 +352,11 @@ def walds_solver(free_stream_velocity:float, hover_induced_velocity:float, alfa=
     alfa : float [°]
         Rotor collective pitch. Assume 0° for level forward flight.
     iter : int
-        Iterations if the solver. The solver doesn't have a convergence criteria but it usually converges after around 10 iterations.
+        Iterations if the solver. Without 'tol' all of them are run; it usually converges after around 10 iterations.
+    initial : float
+        Initial downwash velocity ratio. A nearby solution, e.g. of the previous velocity of a sweep, converges in fewer iterations.
+    tol : float
+        Stops when the downwash velocity ratio changes less than this in an iteration.
 
     Returns
     -------
@@ -183,16 +364,41 @@ def walds_solver(free_stream_velocity:float, hover_induced_velocity:float, alfa=
         The downwash velocity ratio. Forward flight induced velocity divided by hover induced velocity. [v/v0]
     """    
     normalized_flight_speed = free_stream_velocity / hover_induced_velocity
-    downwash_velocity_ratio = 1 # Initialization.
+    downwash_velocity_ratio = initial # Initialization.
     gamma = 0.02 # Step size.
     target = 1
 
-    for _ in range(iter):
+    iteration = 0
+    for iteration in range(1, iter + 1):
         output = walds_equation(normalized_flight_speed, downwash_velocity_ratio, alfa)
-        downwash_velocity_ratio -= (output - target) * gamma
+        step = (output - target) * gamma
+        downwash_velocity_ratio = downwash_velocity_ratio - step
+        if tol is not None and (abs(step) < tol if np.ndim(step) == 0 else np.all(np.abs(step) < tol)):
+            break
+    profiling.count("wald_iterations", iteration)
 
     return downwash_velocity_ratio
 
+def walds_closed_form(free_stream_velocity, hover_induced_velocity):
+    """
+    Returns the exact downwash velocity ratio [v/v0] of the Wald's Equation at alfa=0, which is a quadratic in (v/v0)^2. Unlike
+    'walds_solver' it cannot diverge, and it works on arrays of any shape.
+
+    Parameters
+    ----------
+    free_stream_velocity : float [m/s]
+        Level forward flight speed.
+    hover_induced_velocity : float [m/s]
+        Mean hover induced velocity.
+
+    Returns
+    -------
+    float
+        The downwash velocity ratio. Forward flight induced velocity divided by hover induced velocity. [v/v0]
+    """
+    normalized_flight_speed = free_stream_velocity / hover_induced_velocity
+    return np.sqrt((np.sqrt(normalized_flight_speed**4 + 4) - normalized_flight_speed**2) / 2)
+
 
 
 if __name__ == "__main__":
@@ -1,40 +1,120 @@
 import subprocess
+import threading
+import shutil
+import atexit
+import time
+import sys
 import os
+import re
 import numpy as np
 
+from . import profiling
+
+
+class XfoilError(RuntimeError):
+    """Raised when the XFOIL executable cannot be found or its session fails."""
+
+
+def find_xfoil():
+    """
+    Returns the path of an XFOIL executable or None if there is none. Looked up in order: the 'XFOIL_PATH' environment
+    variable, 'xfoil' on the PATH, and on Windows the bundled 'data/XFOIL6.99/xfoil.exe'.
+    """
+    path = os.environ.get("XFOIL_PATH")
+    if path:
+        return path
+    path = shutil.which("xfoil")
+    if path:
+        return path
+    if sys.platform.startswith("win"):
+        for root in (os.getcwd(), os.path.join(os.path.dirname(__file__), "..", "..")):
+            path = os.path.abspath(os.path.join(root, "data", "XFOIL6.99", "xfoil.exe"))
+            if os.path.exists(path):
+                return path
+    return None
+
+
 class Xfoil():
     """
-    Contains methods to communicate with the XFOIL.exe. Xfoil process is created and waits in the background at initialization.
+    Drives an interactive XFOIL session over stdin/stdout. The process is spawned lazily on the first simulation and
+    kept alive, so that several polars can be requested without relaunching it. The session is recycled on errors.
 
     Methods
     -------
-    simulate(airfoil : str, mach : float, reynolds : float) -> None
+    simulate(airfoil : str, mach : float, reynolds : float) -> ndarray
         Requests polar data for the airfoil and flow conditions defined by the user.
     read_polar() -> ndarray
-        Reads and returns the polar data.
+        Reads and returns the last polar data saved to 'output_path'.
+    close() -> None
+        Terminates the XFOIL process.
     """
+    sync_command = "SYNC" # Not an XFOIL command. XFOIL answers with "SYNC command not recognized", which marks the end of an answer.
+    _sync_pattern = re.compile(r"SYNC\s+command not recognized")
+    _alfa_pattern = re.compile(r"a =\s*(-?\d+\.\d*)\s+CL =\s*(-?\d+\.\d*)")
+    _cd_pattern = re.compile(r"Cm =\s*(-?\d+\.\d*)\s+CD =\s*(-?\d+\.\d*)\s+=>\s+CDf =\s*(-?\d+\.\d*)\s+CDp =\s*(-?\d+\.\d*)")
 
-    def __init__(self, new_polar=True):
+    def __init__(self, new_polar=True, exe_path=None, timeout=60):
         """
-        Prepares the XFOIL.exe process.
+        Prepares the XFOIL session. No process is started until a simulation is requested.
 
         parameters
         ----------
         new_polar : bool
             Whether to request new polars or use an existing one.
+        exe_path : str or list
+            XFOIL executable, or a command list to launch it. Found with 'find_xfoil' if not given.
+        timeout : float [s]
+            Maximum wait for an XFOIL answer before the session is recycled.
         """
         self.new_polar = new_polar
-        self.exe_path = "data/XFOIL6.99/xfoil.exe"
+        self.exe_path = exe_path
         self.output_path = "data/XFOIL6.99/polar.txt"
         self.max_theta = 15
-        
-        self.process = subprocess.Popen(self.exe_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.PIPE, text=True)
+        self.timeout = timeout
+
+        self.process = None
+        self._viscous = False
+        self._buffer = ""
+        self._condition = threading.Condition()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Spawns the XFOIL process if it is not running."""
+        if self.process is not None and self.process.poll() is None:
+            return
+        exe_path = self.exe_path or find_xfoil()
+        if exe_path is None:
+            raise XfoilError("XFOIL executable not found. Install xfoil or set the XFOIL_PATH environment variable.")
+        command = exe_path if isinstance(exe_path, (list, tuple)) else [exe_path]
+
+        profiling.count("xfoil_launches")
+        try:
+            self.process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, bufsize=0)
+        except OSError as error:
+            raise XfoilError(f"XFOIL could not be started: {error}") from error
+        self._viscous = False
+        self._buffer = ""
+        threading.Thread(target=self._read_stdout, args=(self.process,), daemon=True).start()
+        self._send(["plop", "g f", ""]) # Disable graphics.
+        self._sync()
+
+    def close(self):
+        """Terminates the XFOIL process."""
+        if self.process is None:
+            return
+        try:
+            if self.process.poll() is None:
+                self.process.stdin.write(b"\nquit\n")
+                self.process.stdin.flush()
+                self.process.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+        self.process = None
 
-        
-        
     def simulate(self, airfoil:str, mach:float, reynolds:float):
         """
-        Runs the xfoil process with the given parameters. Xfoil process saves the polar data in a temporary location.
+        Requests the polar from the XFOIL session, parses it from the output stream, saves it to 'output_path' and returns it.
+        If the session fails, it is restarted once before an XfoilError is raised.
 
         Parameters
         ----------
@@ -44,32 +124,116 @@ class Xfoil():
             Mach number of the airfoil.
         reynolds : float
             The Reynold's number.
+
+        Returns
+        -------
+        ndarray
+            Polar data with the columns alfa[°], cl, cd, cdp, cm.
         """
-        if self.new_polar and os.path.exists(self.output_path):
-            os.remove(self.output_path) 
-
-        inputs_init = [airfoil, "oper", "iter 400", "v", str(reynolds), f"mach {mach}", "pacc", self.output_path + "\n"]
-        inputs = [f"alfa {alfa}" for alfa in np.arange(-8, self.max_theta + 6)]
-        command = ""
-        for input in inputs_init:
-            command = command + input + "\n"
-        for input in inputs:
-            command = command + input + "\n"
-        
-        output, error = self.process.communicate(input=command)
-        
-        # This just gives error all the time.
-        # if output.find("Convergence failed") != -1:
-        #     print("XFOIL convergence has failed due to highly turbulent flow. Polars for high theta are expected to be faulty. Confirm the alfa vs cl vs cd plots.")
+        with self._lock:
+            for attempt in range(2):
+                self.start()
+                try:
+                    polar = self._run_polar(airfoil, mach, reynolds)
+                    break
+                except (OSError, XfoilError) as error:
+                    self.close()
+                    if attempt == 1:
+                        raise XfoilError(f"XFOIL session failed: {error}") from error
+                    print("XFOIL session failed, restarting it...")
+
+        self._save_polar(polar, airfoil, mach, reynolds)
+        return polar
 
     def read_polar(self):
-        """Reads and returns the polar data[ndarray] that was created by XFOIL.exe."""
+        """Reads and returns the polar data[ndarray] that was saved by 'simulate' or by XFOIL's PACC command."""
         return np.genfromtxt(self.output_path, skip_header=12)
 
+    def _run_polar(self, airfoil, mach, reynolds):
+        """Runs an alfa sweep in OPER mode and parses the converged points."""
+        self._send([f"naca {airfoil[4:]}", "pane", "oper", "iter 400",
+                    f"re {reynolds}" if self._viscous else f"visc {reynolds}", f"mach {mach}"])
+        self._viscous = True
+        self._sync()
 
+        rows = []
+        for alfa in np.arange(-8, self.max_theta + 6):
+            self._send([f"alfa {alfa}"])
+            answer = self._sync()
+            if "Convergence failed" in answer:
+                self._send(["init"]) # Reset the boundary layer so that the failure doesn't carry over.
+                self._sync()
+                continue
+            lift, drag = self._alfa_pattern.findall(answer), self._cd_pattern.findall(answer)
+            if lift and drag:
+                cm, cd, _, cdp = (float(value) for value in drag[-1])
+                rows.append((float(lift[-1][0]), float(lift[-1][1]), cd, cdp, cm))
+        self._send([""]) # Back to the top level menu.
+        self._sync()
 
-if __name__ == "__main__":
-    xfoil = Xfoil("naca23012", True)
-    xfoil.simulate(0.3, 4000000)
+        if len(rows) < 2:
+            raise XfoilError(f"XFOIL returned no converged points for {airfoil}.")
+        return np.array(rows)
+
+    def _send(self, lines):
+        if self.process is None or self.process.poll() is not None:
+            raise XfoilError("XFOIL process is not running.")
+        self.process.stdin.write(("\n".join(lines) + "\n").encode())
+        self.process.stdin.flush()
+
+    def _sync(self):
+        """Sends the sync command and returns everything XFOIL printed up to its answer to it."""
+        self._send([self.sync_command])
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            while True:
+                match = self._sync_pattern.search(self._buffer)
+                if match:
+                    answer, self._buffer = self._buffer[:match.start()], self._buffer[match.end():]
+                    return answer
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self.process is None or self.process.poll() is not None:
+                    raise XfoilError("XFOIL did not answer in time.")
+                self._condition.wait(min(remaining, 0.5))
+
+    def _read_stdout(self, process):
+        """Collects the process output into the buffer. Runs in a background thread."""
+        while True:
+            chunk = process.stdout.read(4096)
+            if not chunk:
+                break
+            with self._condition:
+                self._buffer += chunk.decode(errors="replace")
+                self._condition.notify_all()
+        with self._condition:
+            self._condition.notify_all()
 
+    def _save_polar(self, polar, airfoil, mach, reynolds):
+        """Saves the polar in XFOIL's 12 line header format so that 'read_polar' can load it with new_polar=False."""
+        directory = os.path.dirname(self.output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        header = ["", "       XFOIL         Version 6.99", "",
+                  f" Calculated polar for: {airfoil.upper()}", "",
+                  " 1 1 Reynolds number fixed          Mach number fixed", "",
+                  " xtrf =   1.000 (top)        1.000 (bottom)",
+                  f" Mach = {mach:7.3f}     Re = {reynolds/1e6:9.3f} e 6     Ncrit =   9.000", "",
+                  "  alpha    CL        CD       CDp       CM", " ------ -------- --------- --------- --------"]
+        np.savetxt(self.output_path, polar, fmt="%9.4f", header="\n".join(header), comments="")
 
+
+_session = None
+
+def get_session():
+    """Returns the XFOIL session shared by all polars of this process."""
+    global _session
+    if _session is None:
+        _session = Xfoil()
+        atexit.register(_session.close)
+    return _session
+
+
+
+if __name__ == "__main__":
+    xfoil = Xfoil()
+    print(xfoil.simulate("naca23012", 0.3, 4000000))
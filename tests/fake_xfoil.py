@@ -0,0 +1,30 @@
+"""Minimal stand-in for an interactive XFOIL session, used to test the session driver without the real binary."""
+
+import os
+import sys
+
+
+def main():
+    crash_file = os.environ.get("FAKE_XFOIL_CRASH_FILE")
+    for line in sys.stdin:
+        command = line.strip()
+        if command == "SYNC":
+            print(' SYNC command not recognized.  Type a "?" for command list')
+        elif command.startswith("alfa"):
+            if crash_file and os.path.exists(crash_file):
+                os.remove(crash_file)
+                sys.exit(1)
+            alfa = float(command.split()[1])
+            if alfa > 18:
+                print(" VISCAL:  Convergence failed")
+            else:
+                print(f"   a = {alfa:6.3f}      CL = {0.1*alfa:7.4f}")
+                print(f"  Cm = -0.0010     CD =  {0.006 + 0.0001*alfa**2:.5f}   =>   CDf =  0.00400    CDp =  0.00100")
+        elif command == "quit":
+            break
+        print(" OPERv   c>  ", end="")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""Shared test data for `pycopter` tests. Replaces XFOIL so that the tests run without xfoil.exe."""
+
+import os
+import numpy as np
+
+from pycopter import Rotor
+from pycopter.utils import Polar
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+
+# MD500E main rotor, see tutorials/presets/MD500E.json.
+MD500E = {"airfoil": "naca0015", "num_blades": 5, "chord": 0.17, "rotor_diameter": 8.05,
+          "tip_speed_mach": 0.604, "washout": -9.0, "rotor_root_cutout": 0.032}
+
+
+def fixture_polar_data():
+    """Returns a smooth NACA0012-like polar (alfa[°], cl, cd) covering the XFOIL request range -8°..20°."""
+    alfa = np.arange(-8, 21, dtype=float)
+    cl = 0.105 * alfa
+    stalled = alfa > 14
+    cl[stalled] = 0.105 * 14 - 0.04 * (alfa[stalled] - 14) # Soft post-stall drop.
+    cd = 0.0065 + 0.00012 * alfa**2
+    cd[stalled] += 0.01 * (alfa[stalled] - 14)**2
+    return np.column_stack((alfa, cl, cd))
+
+def fixture_polar():
+    """Returns a Polar built from 'fixture_polar_data'."""
+    return Polar.from_data(fixture_polar_data(), reynolds=1.2e6)
+
+def fixture_rotor(**kwargs):
+    """Returns an MD500E rotor using the fixture polar. Keyword arguments override the geometry."""
+    config = dict(MD500E, polar=fixture_polar())
+    config.update(kwargs)
+    return Rotor(**config)
@@ -0,0 +1,84 @@
+"""
+Performance benchmarks for the `pycopter` solvers. Requires pytest-benchmark.
+
+Store a baseline and compare against it with:
+
+    make bench            # runs and saves a baseline under .benchmarks/
+    make bench-compare    # fails if any mean time regressed by more than 20%
+"""
+
+import os
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from pycopter.utils import walds_solver, read_txt, probe_txt, calculate_component_reference_area
+
+from tests.fixtures import DATA_DIR, fixture_polar, fixture_rotor
+
+FIGURE_PATH = os.path.join(DATA_DIR, "figures", "MeanLiftCoef.vs.MeanDragCoef_(Fig3-1.AMCP706-201).txt")
+
+
+@pytest.fixture
+def rotor():
+    return fixture_rotor()
+
+@pytest.fixture
+def hovered_rotor():
+    rotor = fixture_rotor()
+    rotor.hover(1361)
+    return rotor
+
+
+@pytest.mark.benchmark(group="hover")
+@pytest.mark.parametrize("n", [5, 10, 20])
+def test_hover(benchmark, rotor, n):
+    benchmark.pedantic(rotor.hover, args=(1361, 1.225, n), rounds=3, iterations=1)
+    assert rotor.hover_thrust >= 1361 * 9.81
+
+@pytest.mark.benchmark(group="forward_flight")
+def test_forward_flight_sweep(benchmark, hovered_rotor):
+    def sweep():
+        powers = np.empty(50)
+        for i, velocity in enumerate(np.linspace(10, 80, 50)):
+            hovered_rotor.forward_flight(velocity, 1.225, 0.557)
+            powers[i] = hovered_rotor.power_total
+        return powers
+    powers = benchmark(sweep)
+    assert powers.shape == (50,)
+
+@pytest.mark.benchmark(group="forward_flight")
+def test_velocity_sweep(benchmark, hovered_rotor):
+    result = benchmark(hovered_rotor.velocity_sweep, 10, 80, 1.225, 0.557)
+    assert len(result["velocity"]) < 50
+
+@pytest.mark.benchmark(group="utils")
+def test_walds_solver(benchmark):
+    ratio = benchmark(walds_solver, 20, 10)
+    assert 0 < ratio < 1
+
+@pytest.mark.benchmark(group="utils")
+def test_get_polar(benchmark):
+    polar = fixture_polar()
+    cl, cd = benchmark(polar.get_polar, 4.3)
+    assert cl > 0 and cd > 0
+
+@pytest.mark.benchmark(group="utils")
+def test_read_txt(benchmark):
+    data = benchmark(read_txt, FIGURE_PATH)
+    assert data.shape[1] == 2
+
+@pytest.mark.benchmark(group="utils")
+def test_probe_txt(benchmark):
+    assert benchmark(probe_txt, FIGURE_PATH, 0.5) > 0
+
+@pytest.mark.benchmark(group="utils")
+def test_calculate_component_reference_area(benchmark, tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    image = Image.new("1", (400, 200), 1)
+    image.paste(0, (100, 50, 300, 150)) # Black body covering a quarter of the picture.
+    image_path = tmp_path / "body.png"
+    image.save(image_path)
+    area = benchmark(calculate_component_reference_area, str(image_path), 8.0, 4.0)
+    assert area == pytest.approx(8.0)
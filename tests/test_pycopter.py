@@ -4,69 +4,980 @@
 
 
 import unittest
-import numpy as np
+import asyncio
+import json
+import tempfile
 import sys
 import os
-import json
+import numpy as np
+
+from pycopter import Rotor, Copter, profiling, hover_batch
+from pycopter.xfoil import Xfoil, XfoilError
+from pycopter.panel import panel_polar, naca_parameters
+from pycopter.utils import Polar
+from pycopter import kernels
+from pycopter.montecarlo import monte_carlo, Normal, Uniform, RunningStats
+from pycopter.results import open_sink, result_fields, result_records, pyarrow
+from pycopter.sweep import sweep, SWEEP_FIELDS
+from pycopter.perfdb import compute_grid, open_grid, save_grid
+from pycopter.server import RotorServer, request
+from pycopter.factory import RotorFactory
+from pycopter.population import RotorGeometry, RotorPopulation
+from pycopter.engine import Engine, atmosphere_density
+from pycopter.electric import Battery, ElectricMotor, discharge
+from pycopter.batch import range_endurance
+from pycopter.trim import trim_loads, trim_jacobian, solve_trim
+from pycopter.inflow import resolve_inflow, rk4, MomentumInflow, PittPeters
+from pycopter.utils import ground_effect_power_ratio, walds_equation, walds_solver, read_txt, probe_txt, reynolds
 
-from pycopter import Rotor
+from tests.fixtures import DATA_DIR, MD500E, fixture_polar, fixture_polar_data, fixture_rotor
 
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
 class TestRotor(unittest.TestCase):
     def setUp(self):
-        self.num_blades = 6
-        self.chord = 0.025
-        self.rotor_diameter = 0.6
-        self.rpm = 2500
-        self.cl = 1.1
-        self.cd = 0.04
-        self.tip_loss = 0.95
-        self.rotor_disk_hole = 0.1
-        self.density = 1.293
-        self.rotor_radius = self.rotor_diameter / 2
-        self.rpm_in_hz = self.rpm * np.pi / 30
-        self.tip_speed = self.rpm_in_hz * self.rotor_radius
-        self.rotor_disk_area = np.pi * self.rotor_radius**2 - np.pi * (self.rotor_radius * self.rotor_disk_hole)**2
-        self.test_rotor = Rotor(self.num_blades,self.chord,self.rotor_diameter,self.rpm,self.cl,self.cd,self.tip_loss,self.rotor_disk_hole)
-
-        package_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "package.json"))
-        try:
-            with open(package_path, "r") as f:
-                self.package_data = json.load(f)
-        except:
-            self.fail(f"Required file not found at: \n{package_path}")
-        
+        self.gross = 1361
+        self.density = 1.225
+        self.rotor = fixture_rotor()
+
+    def test_geometry(self):
+        r = MD500E["rotor_diameter"] / 2
+        tip_speed = MD500E["tip_speed_mach"] * 343
+        self.assertAlmostEqual(self.rotor.tip_speed, tip_speed)
+        self.assertAlmostEqual(self.rotor.rotor_disk_area, np.pi * r**2 * (1 - MD500E["rotor_root_cutout"]**2))
+        self.assertAlmostEqual(self.rotor.solidity, MD500E["num_blades"] * MD500E["chord"] / (np.pi * r))
+
+    def test_hover_lifts_weight(self):
+        self.rotor.hover(self.gross, self.density)
+        self.assertGreaterEqual(self.rotor.hover_thrust, self.gross * 9.81)
+        self.assertLess(self.rotor.theta, 15)
+        self.assertAlmostEqual(self.rotor.hover_power_total, self.rotor.hover_power_induced + self.rotor.hover_power_profile)
+        self.assertTrue(0 < self.rotor.merit < 1)
+
+    def test_hover_reference(self):
+        # Reference values of the element by element implementation the kernels replaced.
+        self.rotor.backend = "numpy"
+        self.rotor.hover(self.gross, self.density)
+        self.assertEqual(self.rotor.theta, 9.5)
+        self.assertAlmostEqual(self.rotor.hover_thrust, 14645.6888499881, places=6)
+        self.assertAlmostEqual(self.rotor.hover_induced_vel, 10.233407325158183, places=9)
+
+    @unittest.skipIf(kernels.numba is None, "numba is not installed")
+    def test_hover_backends_agree(self):
+        results = []
+        for backend in ("numpy", "numba"):
+            self.rotor.backend = backend
+            self.rotor.hover(self.gross, self.density, 30)
+            results.append((self.rotor.theta, self.rotor.hover_thrust, self.rotor.hover_power_total))
+        np.testing.assert_allclose(results[0], results[1], rtol=1e-12)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            fixture_rotor(backend="fortran")
+
+    def test_forward_flight_powers(self):
+        self.rotor.hover(self.gross, self.density)
+        self.rotor.forward_flight(40.0, self.density, 0.557)
+        self.assertAlmostEqual(self.rotor.power_total, self.rotor.power_induced + self.rotor.power_profile + self.rotor.power_parasite)
+        self.assertAlmostEqual(self.rotor.power_parasite, self.density * 40.0**3 * 0.557 / 2)
+        self.assertLess(self.rotor.power_induced, self.rotor.hover_power_induced)
+
+    def test_forward_flight_rejects_arrays(self):
+        with self.assertRaises(ValueError):
+            self.rotor.forward_flight(np.array([10.0, 20.0]))
+
+    def test_blade_stall(self):
+        self.rotor.hover(self.gross, self.density)
+        self.rotor.forward_flight(40.0, self.density, 0.557, stall_check=True)
+        self.assertEqual(self.rotor.grid_alfa.shape, (72, 50))
+        self.assertTrue(self.rotor.grid_reverse_flow[54].any()) # Retreating blade at 270°.
+        self.assertFalse(self.rotor.grid_reverse_flow[18].any()) # Advancing blade at 90°.
+        self.assertAlmostEqual(self.rotor.grid_mach[18, -1], (self.rotor.tip_speed * (1 - 0.5/50) + 40) / 343, places=2)
+
+    def test_stall_limited_speed(self):
+        self.rotor.hover(2600, self.density)
+        data = fixture_polar_data()
+        data[:, 1] = np.minimum(data[:, 1], 1.05 - 0.01 * np.abs(data[:, 0] - 10)) # Stalls at 10°.
+        self.rotor.polar = Polar.from_data(data)
+        velocity = self.rotor.stall_limited_speed(self.density, 0.557)
+        self.assertTrue(0 < velocity < 150)
+        self.assertTrue(self.rotor.retreating_blade_stall)
+        self.rotor.blade_stall(velocity - 0.2, self.density, 0.557)
+        self.assertFalse(self.rotor.retreating_blade_stall)
+
+    def test_ige(self):
+        thrust = self.rotor.ige(1000, 10)
+        self.assertAlmostEqual(thrust, 1000 / (1 - self.rotor.r**2 / (16 * 10**2)))
+        heights = np.array([0, self.rotor.r / 4, self.rotor.r / 2, 10, 1000])
+        thrusts = self.rotor.ige(1000, heights)
+        self.assertTrue(np.all(np.isfinite(thrusts)))
+        np.testing.assert_allclose(thrusts[:3], 4000 / 3) # Clipped to half the radius.
+        self.assertAlmostEqual(thrusts[3], thrust)
+        with self.assertRaises(ValueError):
+            self.rotor.ige(1000, -1)
+
+    def test_ige_power(self):
+        self.rotor.hover(self.gross, self.density)
+        heights = np.linspace(0.5, 10, 20) * self.rotor.r
+        for model in ("hayden", "cheeseman-bennett"):
+            powers = self.rotor.ige_power(heights, model)
+            self.assertTrue(np.all(np.diff(powers) > 0))
+            self.assertTrue(np.all(powers < self.rotor.hover_power_total * 1.01))
+            self.assertTrue(np.all(powers > self.rotor.hover_power_profile))
+        self.assertAlmostEqual(self.rotor.ige_power(self.rotor.r, "cheeseman-bennett"),
+                               self.rotor.hover_power_induced * 15 / 16 + self.rotor.hover_power_profile)
+        with self.assertRaises(ValueError):
+            self.rotor.ige_power(10, "image")
+
+        hover = hover_batch(self.rotor.polar, **{name: getattr(self.rotor, name) for name in ("num_blades", "chord", "rotor_diameter",
+                            "tip_speed_mach", "washout", "rotor_root_cutout")}, weight=[1200, self.gross], density=self.density)
+        powers = hover.hover_power_induced[:, None] * ground_effect_power_ratio(heights, self.rotor.r) + hover.hover_power_profile[:, None]
+        self.assertEqual(powers.shape, (2, 20))
+        np.testing.assert_allclose(powers[1], self.rotor.ige_power(heights))
+
+    def test_spanwise_loads(self):
+        self.rotor.hover(self.gross, self.density, n=20)
+        loads = self.rotor.spanwise
+        self.assertNotIn("thrust_per_span", vars(loads)) # Nothing derived until asked.
+        dr = self.rotor.r / 20
+        self.assertAlmostEqual(np.sum(loads.thrust_per_span) * dr, self.rotor.hover_thrust, delta=1e-9 * self.rotor.hover_thrust)
+        self.assertIn("thrust_per_span", vars(loads))
+        self.assertNotIn("cl", vars(loads))
+        self.assertIs(loads.thrust_per_span, loads.thrust_per_span)
+        self.assertAlmostEqual(np.sum(loads.torque_per_span) * dr * self.rotor.omega, self.rotor.hover_power_total,
+                               delta=0.03 * self.rotor.hover_power_total)
+        distributions = loads.as_dict()
+        self.assertEqual(set(distributions), set(loads.FIELDS))
+        self.assertTrue(all(len(values) == 20 for values in distributions.values()))
+        np.testing.assert_allclose(loads.radius, np.linspace(0, self.rotor.r, 20, endpoint=False) + dr / 2)
+        np.testing.assert_allclose(np.tan(np.deg2rad(loads.phi)) * self.rotor.omega * loads.radius, loads.inflow)
+        np.testing.assert_allclose(loads.inflow_ratio * self.rotor.tip_speed, loads.inflow)
+
+        thrust = loads.thrust_per_span.copy()
+        self.rotor.hover(self.gross / 2, self.density, n=20)
+        np.testing.assert_array_equal(loads.thrust_per_span, thrust) # Kept by the previous hover.
+        self.assertIsNot(self.rotor.spanwise, loads)
+
+    def test_element_spacing(self):
+        edges = kernels.element_edges(0.032, 30, "cosine")
+        self.assertEqual((edges[0], edges[-1]), (0.032, 1.0))
+        self.assertTrue(np.all(np.diff(np.diff(edges)) < 0)) # Clustered at the tip.
+        with self.assertRaises(ValueError):
+            self.rotor.hover(self.gross, self.density, spacing="linear")
+
+        def thrust(edges, theta):
+            kernel = self.rotor._hover_kernel(len(edges) - 1, edges)
+            kernel.solve(theta)
+            return self.rotor._kernel_thrust(kernel, np.diff(edges) * self.rotor.r, self.density)
+
+        # Thrust at fixed collectives against fine grids over the same span.
+        cutout = self.rotor.rotor_root_cutout
+        uniform, adapted, elements = [], [], []
+        for theta in np.arange(4, 12.5, 0.5):
+            reference = thrust(np.linspace(0, 1, 8001), theta)
+            uniform.append(abs(thrust(kernels.element_edges(cutout, 200), theta) / reference - 1))
+            edges = self.rotor._refine_grid(kernels.element_edges(cutout, 10, "cosine"), theta, self.density, 2e-3)
+            reference = thrust(np.linspace(cutout, 1, 8001), theta)
+            adapted.append(abs(thrust(edges, theta) / reference - 1))
+            elements.append(len(edges) - 1)
+        self.assertLessEqual(np.mean(elements), 50) # A quarter of the uniform elements.
+        self.assertLess(max(adapted), max(uniform))
+        self.assertLess(np.mean(adapted), np.mean(uniform))
+
+        self.rotor.hover(self.gross, self.density, n=30, spacing="cosine")
+        self.assertEqual(len(self.rotor.spanwise), 30)
+        self.assertAlmostEqual(np.sum(self.rotor.spanwise.thrust_per_span * self.rotor.spanwise.width), self.rotor.hover_thrust)
+
+        with profiling.Profiler():
+            self.rotor.hover(self.gross, self.density, n=10, spacing="cosine", tolerance=2e-3)
+            first = self.rotor.hover_stats
+            edges = self.rotor.element_edges
+            self.rotor.hover(self.gross, self.density, n=10, spacing="cosine", tolerance=2e-3)
+        self.assertTrue(11 < len(edges) <= 61)
+        self.assertGreaterEqual(self.rotor.hover_thrust, self.gross * 9.81)
+        np.testing.assert_array_equal(self.rotor.element_edges, edges) # Adapted grid reused.
+        self.assertEqual(self.rotor.hover_stats.counters.get("refinement_checks", 0), 0)
+        self.assertGreater(first.counters["refinement_checks"], 1)
+
+    def test_blade_distributions(self):
+        self.rotor.hover(self.gross, self.density)
+        for washout in ([0.0, -9.0], lambda x: -9.0 * x, [[0.0, 0.0], [1.0, -9.0]]):
+            rotor = fixture_rotor(washout=washout, chord=[0.17, 0.17])
+            self.assertAlmostEqual(rotor.washout, -9.0)
+            self.assertAlmostEqual(rotor.chord, 0.17)
+            rotor.hover(self.gross, self.density)
+            self.assertEqual(rotor.theta, self.rotor.theta)
+            self.assertAlmostEqual(rotor.hover_power_total, self.rotor.hover_power_total, delta=1e-6 * self.rotor.hover_power_total)
+
+        # Nonlinear washout: twist concentrated at the tip.
+        twist, chord = fixture_rotor(washout=lambda x: -9.0 * x**2).blade_sections(np.array([0.0, 0.5, 1.0]))
+        np.testing.assert_allclose(twist, [0.0, -2.25, -9.0])
+        np.testing.assert_allclose(chord, 0.17)
+
+        tapered = fixture_rotor(chord=[[0.0, 0.2], [0.7, 0.2], [1.0, 0.1]])
+        self.assertAlmostEqual(tapered.chord, 3 * np.trapezoid(tapered.chord_distribution(np.linspace(0, 1, 10001)) *
+                                                              np.linspace(0, 1, 10001)**2, dx=1e-4), places=6)
+        tapered.hover(self.gross, self.density)
+        self.assertGreaterEqual(tapered.hover_thrust, self.gross * 9.81)
+        self.assertEqual(len(tapered.spanwise.chord), len(tapered.spanwise))
+
+        trimmed = fixture_rotor(washout=lambda x: -9.0 * x).trim([20.0, 40.0], self.density, 0.557, weight=self.gross, n_azimuth=12, n=10)
+        reference = fixture_rotor().trim([20.0, 40.0], self.density, 0.557, weight=self.gross, n_azimuth=12, n=10)
+        np.testing.assert_allclose(trimmed["theta0"], reference["theta0"], rtol=1e-6)
+        self.assertTrue(np.all(tapered.trim(30.0, self.density, 0.557, weight=self.gross, n_azimuth=12, n=10)["converged"]))
+
+        for chord in ([0.17], [[1.0, 0.1], [0.0, 0.2]], np.ones((3, 3))):
+            with self.assertRaises(ValueError):
+                fixture_rotor(chord=chord)
+
+    def test_profiling(self):
+        self.rotor.hover(self.gross, self.density)
+        self.assertFalse(hasattr(self.rotor, "hover_stats"))
+        with profiling.Profiler() as prof:
+            self.rotor.hover(self.gross, self.density)
+            self.rotor.forward_flight(40.0, self.density, 0.557)
+        stats = self.rotor.hover_stats
+        self.assertEqual(stats["polar_lookups"], 10 * stats["inner_iterations"])
+        self.assertGreater(stats["theta_steps"], 0)
+        self.assertEqual(prof.stats["walds_solver_calls"], 1)
+        self.assertEqual(prof.stats["inner_iterations"], stats["inner_iterations"])
+        self.assertFalse(profiling.is_enabled())
+
+        with profiling.Profiler() as prof:
+            self.rotor.polar.get_polar(np.arange(5.0))
+        self.assertEqual(prof.stats["polar_lookups"], 5)
+
+    def test_inflow_convergence(self):
+        kernel = self.rotor._hover_kernel(1)
+        iterations = kernel.solve(0.0, max_iterations=100)
+        self.assertLess(iterations, 100)
+        self.assertTrue(kernel.converged)
+        # Converging on the last allowed iteration is not a capped iteration.
+        self.assertEqual(kernel.solve(0.0, max_iterations=iterations), iterations)
+        self.assertTrue(kernel.converged)
+        kernel.solve(0.0, max_iterations=iterations - 1)
+        self.assertFalse(kernel.converged)
+
+    def test_velocity_sweep(self):
+        rotor = fixture_rotor()
+        rotor.hover(1361)
+        with profiling.Profiler():
+            result = rotor.velocity_sweep(10, 80, 1.225, 0.557)
+        self.assertIs(result, rotor.sweep_results)
+        self.assertLess(len(result["velocity"]), 35)
+        self.assertTrue(np.all(np.diff(result["velocity"]) > 0))
+        self.assertEqual((result["velocity"][0], result["velocity"][-1]), (10, 80))
+        self.assertLess(rotor.velocity_sweep_stats.counters["wald_iterations"], 50 * 100)
+
+        normalized_flight_speed = result["velocity"] / rotor.hover_induced_vel
+        exact = np.sqrt((np.sqrt(normalized_flight_speed**4 + 4) - normalized_flight_speed**2) / 2) # Closed form at alfa=0.
+        np.testing.assert_allclose(result["downwash_velocity_ratio"], exact, rtol=1e-7)
+        rotor.forward_flight(float(result["velocity"][5]), 1.225, 0.557, initial_downwash=exact[5], wald_tolerance=1e-12)
+        self.assertAlmostEqual(result["power_total"][5] / rotor.power_total, 1, places=7)
 
+        dense = rotor.velocity_sweep(10, 80, 1.225, 0.557, initial_points=141, max_points=141)
+        self.assertAlmostEqual(result["velocity"][np.argmin(result["power_total"])], dense["velocity"][np.argmin(dense["power_total"])], delta=1)
+        self.assertAlmostEqual(result["velocity"][np.argmax(result["ld"])], dense["velocity"][np.argmax(dense["ld"])], delta=1)
 
-    def test_calculate_thrust(self):
-        expected_thrust = self.density * self.num_blades * self.chord * (self.rotor_diameter*0.5)**3 * self.rpm_in_hz**2 * self.cl / 6
-        self.assertAlmostEqual(self.test_rotor.get_thrust(self.density), expected_thrust)
+        with self.assertRaises(ValueError):
+            rotor.velocity_sweep(80, 10)
+
+    def test_optimal_speeds(self):
+        rotor = fixture_rotor()
+        with profiling.Profiler():
+            speeds = rotor.optimal_speeds(1361, 1.225, 0.557)
+            self.assertEqual(rotor.optimal_speeds(1361, 1.225, 0.557), speeds)
+        self.assertEqual(rotor.optimal_speeds_stats.counters["optimal_speeds_cache_hits"], 1)
+        self.assertLess(speeds["evaluations"], 25)
+        self.assertEqual((rotor.velocity_min_power, rotor.velocity_best_range), (speeds["velocity_min_power"], speeds["velocity_best_range"]))
+
+        dense = rotor.velocity_sweep(5, 100, 1.225, 0.557, initial_points=381, max_points=381) # 0.25 m/s spacing.
+        velocity = dense["velocity"]
+        self.assertAlmostEqual(speeds["velocity_min_power"], velocity[np.argmin(dense["power_total"])], delta=0.25)
+        self.assertAlmostEqual(speeds["velocity_best_range"], velocity[np.argmax(velocity / dense["power_total"])], delta=0.25)
+        self.assertLessEqual(speeds["power_min_power"], dense["power_total"].min())
+        self.assertLess(speeds["velocity_min_power"], speeds["velocity_best_range"])
+
+        self.assertGreater(rotor.optimal_speeds(None, 1.225, 1.5)["velocity_best_range"], 0) # Current hover, more body drag.
+        self.assertLess(rotor.velocity_best_range, speeds["velocity_best_range"])
+        with self.assertRaises(ValueError):
+            rotor.optimal_speeds(1361, min_velocity=50, max_velocity=20)
+
+    def test_sensitivities(self):
+        parameters = ("chord", "washout", "density", "flat_plate_area")
+        with profiling.Profiler():
+            self.rotor.hover(self.gross, self.density)
+            central = self.rotor.sensitivities(parameters, density=self.density, velocity=40.0, flat_plate_area=0.557)
+        self.assertEqual(self.rotor.jacobian.shape, (len(self.rotor.jacobian_outputs), 4))
+        self.assertAlmostEqual(central["hover_thrust"]["density"], self.rotor.hover_thrust / self.density, places=3) # Thrust ~ density at fixed collective.
+        self.assertAlmostEqual(central["power_parasite"]["flat_plate_area"], self.density * 40.0**3 / 2, places=3)
+        self.assertGreater(central["hover_power_total"]["chord"], 0)
+        # The 9 warm-started solves take fewer iterations than the single cold hover sweep.
+        self.assertLess(self.rotor.sensitivity_stats["inner_iterations"], self.rotor.hover_stats["inner_iterations"])
+
+        forward = self.rotor.sensitivities(parameters, density=self.density, velocity=40.0, flat_plate_area=0.557, method="forward")
+        for output in central:
+            for parameter in parameters:
+                self.assertAlmostEqual(forward[output][parameter], central[output][parameter], delta=1e-5 * max(abs(central[output][parameter]), 1))
+        parallel = self.rotor.sensitivities(parameters, density=self.density, velocity=40.0, flat_plate_area=0.557, workers=2)
+        self.assertEqual(parallel, central)
+
+        with self.assertRaises(ValueError):
+            self.rotor.sensitivities(("velocity",))
+        with self.assertRaises(ValueError):
+            self.rotor.sensitivities(("chord",), method="complex")
+
+    def test_induced_velocity_element_grids(self):
+        # The mean inflow is weighted by the element widths, so it doesn't depend on how the elements are spaced over the span.
+        self.rotor.hover(self.gross, self.density, n=400, spacing="cosine")
+        reference = self.rotor.hover_induced_vel
+        for grid in ({"n": 30, "spacing": "cosine"}, {"n": 10, "spacing": "cosine", "tolerance": 2e-3}):
+            self.rotor.hover(self.gross, self.density, **grid)
+            self.assertAlmostEqual(self.rotor.hover_induced_vel, reference, delta=1e-3 * reference)
+
+    def test_sensitivities_element_grids(self):
+        for grid in ({"n": 30, "spacing": "cosine"}, {"n": 10, "spacing": "cosine", "tolerance": 1e-5}):
+            self.rotor.hover(self.gross, self.density, **grid)
+            edges, thrust = self.rotor.element_edges, self.rotor.hover_thrust
+            derivatives = self.rotor.sensitivities(("chord", "density"), density=self.density)
+            np.testing.assert_array_equal(self.rotor.element_edges, edges)
+            # Thrust ~ density at fixed collective, on the grid the collective was found on.
+            self.assertAlmostEqual(derivatives["hover_thrust"]["density"], thrust / self.density, delta=1e-6 * thrust)
+            self.assertGreater(derivatives["hover_power_total"]["chord"], 0)
+
+        # A root cutout change moves the grid spanning the blade from the cutout.
+        def thrust(cutout):
+            edges = kernels.element_edges(cutout, 30, "cosine")
+            kernel = rotor._hover_kernel(30, edges)
+            kernel.solve(rotor.theta)
+            return rotor._kernel_thrust(kernel, np.diff(edges) * rotor.r, self.density)
+
+        rotor = fixture_rotor(rotor_root_cutout=0.2)
+        rotor.hover(self.gross, self.density, n=30, spacing="cosine")
+        derivative = rotor.sensitivities(("rotor_root_cutout",), density=self.density)["hover_thrust"]["rotor_root_cutout"]
+        self.assertAlmostEqual(derivative, (thrust(0.2001) - thrust(0.1999)) / 2e-4, delta=1e-5 * abs(derivative))
+        self.assertLess(derivative, 0)
+
+    def test_sensitivities_distributions(self):
+        rotor = fixture_rotor(chord=[[0.0, 0.2], [0.7, 0.2], [1.0, 0.1]], washout=[0.0, -4.0, -9.0])
+        rotor.hover(self.gross, self.density)
+        parameters = ("chord", "washout", "density")
+        serial = rotor.sensitivities(parameters, density=self.density)
+        self.assertEqual(rotor.sensitivities(parameters, density=self.density, workers=2), serial)
+
+
+class TestBatch(unittest.TestCase):
+    def test_hover_batch_matches_rotor(self):
+        geometry = {"num_blades": np.array([5, 4, 3]), "chord": np.array([0.17, 0.2, 0.25]), "rotor_diameter": np.array([8.05, 9.0, 10.0]),
+                    "tip_speed_mach": np.array([0.604, 0.6, 0.62]), "washout": np.array([-9.0, -8.0, -5.0])}
+        weights = np.array([1361, 1500, 2000])
+        batch = hover_batch(fixture_polar(), rotor_root_cutout=0.032, weight=weights, density=1.225, n=10, **geometry)
+        self.assertEqual(len(batch), 3)
+        for i in range(3):
+            rotor = fixture_rotor(**{key: value[i] for key, value in geometry.items()})
+            rotor.hover(weights[i], 1.225, 10)
+            self.assertEqual(batch.theta[i], rotor.theta)
+            self.assertAlmostEqual(batch.hover_thrust[i], rotor.hover_thrust, places=6)
+            self.assertAlmostEqual(batch.hover_power_total[i], rotor.hover_power_total, places=4)
+
+
+class TestMonteCarlo(unittest.TestCase):
+    def test_fixed_inputs_match_rotor(self):
+        rotor = fixture_rotor()
+        result = monte_carlo(rotor, 300, weight=1361, velocity=40.0, flat_plate_area=1.2, chunk_size=128, workers=0, seed=1)
+        rotor.hover(1361)
+        rotor.forward_flight(40.0, flat_plate_area=1.2)
+        self.assertEqual(result["theta"].count, 300)
+        self.assertAlmostEqual(result["hover_power_total"].mean, rotor.hover_power_total, places=4)
+        self.assertAlmostEqual(result["power_total"].mean, rotor.power_total, delta=1e-7 * rotor.power_total) # Exact vs iterated Wald.
+        self.assertAlmostEqual(result["power_total"].std, 0, places=6)
+        self.assertNotIn("range", result)
+
+        distributed = fixture_rotor(chord=[0.26, 0.20, 0.14], washout=[[0, 0], [0.7, -9], [1, -9]])
+        result = monte_carlo(distributed, 10, weight=1361, workers=0, seed=1)
+        distributed.hover(1361)
+        self.assertAlmostEqual(result["hover_power_total"].mean, distributed.hover_power_total, places=4)
+
+    def test_uncertain_inputs(self):
+        inputs = dict(weight=1361, density=Normal(1.225, 0.02), velocity=Normal(40, 2), flat_plate_area=Uniform(1.0, 1.4), sfc=0.3,
+                      fuel=Normal(200, 10), cd_scale=Normal(1, 0.05), chunk_size=200, seed=3)
+        result = monte_carlo(fixture_rotor(), 1000, workers=0, **inputs)
+        summary = result.summary()
+        self.assertEqual(summary["range"]["count"], 1000)
+        self.assertLess(summary["range"]["p5"], summary["range"]["p50"])
+        self.assertLess(summary["range"]["p50"], summary["range"]["p95"])
+
+        # Fast and thin conditions, where Wald's equation is hard to iterate, are all solved.
+        fast = monte_carlo(fixture_rotor(), 500, weight=1361, density=1.0, velocity=Uniform(10, 80), flat_plate_area=0.557, workers=0, seed=3)
+        self.assertEqual((fast["power_total"].count, fast["power_total"].rejected), (500, 0))
+        self.assertGreater(summary["power_total"]["std"], 0)
+        self.assertEqual(monte_carlo(fixture_rotor(), 1000, workers=2, **inputs).summary(), summary)
+        with self.assertRaises(ValueError):
+            monte_carlo(fixture_rotor(), 10, fuel=200)
+
+    def test_running_stats(self):
+        values = np.random.default_rng(0).normal(size=200000)
+        stats = RunningStats(256, 0)
+        for chunk in np.split(values, 40):
+            chunk_stats = RunningStats(256, 1)
+            chunk_stats.update(chunk)
+            stats.merge(chunk_stats)
+        stats.update([np.nan])
+        self.assertAlmostEqual(stats.mean, values.mean(), places=10)
+        self.assertAlmostEqual(stats.std, values.std(ddof=1), places=10)
+        self.assertEqual(stats.rejected, 1)
+        self.assertLess(sum(level.size for level in stats.sketch.levels), 5000)
+        ranks = np.searchsorted(np.sort(values), stats.percentile([5, 50, 95])) / values.size
+        np.testing.assert_allclose(ranks, [0.05, 0.5, 0.95], atol=0.01)
+
+
+class TestResults(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def check_resume(self, extension):
+        path = os.path.join(self.directory.name, "sweep" + extension)
+        rotor = fixture_rotor()
+        self.assertEqual(sweep(rotor, [1000, 1361], [1.0, 1.225], [20, 40], sink=path), 8)
+        if extension != ".parquet":
+            with open(path, "r+b") as file: # Cut the last record as a crash would.
+                file.truncate(os.path.getsize(path) - 20)
+        self.assertEqual(sweep(rotor, [1000, 1361, 1500], [1.0, 1.225], [20, 40], sink=path), 4 if extension == ".parquet" else 5)
+        with open_sink(path, SWEEP_FIELDS, ("weight", "density", "velocity"), resume=True) as sink:
+            self.assertEqual(len(sink), 12)
+            self.assertTrue(sink.has((1361, 1.225, 40)))
+            self.assertFalse(sink.has((1361, 1.225, 60)))
+
+    def test_jsonl_resume(self):
+        self.check_resume(".jsonl")
+
+    def test_csv_resume(self):
+        self.check_resume(".csv")
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet_resume(self):
+        self.check_resume(".parquet")
+
+    def test_sweep_records(self):
+        records = sweep(fixture_rotor(), [1361], [1.225], [40.0], flat_plate_area=0.557)
+        rotor = fixture_rotor()
+        rotor.hover(1361)
+        rotor.forward_flight(40.0, flat_plate_area=0.557)
+        self.assertEqual(tuple(records[0]), SWEEP_FIELDS)
+        self.assertAlmostEqual(records[0]["power_total"], rotor.power_total, places=4)
+        self.assertIsNone(sweep(fixture_rotor(), [1361], [1.225])[0]["power_total"])
+
+        distributed = fixture_rotor(chord=[0.26, 0.20, 0.14], washout=[[0, 0], [0.7, -9], [1, -9]])
+        record = sweep(distributed, [1361], [1.225])[0]
+        distributed.hover(1361)
+        self.assertEqual(record["theta"], distributed.theta)
+        self.assertAlmostEqual(record["hover_power_total"], distributed.hover_power_total, places=4)
+
+    def test_sink_schema(self):
+        batch = hover_batch(fixture_polar(), 5, 0.17, 8.05, 0.604, -9, weight=[1000, 1361])
+        fields = result_fields(batch)
+        self.assertNotIn("induced_vel", fields)
+        path = os.path.join(self.directory.name, "batch.jsonl")
+        with open_sink(path, fields, buffer_size=1) as sink:
+            sink.write_many(result_records(batch))
+            with self.assertRaises(ValueError):
+                sink.write({"unknown": 1})
+        with open(path) as file:
+            self.assertEqual(len(file.readlines()), 2)
+        with self.assertRaises(ValueError):
+            open_sink(path.replace(".jsonl", ".xlsx"), fields)
+        with self.assertRaises(ValueError):
+            open_sink(path, fields, resume=True)
+
+
+def read_grid_value(path, name, index):
+    """Reads a grid value in a worker process."""
+    return float(open_grid(path)[name][index])
+
+
+class TestPerformanceGrid(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "md500e.perfdb")
 
-    def test_calculate_horsepower(self, thrust):
+    def tearDown(self):
+        self.directory.cleanup()
 
-        watts = thrust**1.5 / (self.tip_loss * np.sqrt(2*self.density*self.rotor_disk_area)) + self.density*self.num_blades*self.chord*(self.rotor_radius**4) * (self.rpm_in_hz**3) * self.cd / 8
-        expected_horsepower = watts * 0.00134102209
-        self.assertAlmostEqual(self.test_rotor.get_horsepower(self.density), expected_horsepower)
+    def test_compute_and_open(self):
+        grid = compute_grid(fixture_rotor(), self.path, [1000, 1361], [1.0, 1.225], [20, 30, 40], flat_plate_area=0.557, chunk_size=3)
+        self.assertIsInstance(grid["power_total"], np.memmap)
+        self.assertEqual(grid["power_total"].shape, (2, 2, 3))
+        self.assertEqual(grid["theta"].shape, (2, 2))
+        records = sweep(fixture_rotor(), [1361], [1.225], [40], flat_plate_area=0.557)
+        self.assertAlmostEqual(grid.interpolate("power_total", weight=1361, density=1.225, velocity=40), records[0]["power_total"], places=6)
+        self.assertEqual(grid.metadata["rotor"]["chord"], MD500E["chord"])
+        with self.assertRaises(ValueError):
+            grid.interpolate("theta", weight=1361)
 
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(1) as executor:
+            self.assertEqual(executor.submit(read_grid_value, self.path, "power_total", (1, 1, 1)).result(), float(grid["power_total"][1, 1, 1]))
 
+    def test_save_grid(self):
+        axes = {"weight": [1000.0, 2000.0], "density": [1.0, 1.1, 1.2]}
+        save_grid(self.path, axes, {"theta": np.arange(6.0).reshape(2, 3)}, {"note": "test"})
+        save_grid(self.path, axes, {"theta": np.ones((2, 3))}) # Replaces the bundle.
+        grid = open_grid(self.path, mmap_mode=None)
+        np.testing.assert_array_equal(grid["theta"], np.ones((2, 3)))
+        self.assertEqual(os.listdir(self.directory.name), ["md500e.perfdb"])
+        with self.assertRaises(ValueError):
+            save_grid(self.path, axes, {"theta": np.ones((3, 2))})
 
-# class TestPycopter(unittest.TestCase):
-#     """Tests for `pycopter` package."""
 
-#     def setUp(self):
-#         """Set up test fixtures, if any."""
+class TestFactory(unittest.TestCase):
+    def test_rotors_are_interned(self):
+        factory = RotorFactory(max_rotors=2, quiet=True)
+        rotor = factory.get(**MD500E)
+        self.assertIs(factory.get(**dict(MD500E, airfoil="NACA0015")), rotor)
+        for weight in (1000, 1361):
+            factory.get(**MD500E).hover(weight, 1.225)
+        self.assertEqual(factory.stats["rotors_built"], 1)
+
+        wider = factory.get(**dict(MD500E, chord=0.171)) # Reynolds number within the tolerance.
+        self.assertIsNot(wider, rotor)
+        self.assertIs(wider.polar, rotor.polar)
+        self.assertEqual((factory.stats["polars_built"], factory.stats["polar_hits"]), (1, 1))
+
+        factory.get(**dict(MD500E, chord=0.25))
+        self.assertEqual(factory.stats["polars_built"], 2)
+        self.assertEqual(len(factory), 2)
+        self.assertIsNot(factory.get(**MD500E), rotor) # Evicted.
+
+    def test_chord_distributions(self):
+        factory = RotorFactory(quiet=True)
+        rotor = factory.get(**MD500E)
+        tapered = lambda x: 0.19 - 0.025 * x
+        for chord in ([0.17, 0.17], tapered):
+            distributed = factory.get(**dict(MD500E, chord=chord))
+            self.assertIsNot(distributed, rotor)
+            self.assertIs(distributed.polar, rotor.polar) # Requested for the equivalent chord.
+            self.assertIs(factory.get(**dict(MD500E, chord=chord)), distributed)
+        self.assertAlmostEqual(distributed.chord, 0.19 - 0.025 * 3 / 4, places=6)
+        self.assertEqual(factory.stats["polars_built"], 1)
+
+    def test_rotor_key(self):
+        polar = fixture_polar()
+        self.assertEqual(RotorFactory.rotor_key(**MD500E), RotorFactory.rotor_key(**dict(MD500E, num_blades=5.0)))
+        self.assertNotEqual(RotorFactory.rotor_key(**MD500E), RotorFactory.rotor_key(**dict(MD500E, washout=-8)))
+        self.assertNotEqual(RotorFactory.rotor_key(**MD500E), RotorFactory.rotor_key(**dict(MD500E, polar=polar)))
+
+
+class TestPopulation(unittest.TestCase):
+    def setUp(self):
+        self.polar = fixture_polar()
+        self.geometries = [RotorGeometry(**dict(MD500E, chord=chord, polar=self.polar)) for chord in (0.15, 0.17, 0.2)]
+
+    def test_rejects_distributions(self):
+        with self.assertRaises(ValueError):
+            RotorPopulation.from_geometries([RotorGeometry(**dict(MD500E, chord=[0.2, 0.15], polar=self.polar))])
+
+    def test_geometry(self):
+        geometry = self.geometries[1]
+        self.assertFalse(hasattr(geometry, "__dict__"))
+        population = RotorPopulation.from_geometries(self.geometries)
+        self.assertEqual(population.geometry(1), geometry)
+        self.assertEqual(population.polars, [self.polar])
+        self.assertEqual(population.nbytes, 3 * (len(population.columns) + 1) * 8)
+
+    def test_hover_filter_rank(self):
+        population = RotorPopulation.from_geometries(self.geometries).hover(1361, 1.225)
+        rotor = self.geometries[1].rotor()
+        rotor.hover(1361, 1.225)
+        self.assertAlmostEqual(population["hover_power_total"][1], rotor.hover_power_total, places=6)
+        self.assertEqual(population["theta"][1], rotor.theta)
+
+        population.forward_flight(40, 1.225, 0.557)
+        rotor.forward_flight(40, 1.225, 0.557)
+        self.assertAlmostEqual(population["power_total"][1], rotor.power_total, places=6)
+
+        ranked = population.rank("merit", descending=True)
+        self.assertTrue(np.all(np.diff(ranked["merit"]) <= 0))
+        self.assertIs(ranked.polars[0], self.polar)
+        best = population.rank("power_total", top=1)
+        self.assertEqual(len(best), 1)
+        self.assertEqual(best["power_total"][0], population["power_total"].min())
+        selected = population.where(chord=(0.16, None), merit=(None, 1))
+        np.testing.assert_array_equal(selected["chord"], [0.17, 0.2])
+        self.assertEqual(len(population[population["chord"] < 0.16]), 1)
+
+
+class TestCopter(unittest.TestCase):
+    def setUp(self):
+        self.rotor = fixture_rotor()
+
+    def test_single_rotor_matches_rotor(self):
+        copter = Copter([self.rotor])
+        copter.hover(1361, 1.225)
+        copter.forward_flight(40, 1.225, 0.557)
+        self.rotor.hover(1361, 1.225)
+        self.rotor.forward_flight(40, 1.225, 0.557)
+        self.assertAlmostEqual(copter.hover_power_total, self.rotor.hover_power_total, places=6)
+        self.assertAlmostEqual(copter.power_total, self.rotor.power_total, delta=1e-7 * self.rotor.power_total) # Exact vs iterated Wald.
+        self.assertAlmostEqual(copter.ld, self.rotor.hover_thrust / (self.rotor.drag_induced + self.rotor.drag_profile + self.rotor.body_drag),
+                               places=5)
+        self.assertEqual((copter.hover_power_tail, copter.tail_rotor_factor), (0, 1))
+
+    def test_forward_flight_sweep_finite(self):
+        copter = Copter.single_main_rotor(self.rotor)
+        copter.hover(1361, 1.0)
+        velocities = np.linspace(10, 80, 27)
+        copter.forward_flight(velocities, 1.0, 0.557)
+        self.assertTrue(np.all(np.isfinite(copter.power_total)))
+        self.assertTrue(np.all(np.isfinite(copter.tail_rotor_factor)))
+
+    def test_distributed_rotor_matches_rotor(self):
+        rotor = fixture_rotor(chord=[0.26, 0.20, 0.14], washout=[[0, 0], [0.7, -9], [1, -9]])
+        copter = Copter([rotor, fixture_rotor()], thrust_shares=[0.5, 0.5])
+        copter.hover(2722, 1.225)
+        rotor.hover(1361, 1.225)
+        self.assertEqual(copter.rotor_theta[0], rotor.theta)
+        self.assertAlmostEqual(copter.rotor_power_profile[0], rotor.hover_power_profile, places=6)
+        self.assertAlmostEqual(copter.rotor_thrust[0], rotor.hover_thrust, places=6)
+
+    def test_tail_rotor(self):
+        copter = Copter.single_main_rotor(self.rotor)
+        self.assertIs(copter.tail_rotor.polar, self.rotor.polar)
+        copter.hover(1361, 1.225)
+        torque = copter.hover_power_main / self.rotor.omega
+        self.assertAlmostEqual(copter.hover_tail_thrust, torque / copter.tail_arm)
+        self.assertTrue(1.02 < copter.hover_tail_rotor_factor < 1.2)
+
+        velocities = np.array([20.0, 40.0, 60.0])
+        copter.forward_flight(velocities, 1.225, 0.557)
+        self.assertEqual(copter.tail_rotor_factor.shape, (3,))
+        np.testing.assert_allclose(copter.power_total, copter.power_main + copter.power_tail)
+        self.assertTrue(np.all(copter.tail_rotor_factor > 1))
+        copter.forward_flight(40.0, 1.225, 0.557)
+        self.assertAlmostEqual(copter.tail_rotor_factor, 1 + copter.power_tail / copter.power_main)
+
+    def test_configurations(self):
+        half = fixture_rotor()
+        half.hover(1361 / 2, 1.225)
+        coaxial = Copter.coaxial(self.rotor)
+        coaxial.hover(1361, 1.225)
+        self.assertAlmostEqual(coaxial.hover_power_total, 2 * (1.16 * half.hover_power_induced + half.hover_power_profile), places=6)
+
+        np.testing.assert_allclose(Copter.tandem(self.rotor, 0).interference, np.sqrt(2))
+        np.testing.assert_allclose(Copter.tandem(self.rotor, 2 * self.rotor.r).interference, 1)
+        self.assertTrue(1 < Copter.tandem(self.rotor).interference[0] < np.sqrt(2))
+
+        quad = Copter.multicopter(self.rotor, 4)
+        with profiling.Profiler() as prof:
+            quad.hover(1361 * 2, 1.225)
+        self.assertEqual(prof.stats.counters["theta_steps"], quad.rotor_theta[0] * 2 + 1) # One solve for the four identical rotors.
+        self.assertAlmostEqual(quad.hover_power_total, 4 * half.hover_power_total, places=6)
+        with self.assertRaises(ValueError):
+            Copter([self.rotor], thrust_shares=[1, 1])
+
+
+class TestEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = Engine("TV3-117", engines=2)
+
+    def test_deck_lookup(self):
+        self.assertAlmostEqual(atmosphere_density(0), 1.225, places=3)
+        self.assertAlmostEqual(self.engine.power_available(atmosphere_density(0)), 2 * 1250)
+        self.assertAlmostEqual(self.engine.fuel_flow(2 * 625, atmosphere_density(0)), 2 * 207.19) # Deck point.
+        densities = np.linspace(0.7, 1.225, 5)
+        self.assertTrue(np.all(np.diff(self.engine.power_available(densities)) > 0))
+
+        power = np.linspace(300, 2400, 8)[:, None]
+        fuel_flow = self.engine.fuel_flow(power, densities)
+        self.assertEqual(fuel_flow.shape, (8, 5))
+        sfc = self.engine.sfc(power, 1.225)
+        self.assertTrue(np.all(np.diff(sfc[:, 0]) < 0)) # Part power burns more fuel per power.
+        self.assertGreater(sfc[0, 0] / sfc[-1, 0], 1.2)
+        self.assertTrue(np.isnan(self.engine.fuel_flow(2600, 1.225)))
+
+    def test_deck_edges(self):
+        low, high = self.engine.densities[[0, -1]]
+        self.assertEqual(self.engine.power_available(1.5), self.engine.power_available(high)) # Not extrapolated.
+        self.assertEqual(self.engine.power_available(0.05), self.engine.power_available(low))
+        self.assertEqual(self.engine.fuel_flow(1000, [0.05, 1.5]).tolist(), self.engine.fuel_flow(1000, [low, high]).tolist())
+
+    def test_range_with_deck(self):
+        breguet_range, endurance = range_endurance(600e3, 5, 13000, 1500, self.engine, density=1.0)
+        engine_power = 1.13 / 0.9 * 600
+        sfc = self.engine.sfc(engine_power, 1.0)
+        self.assertEqual((breguet_range, endurance), range_endurance(600e3, 5, 13000, 1500, sfc))
+        self.assertAlmostEqual(endurance, 1500 / self.engine.fuel_flow(engine_power, 1.0))
+
+    def test_bad_deck(self):
+        with self.assertRaises(FileNotFoundError):
+            Engine("no-such-engine")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "deck.txt")
+            np.savetxt(path, [[0, 15, 0.5, 1000, 200], [0, 15, 1.0, 1000, 300], [1000, 8.5, 1.0, 900, 270]])
+            with self.assertRaises(ValueError):
+                Engine(path)
+
+
+class TestElectric(unittest.TestCase):
+    def test_ideal_pack(self):
+        battery = Battery(peukert=1.0, cell_resistance=0.0, min_cell_voltage=0.0)
+        motor = ElectricMotor(1.0, efficiency_map=[[0, 1.0], [1, 1.0]], esc_efficiency=1.0)
+        result = discharge(battery, motor, 0.3)
+        soc = np.linspace(battery.min_soc, 1, 1001)
+        energy = np.trapezoid(battery.open_circuit_voltage(soc), soc) * battery.capacity / 1000 # [kWh]
+        self.assertAlmostEqual(result["endurance"] / (energy / 0.3), 1, delta=0.01)
+        self.assertAlmostEqual(result["energy"], 0.3 * result["endurance"])
+        self.assertAlmostEqual(result["soc"], battery.min_soc)
+
+    def test_losses(self):
+        battery = Battery()
+        motor = ElectricMotor(1.0)
+        naive = battery.energy / 0.3
+        result = discharge(battery, motor, 0.3)
+        self.assertLess(result["endurance"], 0.85 * naive)
+        self.assertGreater(result["endurance"], 0.5 * naive)
+        self.assertLess(result["voltage"], battery.open_circuit_voltage(1.0))
+        self.assertTrue(np.isnan(battery.current(1e4, 1.0))) # Beyond the pack's maximum power.
+
+    def test_variants(self):
+        battery = Battery.from_energy(np.linspace(0.5, 2, 20)[:, None], voltage=48)
+        motor = ElectricMotor(2.0)
+        power = np.linspace(0.2, 1.5, 30)
+        result = discharge(battery, motor, power)
+        self.assertEqual(result["endurance"].shape, (20, 30))
+        self.assertTrue(np.all(np.diff(result["endurance"], axis=0) > 0))
+        self.assertTrue(np.all(np.diff(result["endurance"], axis=1) < 0))
+        self.assertTrue(np.all(discharge(battery, motor, 2.5)["endurance"] == 0)) # Above the motor power.
+        fixed = discharge(Battery.from_energy(1.0, voltage=48), motor, 0.5, dt=1.0)
+        adaptive = discharge(Battery.from_energy(1.0, voltage=48), motor, 0.5)
+        self.assertAlmostEqual(adaptive["endurance"], fixed["endurance"], delta=0.005 * fixed["endurance"])
+
+    def test_profile(self):
+        battery, motor = Battery(), ElectricMotor(1.0)
+        constant = discharge(battery, motor, 0.4)
+        profile = discharge(battery, motor, lambda time: np.where(time < 600, 0.8, 0.4))
+        self.assertLess(profile["endurance"], constant["endurance"])
+        self.assertGreater(profile["energy"], 0)
+
+
+class TestTrim(unittest.TestCase):
+    def setUp(self):
+        self.rotor = fixture_rotor()
+        self.rotor.hover(1361, 1.225)
+
+    def loads(self, state, velocity):
+        rotor = self.rotor
+        return trim_loads(state, velocity, 1.225, 0.557, rotor.hover_thrust, rotor.r, rotor.omega, rotor.num_blades, rotor.chord,
+                          rotor.washout, rotor.polar.polar, rotor.rotor_root_cutout)
+
+    def test_vectorized_loads(self):
+        states = np.array([[12, -1, 1, 0.03], [14, -2, 2, 0.02], [15, 0, 0, 0.04]])
+        stacked = self.loads(states, 30)
+        for i, state in enumerate(states):
+            single = self.loads(state, 30)
+            np.testing.assert_allclose(stacked["residual"][i], single["residual"], rtol=1e-12, atol=1e-15)
+            self.assertAlmostEqual(stacked["power"][i], single["power"])
+        f, jacobian = trim_jacobian(lambda states: self.loads(states, 30)["residual"], states[1])
+        np.testing.assert_allclose(f, stacked["residual"][1])
+        self.assertGreater(jacobian[0, 0], 0) # More collective, more thrust.
+
+    def test_trim_sweep(self):
+        velocities = np.arange(10, 85, 5.0)
+        trimmed = self.rotor.trim(velocities, 1.225, 0.557)
+        self.assertTrue(trimmed["converged"].all())
+        self.assertLessEqual(trimmed["jacobians"].sum(), 4) # Reused across the velocities.
+        self.assertLess(trimmed["iterations"].max(), 12)
+        self.assertTrue(np.all(np.diff(trimmed["alfa"]) > 0)) # The disk tilts forward with the body drag.
+        self.assertTrue(np.all(np.diff(trimmed["theta1s"]) < 0))
+        for i in (0, 6, -1):
+            residual = self.loads([trimmed[name][i] for name in ("theta0", "theta1s", "alfa", "inflow_ratio")], velocities[i])["residual"]
+            self.assertLess(np.linalg.norm(residual), 1e-8)
+        self.assertAlmostEqual(self.rotor.alfa_trim, trimmed["alfa"][-1])
+
+        momentum = []
+        for velocity in velocities[:-2]: # Wald's iteration doesn't converge from a cold start at the highest speeds.
+            self.rotor.forward_flight(float(velocity), 1.225, 0.557)
+            momentum.append(self.rotor.power_total)
+        np.testing.assert_allclose(trimmed["power_total"][:-2], momentum, rtol=0.1)
+
+    def test_forward_flight_trim(self):
+        self.rotor.forward_flight(40.0, 1.225, 0.557, trim=True)
+        self.assertGreater(self.rotor.alfa, 0)
+        self.assertAlmostEqual(self.rotor.power_total, self.rotor.power_trim)
+        self.assertAlmostEqual(self.rotor.power_induced + self.rotor.power_profile + self.rotor.power_parasite, self.rotor.power_total)
+        trimmed = self.rotor.trim(41.0, 1.225, 0.557)
+        self.assertEqual(trimmed["jacobians"], 0) # Continues from the 40 m/s trim.
+        self.assertTrue(trimmed["converged"])
+        self.rotor.forward_flight(40.0, 1.225, 0.557)
+        self.assertEqual(self.rotor.alfa, 0)
+
+    def test_solve_trim(self):
+        state, jacobian, stats = solve_trim(lambda x: np.stack([x[..., 0]**2 - 2, x[..., 1] - 1, x[..., 2]**3 - 8, x[..., 3]], axis=-1),
+                                            np.array([1.0, 0, 1.5, 0.5]))
+        self.assertTrue(stats["converged"])
+        np.testing.assert_allclose(state, [np.sqrt(2), 1, 2, 0], atol=1e-8)
+
+
+class TestInflow(unittest.TestCase):
+    def test_models(self):
+        self.assertIsInstance(resolve_inflow("bemt"), MomentumInflow)
+        model = PittPeters()
+        self.assertIs(resolve_inflow(model), model)
+        with self.assertRaises(ValueError):
+            Rotor(**MD500E, polar=fixture_polar(), inflow="vortex")
+        forcing = np.array([[0.005, 0, 0], [0.005, 1e-4, -1e-4]])
+        np.testing.assert_allclose(model.steady(forcing[0], 0, 0.05), MomentumInflow().steady(forcing[0], 0, 0.05)) # Hover.
+        self.assertEqual(model.steady(forcing, 0.2, 0.03).shape, (2, 3))
+        self.assertGreater(model.steady(forcing[0], 0.2, 0.03)[2], 0) # More inflow at the rear in forward flight.
+        np.testing.assert_allclose(model.derivatives(model.steady(forcing, 0.2, 0.03), forcing, 0.2, 0.03), 0, atol=1e-12)
+
+        time, y = rk4(lambda t, y: -y * np.array([1, 2]), [1.0, 1.0], 0.05, 20)
+        self.assertEqual(y.shape, (21, 2))
+        np.testing.assert_allclose(y[-1], np.exp([-1, -2]), rtol=1e-5) # Fourth order.
+
+    def test_collective_step(self):
+        step = lambda time: np.where(time > 0.05, 1.0, 0.0)
+        results = {}
+        for inflow in ("bemt", "pitt-peters"):
+            rotor = Rotor(**MD500E, polar=fixture_polar(), inflow=inflow)
+            rotor.hover(1361, 1.225)
+            results[inflow] = rotor.simulate(1.5, 0.01, collective=step)["thrust"]
+        self.assertAlmostEqual(results["bemt"][0], results["pitt-peters"][0], delta=1e-3 * results["bemt"][0])
+        self.assertAlmostEqual(results["bemt"][6], results["bemt"][-1]) # Follows the collective instantly.
+        self.assertGreater(results["pitt-peters"].max(), 1.03 * results["pitt-peters"][-1]) # Overshoots until the inflow builds up.
+        self.assertAlmostEqual(results["pitt-peters"][-1], results["bemt"][-1], delta=2e-3 * results["bemt"][-1])
+
+    def test_gust_variants(self):
+        rotor = Rotor(**MD500E, polar=fixture_polar(), inflow="pitt-peters")
+        rotor.hover(1361, 1.225)
+        trimmed = rotor.trim(40.0, 1.225, 0.557)
+        self.assertTrue(trimmed["converged"])
+        results = rotor.simulate(0.5, 0.01, 40.0, 1.225, 0.557, gust=np.array([0.0, 2.0, 4.0]))
+        self.assertEqual(results["thrust"].shape, (51, 3))
+        self.assertEqual(results["inflow"].shape, (51, 3, 3))
+        np.testing.assert_allclose(results["thrust"][:, 0], trimmed["thrust"], rtol=1e-4) # Stays in trim without a gust.
+        self.assertTrue(np.all(np.diff(results["thrust"][-1]) > 0))
+        self.assertIs(rotor.simulation_results, results)
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        with open(os.path.join(DATA_DIR, "..", "tutorials", "presets", "MD500E.json")) as file:
+            self.preset = json.load(file)
+
+    def test_evaluate_preset(self):
+        async def run():
+            async with RotorServer(port=0, workers=0) as server:
+                answers = [await request("127.0.0.1", server.port, "POST", "/evaluate", self.preset) for _ in range(2)]
+                errors = [await request("127.0.0.1", server.port, "POST", "/evaluate", {"rotor_diameter": 8}),
+                          await request("127.0.0.1", server.port, "POST", "/evaluate", {"chord": "wide"}),
+                          await request("127.0.0.1", server.port, "GET", "/evaluate"),
+                          await request("127.0.0.1", server.port, "GET", "/rotors")]
+                status = await request("127.0.0.1", server.port, "GET", "/status")
+            return answers, errors, status
+
+        answers, errors, (_, status) = asyncio.run(run())
+        self.assertEqual(answers[0], answers[1])
+        self.assertEqual(answers[0][0], 200)
+        result = answers[0][1]
+        self.assertEqual(set(result), {"hover", "forward_flight", "range"})
+        rotor = Rotor("naca0015", 5, 0.17, 8.05, 0.604, -9, 0.032)
+        rotor.hover(1361, 1.225)
+        self.assertAlmostEqual(result["hover"]["power_total"], rotor.hover_power_total, places=6)
+        self.assertGreaterEqual(result["hover"]["thrust"], 1361 * 9.81)
+        self.assertGreater(result["range"]["range"], 0)
+        self.assertEqual([status for status, _ in errors], [400, 400, 405, 404])
+        self.assertEqual((status["computed"], status["cache_hits"]), (1, 1))
+
+    def test_identical_requests_are_coalesced(self):
+        async def run():
+            async with RotorServer(port=0, workers=0) as server:
+                results = await asyncio.gather(*(server.submit(dict(self.preset, gross=1300)) for _ in range(3)))
+                return results, server.stats
+        results, stats = asyncio.run(run())
+        self.assertTrue(results[0] == results[1] == results[2])
+        self.assertEqual((stats["computed"], stats["coalesced"]), (1, 2))
+
+
+class TestUtils(unittest.TestCase):
+    def test_walds_solver(self):
+        ratio = walds_solver(20, 10)
+        self.assertAlmostEqual(walds_equation(2, ratio), 1, places=3)
+
+    def test_read_probe_txt(self):
+        filepath = os.path.join(DATA_DIR, "figures", "MeanLiftCoef.vs.MeanDragCoef_(Fig3-1.AMCP706-201).txt")
+        data = read_txt(filepath)
+        self.assertEqual(data.shape[1], 2)
+        self.assertAlmostEqual(probe_txt(filepath, 0.1), (0.0088 + 0.008) / 2)
+
+    def test_polar_from_data(self):
+        polar = fixture_polar()
+        cl, cd = polar.get_polar(2.5)
+        self.assertAlmostEqual(cl, 0.105 * 2.5)
+        self.assertAlmostEqual(polar.get_cl_slope(), 0.105 * 180 / np.pi)
+
+    def test_reynolds(self):
+        self.assertAlmostEqual(reynolds(100, 0.5, 1.5e-5), 100 * 0.5 / 1.5e-5)
+
+
+class TestXfoil(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        fake_xfoil = os.path.join(os.path.dirname(__file__), "fake_xfoil.py")
+        self.xfoil = Xfoil(exe_path=[sys.executable, fake_xfoil], timeout=10)
+        self.xfoil.output_path = os.path.join(self.tmp_dir.name, "polar.txt")
+
+    def tearDown(self):
+        self.xfoil.close()
+        self.tmp_dir.cleanup()
+
+    def test_session_is_lazy_and_reused(self):
+        self.assertIsNone(self.xfoil.process)
+        with profiling.Profiler() as prof:
+            first = self.xfoil.simulate("naca0012", 0.3, 1e6)
+            second = self.xfoil.simulate("naca0015", 0.3, 2e6)
+        self.assertEqual(prof.stats["xfoil_launches"], 1)
+        self.assertEqual(first.shape, (27, 5)) # alfa -8..18, points above 18° failed to converge.
+        np.testing.assert_allclose(first, second)
+        np.testing.assert_allclose(self.xfoil.read_polar(), second, atol=1e-4)
+
+    def test_session_is_recycled_on_error(self):
+        crash_file = os.path.join(self.tmp_dir.name, "crash")
+        open(crash_file, "w").close()
+        os.environ["FAKE_XFOIL_CRASH_FILE"] = crash_file
+        try:
+            with profiling.Profiler() as prof:
+                polar = self.xfoil.simulate("naca0012", 0.3, 1e6)
+        finally:
+            del os.environ["FAKE_XFOIL_CRASH_FILE"]
+        self.assertEqual(prof.stats["xfoil_launches"], 2)
+        self.assertAlmostEqual(polar[10, 1], 0.1 * polar[10, 0])
+
 
-#     def tearDown(self):
-#         """Tear down test fixtures, if any."""
+class TestPanel(unittest.TestCase):
+    def test_panel_polar(self):
+        polar = panel_polar("naca0012", 0.0, 3e6)
+        self.assertEqual(polar.shape, (29, 3))
+        cl_slope = (polar[10, 1] - polar[6, 1]) / np.deg2rad(4) # Around 0°.
+        self.assertAlmostEqual(polar[8, 1], 0, places=6)
+        self.assertTrue(0.9 * 2*np.pi < cl_slope < 1.1 * 2*np.pi)
+        self.assertTrue(np.all(polar[:, 2] > 0.004))
 
-#     def test_000_something(self):
-#         """Test something."""
-#         print("testing something...")
+    def test_naca_parameters(self):
+        self.assertEqual(naca_parameters("naca2412")["camber_position"], 0.4)
+        self.assertAlmostEqual(naca_parameters("naca23012")["camber_position"], 0.15, places=2)
+        with self.assertRaises(ValueError):
+            naca_parameters("naca641212")
 
-# testobject = TestPycopter
-# testobject.test_000_something()
+    def test_polar_falls_back_to_panel(self):
+        polar = Polar("naca23012", 0.3, 4e6, xfoil=Xfoil(exe_path="/nonexistent/xfoil"))
+        self.assertEqual(polar.method, "panel")
+        cl, cd = polar.get_polar(5)
+        self.assertGreater(cl, 0.5)
+        with self.assertRaises(XfoilError):
+            Polar("naca23012", 0.3, 4e6, xfoil=Xfoil(exe_path="/nonexistent/xfoil"), method="xfoil")
 
 
 if __name__ =="__main__":
-    unittest.main()
\ No newline at end of file
+    unittest.main()